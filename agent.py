@@ -3,155 +3,370 @@ import sys
 import argparse
 import shutil
 import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from dotenv import load_dotenv
-from typing import Dict, List
+from typing import Dict, Iterator, List, Tuple
 
-
-from core.token_estimator import TokenEstimator
+# Only lightweight local modules load here: google-genai, atlassian and tiktoken are imported by the
+# code paths that use them, so `--help`, `estimate` and `publish` skip the backends they do not need
+from core.token_estimator import TOKENIZER_BUNDLE_DIR, TokenEstimator, bundle_encoding
 from core.codebase_processor import CodebaseProcessor
-from core.llm_client import LlamaScoutClient
-from docs.doc_generator import DocumentationGenerator
-from docs.confluence_uploader import publish_to_confluence
+from core.repo_source import diff_changes, is_archive
+from core.local_analysis import build_grounding
+from core.security import is_sensitive_file
+from core.shards import plan_shards, shard_dependencies
+from core.dedup import deduplicate, format_dedup_report, format_duplicate_note
+from core.compactor import COMPACTION_LEVELS, Compactor, format_compaction_report
+from core.output_budget import OutputPlanner
+from core.prompt_builder import PromptBuilder, PromptPayload
+from core.run_history import HISTORY_FILE, RunRecorder, append_run, format_tier_summary, load_history
+from docs.doc_generator import DocumentationGenerator, doc_files
+from docs.site_builder import build_site
 
-load_dotenv()
+SUBCOMMANDS = ('generate', 'publish', 'estimate', 'render-diagrams', 'build-site', 'report', 'bundle-tokenizer')
 
 class DocumentationAgent:
-    def __init__(self, llm_endpoint: str, output_dir: str = "output", max_tokens: int = 10000000):
+    def __init__(self, llm_endpoint: str, output_dir: str = "output", max_tokens: int = 10000000,
+                 compaction_level: str = "standard"):
         self.output_dir = output_dir
         self.max_tokens = max_tokens
+        self.compactor = Compactor(compaction_level)
+        self.activity: Dict[str, float] = {}
         
         self.token_estimator = TokenEstimator()
-        self.processor = CodebaseProcessor()
-        self.llm_client = LlamaScoutClient()
+        self.processor = CodebaseProcessor(cache_dir=os.path.join(output_dir, '.cache'))
+        self._llm_client = None
         self.doc_generator = DocumentationGenerator(output_dir)
+        self.site_dir = os.path.join(output_dir, 'site')
+        self.recorder = RunRecorder()
         
         os.makedirs(output_dir, exist_ok=True)
     
+    @property
+    def llm_client(self):
+        """Gemini client, created (and google-genai imported) on first use"""
+        if self._llm_client is None:
+            from core.llm_client import LlamaScoutClient
+            # Output budgets adapt to the lengths and latencies of earlier runs
+            history = load_history(os.path.join(self.output_dir, HISTORY_FILE))
+            self._llm_client = LlamaScoutClient(output_planner=OutputPlanner.from_history(history))
+        return self._llm_client
+    
+    @contextmanager
+    def _recording(self, command: str, source: str) -> Iterator[RunRecorder]:
+        """Record the enclosed run (stages, counts, LLM calls, cache use) in the run history, even when it fails"""
+        self.recorder = RunRecorder(command, source)
+        first_call = len(self._llm_client.calls) if self._llm_client else 0
+        symbols = self.processor.symbol_extractor
+        symbol_hits, symbol_misses = symbols.hits, symbols.misses
+        status = 'error'
+        try:
+            yield self.recorder
+            status = 'ok'
+        finally:
+            if self._llm_client:
+                self._llm_client.release_payload_caches()
+            # File contents of this run live in memory-mapped temp files, released like the clone
+            self.processor.close()
+            self.recorder.cache('symbols', symbols.hits - symbol_hits, symbols.misses - symbol_misses)
+            calls = self._llm_client.calls[first_call:] if self._llm_client else []
+            append_run(os.path.join(self.output_dir, HISTORY_FILE), self.recorder.finish(status, calls))
+            if calls:
+                print(format_tier_summary(calls))
+    
     def run(self, github_url: str) -> Dict[str, str]:
         """Main execution pipeline"""
         print("Starting AI Code Documentation Agent v3...")
         
         try:
-            # Step 1: Clone repository
+            with self._recording('generate', github_url):
+                # Steps 1-2: Clone and process the repository
+                repo_path, is_local_archive, files, stats = self._load_codebase(github_url)
+                
+                shards = plan_shards(files, stats['project_markers'])
+                if len(shards) > 1:
+                    print(f"Monorepo detected: documenting {len(shards)} subprojects "
+                          f"({', '.join(shard['name'] for shard in shards)})")
+                    generated_files, metadata = self._run_sharded(shards)
+                else:
+                    prepared = self._prepare_input(files, stats)
+                    
+                    # Step 4: Generate documentation
+                    print("Generating documentation with Gemini 2.5 pro...")
+                    with self.recorder.stage('generate'):
+                        generated_files = self.doc_generator.generate_all_docs(
+                            self.llm_client, prepared['llm_input'], prepared['grounding'])
+                    metadata = {
+                        'token_count': prepared['token_count'],
+                        'used_full_content': prepared['used_full_content']
+                    }
+                
+                # Offline HTML site with embedded diagrams and search
+                with self.recorder.stage('site'):
+                    build_site(self.doc_generator.docs_dir, self.site_dir)
+                generated_files['site'] = os.path.join(self.site_dir, 'index.html')
+                
+                # Step 5: Save metadata
+                metadata_path = os.path.join(self.output_dir, 'generation_metadata.json')
+                with open(metadata_path, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        'repository_url': github_url,
+                        'generation_time': datetime.now().isoformat(),
+                        'stats': stats,
+                        **metadata,
+                        'generated_files': list(generated_files.keys())
+                    }, f, indent=2)
+                
+                generated_files['metadata'] = metadata_path
+                
+                # Cleanup
+                if not is_local_archive:
+                    shutil.rmtree(repo_path, ignore_errors=True)
+                
+                print("\nDocumentation generation complete!")
+                print(f"Output directory: {self.output_dir}")
+                for doc_type, file_path in generated_files.items():
+                    print(f"  {doc_type}: {file_path}")
+                
+                return generated_files
+                
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            raise
+    
+    def _load_codebase(self, github_url: str) -> Tuple[str, bool, List[Dict], Dict]:
+        """Clone (or open) the repository and read its files; returns (repo_path, is_local_archive, files, stats)"""
+        # Step 1: Clone repository (local archives are read in place)
+        is_local_archive = self.processor.is_local_archive(github_url)
+        if is_local_archive:
+            print("Reading local archive...")
+            repo_path = github_url
+        else:
             print("Cloning repository...")
-            repo_path = self.processor.clone_repository(github_url)
-            
-            # Step 2: Process codebase
-            print("Processing codebase...")
+            with self.recorder.stage('clone'):
+                repo_path = self.processor.clone_repository(github_url)
+        
+        # Step 2: Process codebase
+        print("Processing codebase...")
+        with self.recorder.stage('process'):
             files, stats = self.processor.process_codebase(repo_path)
+        
+        if not files:
+            raise Exception("No supported files found in repository")
+        
+        print(f"Found {stats['total_files']} files in {len(stats['languages'])} languages")
+        self.recorder.count('files', stats['total_files'])
+        self.recorder.count('lines', stats['total_lines'])
+        
+        # Churn, recency and author spread from git history steer the summary budget
+        with self.recorder.stage('git_history'):
+            self.activity = self.processor.file_activity(repo_path)
+        if self.activity:
+            print(f"Git history analysed for {len(self.activity)} files")
+        
+        return repo_path, is_local_archive, files, stats
+    
+    def estimate(self, github_url: str) -> Dict:
+        """Prepare the LLM input exactly as `run` would and report its size, without calling the LLM"""
+        with self._recording('estimate', github_url):
+            repo_path, is_local_archive, files, stats = self._load_codebase(github_url)
+            try:
+                shards = plan_shards(files, stats['project_markers'])
+                estimates = []
+                for shard in shards:
+                    if len(shards) > 1:
+                        print(f"\n[{shard['name']}] {shard['stats']['total_files']} files under '{shard['root'] or '.'}'")
+                    prepared = self._prepare_input(shard['files'], shard['stats'])
+                    estimates.append({
+                        'name': shard['name'],
+                        'files': shard['stats']['total_files'],
+                        'token_count': prepared['token_count'],
+                        'input_tokens': prepared['input_tokens'],
+                        'used_full_content': prepared['used_full_content']
+                    })
+            finally:
+                if not is_local_archive:
+                    shutil.rmtree(repo_path, ignore_errors=True)
             
-            if not files:
-                raise Exception("No supported files found in repository")
-            
-            print(f"Found {stats['total_files']} files in {len(stats['languages'])} languages")
-            
-            # Step 3: Prepare content for LLM
-            print("Preparing content for LLM analysis...")
+            print(f"\nToken estimate (budget {int(self.max_tokens * 0.8):,} per prompt):")
+            for shard in estimates:
+                mode = 'full content' if shard['used_full_content'] else 'summary'
+                print(f"  {shard['name']}: {shard['files']:,} files, {shard['token_count']:,} tokens, "
+                      f"sends {shard['input_tokens']:,} tokens ({mode})")
+            return {'repository_url': github_url, 'stats': stats, 'shards': estimates}
+    
+    def _prepare_input(self, files: List[Dict], stats: Dict) -> Dict:
+        """Local analysis plus the full-content or summary prompt for one project"""
+        # Static analysis that grounds (and shrinks) individual doc prompts
+        print("Running local code analysis...")
+        with self.recorder.stage('analysis'):
+            symbol_tables = self.processor.symbol_extractor.extract_all(files)
+            grounding = build_grounding(files, symbol_tables)
+        
+        # Step 3: Prepare content for LLM
+        print("Preparing content for LLM analysis...")
+        
+        with self.recorder.stage('prepare'):
+            # Fold copied and near-identical files into one representative each; sensitive files are
+            # left out of the clusters, as the prompt drops them and their copies would go with them
+            unique_files, clusters = deduplicate(files, exclude=is_sensitive_file)
+            if clusters:
+                print(format_dedup_report(clusters, files, self.token_estimator.estimate_tokens))
             
-            # Create full codebase content
-            full_content = self._create_full_content(files, stats)
-            content_tokens = self.token_estimator.estimate_tokens(full_content)
+            # Create full codebase content (token totals are kept while it is built)
+            full_content = self._create_full_content(unique_files, stats, clusters)
+            content_tokens = full_content.tokens
             
             print(f"Estimated tokens: {content_tokens:,}")
             
             # Decide whether to send full content or summary
-            if content_tokens <= self.max_tokens * 0.8:  # Leave 20% buffer for response
+            used_full_content = content_tokens <= self.max_tokens * 0.8  # Leave 20% buffer for response
+            if used_full_content:
                 print("Sending full codebase to LLM...")
-                llm_input = full_content
+                llm_input = full_content.text
+                input_tokens = content_tokens
             else:
                 print("Codebase too large, creating intelligent summary...")
-                llm_input = self.processor.create_filtered_summary(files, stats)
-                print(f"Summary tokens: {self.token_estimator.estimate_tokens(llm_input):,}")
-            
-            # Step 4: Generate documentation
-            print("Generating documentation with Gemini 2.5 pro...")
-            generated_files = self.doc_generator.generate_all_docs(self.llm_client, llm_input)
+                llm_input = self.processor.create_filtered_summary(
+                    unique_files, stats, token_limit=int(self.max_tokens * 0.8), activity=self.activity
+                )
+                input_tokens = self.token_estimator.estimate_tokens(llm_input)
+                print(f"Summary tokens: {input_tokens:,}")
+        self.recorder.count('token_count', content_tokens)
+        self.recorder.count('input_tokens', input_tokens)
+        
+        return {'llm_input': llm_input, 'grounding': grounding, 'token_count': content_tokens,
+                'input_tokens': input_tokens, 'used_full_content': used_full_content}
+    
+    def _run_sharded(self, shards: List[Dict]) -> Tuple[Dict[str, str], Dict]:
+        """Document each subproject with its own budget, then roll the results up into top-level docs"""
+        # Local analysis is CPU-bound and already parallel inside, so shards are prepared one at a time
+        prepared = {}
+        for shard in shards:
+            print(f"\n[{shard['name']}] {shard['stats']['total_files']} files under '{shard['root'] or '.'}'")
+            prepared[shard['name']] = self._prepare_input(shard['files'], shard['stats'])
+        
+        # LLM calls are I/O-bound, so the shards are generated concurrently
+        self.doc_generator.remove_shard_docs()
+        
+        def generate(shard: Dict) -> Dict[str, str]:
+            generator = self.doc_generator.shard_generator(shard['name'])
+            shard_input = prepared[shard['name']]
+            return generator.generate_all_docs(self.llm_client, shard_input['llm_input'], shard_input['grounding'])
+        
+        print(f"\nGenerating documentation for {len(shards)} subprojects...")
+        workers = int(os.getenv('SHARD_CONCURRENCY', '4'))
+        with self.recorder.stage('generate'), ThreadPoolExecutor(max_workers=workers) as pool:
+            shard_docs = dict(zip((shard['name'] for shard in shards), pool.map(generate, shards)))
+        
+        print("Rolling up subproject documentation...")
+        with self.recorder.stage('rollup'):
+            dependencies = shard_dependencies(shards)
+            generated_files = self.doc_generator.generate_rollup(self.llm_client, shards, shard_docs, dependencies)
+        
+        metadata = {
+            'token_count': sum(shard_input['token_count'] for shard_input in prepared.values()),
+            'used_full_content': all(shard_input['used_full_content'] for shard_input in prepared.values()),
+            'shards': [{
+                'name': shard['name'],
+                'root': shard['root'],
+                'files': shard['stats']['total_files'],
+                'token_count': prepared[shard['name']]['token_count'],
+                'used_full_content': prepared[shard['name']]['used_full_content'],
+                'generated_files': shard_docs[shard['name']]
+            } for shard in shards],
+            'shard_dependencies': dependencies
+        }
+        return generated_files, metadata
+    
+    def update(self, github_url: str, diff_range: str) -> Dict[str, List[str]]:
+        """Patch existing docs for the changes in `diff_range` instead of regenerating them"""
+        print(f"Updating documentation for {diff_range}...")
+        
+        with self._recording('update', github_url):
+            is_local_archive = self.processor.is_local_archive(github_url)
+            is_local_repo = is_local_archive or os.path.isdir(github_url)
+            with self.recorder.stage('clone'):
+                repo_path = github_url if is_local_repo else self.processor.clone_repository(github_url)
+            try:
+                with self.recorder.stage('diff'):
+                    changes = diff_changes(repo_path, diff_range)
+                changes = [change for change in changes if not self.processor.should_ignore(change['path'])
+                           and not is_sensitive_file({'path': change['path'], 'content': change['patch']})]
+                print(f"Found {len(changes)} changed files")
+                self.recorder.count('changed_files', len(changes))
+                
+                # The checkout stays until patching is done: grounded diagrams are rebuilt from it
+                with self.recorder.stage('patch'):
+                    patched = self.doc_generator.patch_docs(
+                        self.llm_client, changes, lambda: self._grounded_diagrams(repo_path)) if changes else {}
+            finally:
+                if not is_local_repo:
+                    shutil.rmtree(repo_path, ignore_errors=True)
+            if not patched:
+                print("No documentation sections are affected")
+                return patched
             
-            # Step 5: Save metadata
             metadata_path = os.path.join(self.output_dir, 'generation_metadata.json')
+            metadata = {}
+            if os.path.exists(metadata_path):
+                with open(metadata_path, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+            metadata.setdefault('updates', []).append({
+                'diff_range': diff_range,
+                'update_time': datetime.now().isoformat(),
+                'changed_files': [change['path'] for change in changes],
+                'patched_sections': patched
+            })
             with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'repository_url': github_url,
-                    'generation_time': datetime.now().isoformat(),
-                    'stats': stats,
-                    'token_count': content_tokens,
-                    'used_full_content': content_tokens <= self.max_tokens * 0.8,
-                    'generated_files': list(generated_files.keys())
-                }, f, indent=2)
-            
-            generated_files['metadata'] = metadata_path
-            
-            # Cleanup
-            shutil.rmtree(repo_path, ignore_errors=True)
-            
-            print("\nDocumentation generation complete!")
-            print(f"Output directory: {self.output_dir}")
-            for doc_type, file_path in generated_files.items():
-                print(f"  {doc_type}: {file_path}")
+                json.dump(metadata, f, indent=2)
             
-            return generated_files
+            # Only the patched pages are converted again
+            with self.recorder.stage('site'):
+                build_site(self.doc_generator.docs_dir, self.site_dir)
             
-        except Exception as e:
-            print(f"Error: {str(e)}")
-            raise
+            print("\nDocumentation update complete!")
+            return patched
     
-    def _create_full_content(self, files: List[Dict], stats: Dict) -> str:
+    def _grounded_diagrams(self, repo_path: str) -> Dict[str, List[str]]:
+        """Mermaid diagrams the local analysis builds for a checkout, per doc type"""
+        print("Rebuilding diagrams from local analysis...")
+        files, _ = self.processor.process_codebase(repo_path)
+        grounding = build_grounding(files, self.processor.symbol_extractor.extract_all(files))
+        return {doc_type: entry['diagrams'] for doc_type, entry in grounding.items()}
+    
+    def _create_full_content(self, files: List[Dict], stats: Dict, clusters: List[Dict] = ()) -> PromptPayload:
         """Create complete codebase content for LLM with security filtering"""
-        
-        # Security sensitive patterns to filter out
-        sensitive_patterns = {
-            # Environment and configuration files
-            '.env', 'config.json', 'settings.json', 'appsettings.json',
-            # Authentication files
-            'auth', 'credentials', 'secret', 'password', 'token',
-            # Virtual environments and dependencies
-            'venv', 'env', 'node_modules', '__pycache__', 'vendor',
-            # Build and cache
-            'dist', 'build', '.next', '.nuxt', 'coverage', 'target',
-            # IDE and editor files
-            '.idea', '.vscode', '.vs',
-            # Compiled files
-            '.pyc', '.class', '.jar', '.war',
-            # Key and certificate files
-            '.pem', '.key', '.crt', '.cer', '.pfx', '.p12',
-            # Database files
-            '.db', '.sqlite', '.sqlite3',
-            # Log files
-            '.log', 'logs/',
-            # Temporary files
-            'tmp/', 'temp/', '.tmp', '.temp'
-        }
+        duplicate_notes = {cluster['representative']: format_duplicate_note(cluster) for cluster in clusters}
         
         # Filter out sensitive files
         filtered_files = []
         skipped_count = 0
         
         for file_data in files:
-            path = file_data['path'].lower()
-            
-            # Skip if file contains sensitive patterns
-            if any(pattern in path for pattern in sensitive_patterns):
-                skipped_count += 1
-                continue
-                
-            # Skip if file might contain sensitive content
-            if any(keyword in file_data['content'].lower() 
-                  for keyword in ['password', 'secret', 'token', 'key', 'credential', 'auth']):
+            if is_sensitive_file(file_data):
                 skipped_count += 1
                 continue
                 
             filtered_files.append(file_data)
         
+        # Strip comments, literals and data values that cost tokens without informing the model
+        compacted, report = self.compactor.compact_files(filtered_files, self.token_estimator.estimate_tokens)
+        if report:
+            print(format_compaction_report(report, self.compactor.level))
+        
         # Update stats for filtered content
         filtered_stats = stats.copy()
         filtered_stats['total_files'] -= skipped_count
+        duplicate_count = sum(len(cluster['duplicates']) for cluster in clusters)
         
-        content_parts = [f"""
+        prompt = PromptBuilder(self.token_estimator.estimate_tokens)
+        prompt.write(f"""
 CODEBASE ANALYSIS REQUEST
 
 PROJECT STATISTICS (After Security Filtering):
-- Total Files: {filtered_stats['total_files']} (Excluded {skipped_count} sensitive files)
+- Total Files: {filtered_stats['total_files']} (Excluded {skipped_count} sensitive files, {duplicate_count} duplicates shown once)
 - Total Lines: {stats['total_lines']}
 - Languages: {', '.join(stats['languages'].keys())}
 
@@ -160,60 +375,182 @@ LANGUAGE BREAKDOWN:
 
 === FILTERED CODEBASE CONTENT ===
 Note: Security-sensitive files and content have been excluded
-"""]
+Note: Content compacted ({self.compactor.level}): comments, long literals and data values may be omitted
+""")
         
         for file_data in filtered_files:
-            content_parts.append(f"""
-FILE: {file_data['path']}
+            note = duplicate_notes.get(file_data['path'])
+            also = f"\nALSO REPRESENTS: {note}" if note else ''
+            prompt.write(f"""
+FILE: {file_data['path']}{also}
 LANGUAGE: {file_data['language']}
 LINES: {file_data['lines']}
 SIZE: {file_data['size']} bytes
 
 CONTENT:
-{file_data['content']}
+{compacted[file_data['path']]}
 
 ---END FILE---
 """)
         
-        return '\n'.join(content_parts)
+        return prompt.build()
+
+def publish_docs(docs_folder: str) -> bool:
+    """Upload the docs to Confluence when credentials are configured; returns whether it published"""
+    confluence_url = os.getenv('CONFLUENCE_URL')
+    space_key = os.getenv('CONFLUENCE_SPACE_KEY')
+    username = os.getenv('CONFLUENCE_USERNAME')
+    api_token = os.getenv('CONFLUENCE_API_TOKEN')
+    
+    if not all([confluence_url, space_key, username, api_token]):
+        print("\nℹ️ Skipping Confluence upload - credentials not found in .env file")
+        return False
+    
+    from docs.confluence_uploader import publish_to_confluence
+    publish_to_confluence(
+        confluence_url, space_key, docs_folder, username, api_token,
+        concurrency=int(os.getenv('CONFLUENCE_CONCURRENCY', '8')),
+        requests_per_second=float(os.getenv('CONFLUENCE_RATE_LIMIT', '10')),
+        markdown_backend=os.getenv('CONFLUENCE_MARKDOWN_BACKEND', 'single-pass')
+    )
+    print("\n✅ Documentation successfully uploaded to Confluence!")
+    return True
+
+
+def render_diagrams(docs_folder: str) -> List[str]:
+    """Render the Mermaid blocks of every doc to <docs>/diagrams/<doc>_diagram_<n>.png
+    (<docs>/shards/<name>/diagrams/ for a sharded run's subproject docs)"""
+    from docs.confluence_uploader import replace_mermaid_with_png
+    from docs.mermaid_renderer import MermaidRenderer, extract_mermaid_blocks
+    
+    contents = {}
+    for filename in doc_files(docs_folder):
+        with open(os.path.join(docs_folder, filename), 'r', encoding='utf-8') as f:
+            contents[filename] = f.read()
+    
+    renderer = MermaidRenderer(os.path.join(os.path.dirname(os.path.abspath(docs_folder)), '.cache', 'mermaid'))
+    if not renderer.available:
+        raise Exception("Mermaid CLI not found. Please install it using: npm install -g @mermaid-js/mermaid-cli")
+    renderer.render_all(source for content in contents.values() for source in extract_mermaid_blocks(content))
+    print(f"Diagrams: {renderer.rendered} rendered, {renderer.hits} cached, {len(renderer.failed)} failed")
+    
+    pngs = []
+    for filename, content in contents.items():
+        folder, basename = os.path.split(filename)
+        pngs.extend(replace_mermaid_with_png(content, os.path.join(docs_folder, folder),
+                                             os.path.splitext(basename)[0], renderer)[1])
+    return pngs
+
 
-def main():
+def _validate_source(source: str, allow_local_checkout: bool = False) -> None:
+    is_local_checkout = allow_local_checkout and os.path.isdir(source)
+    if not source.startswith(('https://github.com/', 'git@github.com:')) and not is_archive(source) \
+            and not is_local_checkout:
+        print("Error: Please provide a valid GitHub URL or local archive")
+        sys.exit(1)
+
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description='AI Code Documentation Agent v3 - Llama-4-Scout Edition')
-    parser.add_argument('github_url', help='GitHub repository URL')
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    
+    generate = commands.add_parser('generate', help='Generate (or update) the docs and publish them to Confluence')
+    generate.add_argument('github_url', help='GitHub repository URL or path to a local .zip/.tar(.gz) archive')
+    generate.add_argument('--compaction', default='standard', choices=list(COMPACTION_LEVELS),
+                          help='How aggressively file contents are compacted before sending (default: standard)')
+    generate.add_argument('--update', metavar='RANGE',
+                          help='Patch existing docs for the changes in a git range (e.g. v1.2..HEAD) instead of regenerating')
+    generate.add_argument('--no-publish', action='store_true', help='Skip the Confluence upload')
+    
+    estimate = commands.add_parser('estimate', help='Report the prompt size for a repository without calling the LLM')
+    estimate.add_argument('github_url', help='GitHub repository URL or path to a local .zip/.tar(.gz) archive')
+    estimate.add_argument('--compaction', default='standard', choices=list(COMPACTION_LEVELS),
+                          help='How aggressively file contents are compacted before sending (default: standard)')
+    
+    publish = commands.add_parser('publish', help='Upload previously generated docs to Confluence')
+    publish.add_argument('--docs-dir', default=os.path.join('output', 'docs'), help='Docs folder (default: output/docs)')
     
-    args = parser.parse_args()
+    render = commands.add_parser('render-diagrams', help='Render the Mermaid diagrams of generated docs to PNG')
+    render.add_argument('--docs-dir', default=os.path.join('output', 'docs'), help='Docs folder (default: output/docs)')
+    
+    site = commands.add_parser('build-site', help='Build (or refresh) the offline HTML site with search from generated docs')
+    site.add_argument('--docs-dir', default=os.path.join('output', 'docs'), help='Docs folder (default: output/docs)')
+    site.add_argument('--site-dir', default=os.path.join('output', 'site'), help='Site folder (default: output/site)')
+    
+    tokenizer = commands.add_parser('bundle-tokenizer',
+                                    help='Download the tiktoken encoding into a local bundle for offline token counts')
+    tokenizer.add_argument('--model', default='gpt-4', help='Model whose encoding to bundle (default: gpt-4)')
+    tokenizer.add_argument('--dir', default=TOKENIZER_BUNDLE_DIR, help='Bundle folder (default: assets/tiktoken next to agent.py)')
+    
+    report = commands.add_parser('report', help='Render the run history as an interactive HTML dashboard')
+    report.add_argument('--history', default=os.path.join('output', HISTORY_FILE),
+                        help=f'Run history file (default: output/{HISTORY_FILE})')
+    report.add_argument('--output', default=os.path.join('output', 'run_report.html'),
+                        help='Dashboard file to write (default: output/run_report.html)')
+    return parser
+
+
+def main(argv: List[str] = None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # `agent.py <url> [options]` predates the subcommands and still means `generate`
+    if argv and argv[0] not in SUBCOMMANDS and not argv[0].startswith('-'):
+        argv.insert(0, 'generate')
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+    
+    from dotenv import load_dotenv
+    load_dotenv()
     
     # Set default values
     llm_endpoint = os.getenv("LLM_ENDPOINT")  # Default Llama endpoint
     output_dir = "output"
     max_tokens = 1048576
     
-    # Validate GitHub URL
-    if not args.github_url.startswith(('https://github.com/', 'git@github.com:')):
-        print("Error: Please provide a valid GitHub URL")
-        sys.exit(1)
-    
     try:
-        agent = DocumentationAgent(llm_endpoint, output_dir, max_tokens)
-        results = agent.run(args.github_url)
+        if args.command == 'publish':
+            publish_docs(args.docs_dir)
+            return
+        if args.command == 'render-diagrams':
+            pngs = render_diagrams(args.docs_dir)
+            print(f"Wrote {len(pngs)} diagram(s) to {os.path.join(args.docs_dir, 'diagrams')}")
+            return
+        if args.command == 'build-site':
+            build_site(args.docs_dir, args.site_dir)
+            return
+        if args.command == 'bundle-tokenizer':
+            written = bundle_encoding(args.model, args.dir)
+            print(f"Tokenizer for {args.model} bundled in {args.dir} ({len(written)} new file(s))")
+            return
+        if args.command == 'report':
+            runs = load_history(args.history)
+            if not runs:
+                raise Exception(f"No runs recorded in {args.history}")
+            from docs.run_report import render_run_report
+            print(f"Run report for {len(runs)} runs: {render_run_report(runs, args.output)}")
+            return
+        
+        # Validate GitHub URL
+        _validate_source(args.github_url, allow_local_checkout=args.command == 'generate' and bool(args.update))
+        agent = DocumentationAgent(llm_endpoint, output_dir, max_tokens, args.compaction)
+        if args.command == 'estimate':
+            agent.estimate(args.github_url)
+            return
+        
+        if args.update:
+            agent.update(args.github_url, args.update)
+        else:
+            agent.run(args.github_url)
         
         print("\nGeneration completed successfully!")
+        if args.no_publish:
+            return
         
         # Automatically upload to Confluence
         try:
-                
-            confluence_url = os.getenv('CONFLUENCE_URL')
-            space_key = os.getenv('CONFLUENCE_SPACE_KEY')
-            username = os.getenv('CONFLUENCE_USERNAME')
-            api_token = os.getenv('CONFLUENCE_API_TOKEN')
-            
-            if all([confluence_url, space_key, username, api_token]):
-                docs_folder = os.path.join('output', 'docs')
-                publish_to_confluence(confluence_url, space_key, docs_folder, username, api_token)
-                print("\n✅ Documentation successfully uploaded to Confluence!")
-            else:
-                print("\nℹ️ Skipping Confluence upload - credentials not found in .env file")
-        
+            publish_docs(os.path.join(output_dir, 'docs'))
         except Exception as e:
             print(f"\n⚠️ Confluence upload failed: {str(e)}")
             print("Documentation was generated successfully, but could not be uploaded to Confluence.")
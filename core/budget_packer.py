@@ -0,0 +1,80 @@
+from typing import Dict, List, Optional
+
+# Share of a file's importance that each representation conveys
+REPRESENTATION_VALUES = {'full': 1.0, 'signature': 0.4, 'line': 0.1}
+
+
+def _hull_upgrades(key: str, score: float, costs: Dict[str, int]) -> List[tuple]:
+    """Upper convex hull of a file's (cost, value) options, as incremental upgrades.
+
+    Each upgrade is (efficiency, key, representation, extra cost, extra value); along the
+    hull efficiencies decrease, so upgrades of one file are always taken in order.
+    """
+    points = [(0, 0.0, None)]
+    for representation, cost in sorted(costs.items(), key=lambda item: (item[1], -REPRESENTATION_VALUES[item[0]])):
+        value = score * REPRESENTATION_VALUES[representation]
+        if value <= points[-1][1]:
+            continue  # Dominated: costs more without conveying more
+        # Drop points that fall under the segment to the new one
+        while len(points) >= 2:
+            (c1, v1, _), (c2, v2, _) = points[-2], points[-1]
+            if (v2 - v1) * (cost - c1) <= (value - v1) * (c2 - c1):
+                points.pop()
+            else:
+                break
+        points.append((cost, value, representation))
+
+    upgrades = []
+    for (c1, v1, _), (c2, v2, representation) in zip(points, points[1:]):
+        extra_cost, extra_value = c2 - c1, v2 - v1
+        efficiency = extra_value / extra_cost if extra_cost else float('inf')
+        upgrades.append((efficiency, key, representation, extra_cost, extra_value))
+    return upgrades
+
+
+def pack_budget(items: List[Dict], budget: int) -> Dict[str, Optional[str]]:
+    """Multiple-choice knapsack: pick one representation (or none) per item within `budget` tokens.
+
+    `items` are {'key', 'score', 'costs': {'full': tokens, 'signature': tokens, 'line': tokens}}
+    (any subset of representations). Returns {key: representation or None}.
+
+    Greedy over convex-hull upgrades sorted by value per token, which is optimal for the
+    LP relaxation up to the single upgrade that does not fit; a second pass then spends the
+    leftover budget on the best affordable direct upgrades. O(n log n), so it stays well under
+    a second for tens of thousands of files.
+    """
+    choice: Dict[str, Optional[str]] = {item['key']: None for item in items}
+    upgrades = []
+    for item in items:
+        upgrades.extend(_hull_upgrades(item['key'], item['score'], item['costs']))
+    upgrades.sort(key=lambda upgrade: -upgrade[0])
+
+    remaining = budget
+    blocked = set()
+    for _, key, representation, extra_cost, _ in upgrades:
+        if key in blocked:
+            continue
+        if extra_cost <= remaining:
+            choice[key] = representation
+            remaining -= extra_cost
+        else:
+            blocked.add(key)  # Later upgrades of this file build on the one that did not fit
+
+    # Fill the leftover budget with the best direct jumps the hull walk skipped
+    candidates = []
+    for item in items:
+        current = choice[item['key']]
+        current_cost = item['costs'][current] if current else 0
+        current_value = item['score'] * REPRESENTATION_VALUES[current] if current else 0.0
+        for representation, cost in item['costs'].items():
+            gain = item['score'] * REPRESENTATION_VALUES[representation] - current_value
+            if gain > 0 and cost - current_cost <= remaining:
+                candidates.append((gain, item['key'], representation, cost - current_cost))
+    candidates.sort(key=lambda candidate: -candidate[0])
+    upgraded = set()
+    for _, key, representation, extra_cost in candidates:
+        if key not in upgraded and extra_cost <= remaining:
+            choice[key] = representation
+            remaining -= extra_cost
+            upgraded.add(key)
+    return choice
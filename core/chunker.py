@@ -0,0 +1,162 @@
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.parallel import parallel_map
+
+# Lines where a logical unit (class, function, element, statement, key) can start, per language.
+# Only the leading indentation is captured: it ranks boundaries, so outer units split first.
+_DECLARATION_MODIFIERS = r'(?:(?:public|protected|private|static|final|abstract|sealed|synchronized|native|default|strictfp)[ \t]+)'
+BOUNDARY_PATTERNS = {
+    'python': re.compile(r'^([ \t]*)(?:@[\w.]+|(?:async[ \t]+)?def[ \t]+\w|class[ \t]+\w)', re.MULTILINE),
+    'java': re.compile(r'^([ \t]*)(?:@(?!interface\b)\w+|/\*\*'
+                       + r'|' + _DECLARATION_MODIFIERS + r'*(?:class|interface|enum|record|@interface)[ \t]+\w'
+                       + r'|' + _DECLARATION_MODIFIERS + r'+[\w<>\[\],.?& \t]+?\()', re.MULTILINE),
+    'javascript': re.compile(r'^([ \t]*)(?:/\*\*|@\w+'
+                             r'|(?:export[ \t]+)?(?:default[ \t]+)?(?:async[ \t]+)?(?:function\*?|class|interface|type'
+                             r'|enum|abstract[ \t]+class|namespace|module)[ \t]+[\w$]'
+                             r'|(?:export[ \t]+)?(?:const|let|var)[ \t]+[\w$]+[ \t]*(?::[^=\n]+)?=[ \t]*(?:async[ \t]*)?'
+                             r'(?:\(|function|[\w$]+[ \t]*=>)'
+                             r'|(?:(?:public|private|protected|static|async|get|set|readonly|override)[ \t]+)+[\w$]+[ \t]*[(<]'
+                             r'|(?:describe|it|test)[ \t]*\()', re.MULTILINE),
+    'markup': re.compile(r'^([ \t]*)(?:<%[@!]?|<!--|<(?![/!?])[\w:.-]+)', re.MULTILINE),
+    'sql': re.compile(r'^([ \t]*)(?:--|CREATE|ALTER|INSERT|UPDATE|DELETE|SELECT|DROP|WITH|BEGIN|DECLARE|GRANT|COMMENT'
+                      r'|TRUNCATE|MERGE)\b', re.MULTILINE | re.IGNORECASE),
+    'yaml': re.compile(r'^([ \t]*)(?:---|#|- |[\w"\'.\-/]+[ \t]*:)', re.MULTILINE),
+    'json': re.compile(r'^([ \t]*)"[^"\n]*"[ \t]*:', re.MULTILINE),
+    'properties': re.compile(r'^()(?:#|!|\[)', re.MULTILINE),
+}
+_LANGUAGE_PATTERN = {'python': 'python', 'java': 'java', 'javascript': 'javascript', 'typescript': 'javascript',
+                     'jsp': 'markup', 'html': 'markup', 'xml': 'markup', 'sql': 'sql', 'yaml': 'yaml',
+                     'json': 'json', 'properties': 'properties'}
+# Lines that belong to the unit below them (doc comments, annotations, decorators)
+_LEADING_LINE_RE = re.compile(r'[ \t]*(?:#|//|/\*|\*|@|--)')
+_BLANK_LINE_RE = re.compile(r'\n[ \t]*\n')
+CHARS_PER_TOKEN = 4.0
+
+
+def _boundaries(content: str, language: str) -> List[Tuple[int, int, int]]:
+    """(offset, indent width, declaration offset) of each line that starts a unit; the offset
+    includes the doc comments and annotations attached above the declaration"""
+    pattern = BOUNDARY_PATTERNS.get(_LANGUAGE_PATTERN.get(language, ''))
+    if pattern is None:
+        return []
+    boundaries: List[Tuple[int, int, int]] = []
+    for match in pattern.finditer(content):
+        start = match.start()
+        indent = len(match.group(1).expandtabs(4))
+        # Climb over comment/annotation lines directly above, so a unit starts at its doc comment
+        while start > 0:
+            line_start = content.rfind('\n', 0, start - 1) + 1
+            if not _LEADING_LINE_RE.match(content, line_start, start - 1):
+                break
+            start = line_start
+        if boundaries and start <= boundaries[-1][0]:
+            # Part of the previous unit's header (decorator, annotation, doc comment): the declaration
+            # names the unit, and the outermost indent ranks it
+            previous_start, previous_indent, _ = boundaries[-1]
+            boundaries[-1] = (previous_start, min(indent, previous_indent), match.start())
+            continue
+        boundaries.append((start, indent, match.start()))
+    return boundaries
+
+
+def _line_cuts(content: str, start: int, end: int) -> List[int]:
+    """Fallback cut points: blank-line paragraphs, else every line"""
+    cuts = [match.end() for match in _BLANK_LINE_RE.finditer(content, start, end) if start < match.end() < end]
+    if cuts:
+        return cuts
+    cuts, position = [], content.find('\n', start, end)
+    while position != -1 and position + 1 < end:
+        cuts.append(position + 1)
+        position = content.find('\n', position + 1, end)
+    return cuts
+
+
+def _split(content: str, start: int, end: int, boundaries: List[Tuple[int, int, int]], max_chars: int,
+           context: str) -> Iterator[Tuple[int, int, str]]:
+    """Yield (start, end, context) spans no longer than `max_chars` where possible, cutting at the
+    shallowest boundaries first and packing neighbouring units together greedily"""
+    if end - start <= max_chars:
+        yield start, end, context
+        return
+
+    inside = [boundary for boundary in boundaries if start < boundary[0] < end]
+    headers = {}
+    if inside:
+        level = min(indent for _, indent, _ in inside)
+        cuts = [offset for offset, indent, _ in inside if indent == level]
+        headers = {offset: header for offset, indent, header in inside if indent == level}
+        deeper = [boundary for boundary in inside if boundary[1] > level]
+    else:
+        cuts, deeper = _line_cuts(content, start, end), []
+        if not cuts:
+            yield start, end, context  # A single line longer than the budget
+            return
+
+    edges = [start] + cuts + [end]
+    chunk_start = start
+    for unit_start, unit_end in zip(edges, edges[1:]):
+        if unit_end - chunk_start <= max_chars:
+            continue
+        if unit_start > chunk_start:
+            yield chunk_start, unit_start, context
+            chunk_start = unit_start
+        if unit_end - unit_start > max_chars:
+            # One unit alone is too big: split it on its own inner boundaries, under its declaration
+            inner_context = context
+            if unit_start in headers:
+                header_end = content.find('\n', headers[unit_start], unit_end)
+                header = content[headers[unit_start]:header_end if header_end != -1 else unit_end].strip()
+                inner_context = f"{context} > {header}" if context else header
+            yield from _split(content, unit_start, unit_end, deeper, max_chars, inner_context)
+            chunk_start = unit_end
+    if chunk_start < end:
+        yield chunk_start, end, context
+
+
+def chunk_text(content: str, language: str, max_tokens: int = 800, overlap_lines: int = 0,
+               chars_per_token: float = CHARS_PER_TOKEN) -> Iterator[Dict]:
+    """Split one file into token-bounded chunks on class/function/block boundaries.
+
+    Yields {'start_line', 'end_line', 'text', 'context', 'overlap'} lazily; 'context' names the
+    enclosing units of a chunk cut from inside a larger one, and the first 'overlap' lines of
+    'text' repeat the end of the previous chunk. Units larger than the budget are split at their
+    own inner boundaries, then at blank lines, then at line ends.
+    """
+    if not content:
+        return
+    max_chars = max(1, int(max_tokens * chars_per_token))
+    boundaries = _boundaries(content, language)
+    line = 1
+    previous_tail: List[str] = []
+    for start, end, context in _split(content, 0, len(content), boundaries, max_chars, ''):
+        text = content[start:end]
+        lines = text.count('\n') + (0 if text.endswith('\n') else 1)
+        overlap = previous_tail[-overlap_lines:] if overlap_lines else []
+        if overlap:
+            text = ''.join(overlap) + text
+        yield {'start_line': line, 'end_line': line + lines - 1, 'text': text,
+               'context': context, 'overlap': len(overlap)}
+        if overlap_lines:
+            previous_tail = content[max(start, end - max_chars):end].splitlines(keepends=True)
+        line += content.count('\n', start, end)
+
+
+def _chunk_file(item: Tuple[str, str, str, int, int]) -> List[Dict]:
+    path, language, content, max_tokens, overlap_lines = item
+    return [dict(chunk, path=path) for chunk in chunk_text(content, language, max_tokens, overlap_lines)]
+
+
+def iter_chunks(files: List[Dict], max_tokens: int = 800, overlap_lines: int = 0) -> Iterator[Dict]:
+    """Chunks of many files, one file at a time, each tagged with its 'path'"""
+    for file_data in files:
+        for chunk in chunk_text(file_data['content'], file_data['language'], max_tokens, overlap_lines):
+            chunk['path'] = file_data['path']
+            yield chunk
+
+
+def chunk_files(files: List[Dict], max_tokens: int = 800, overlap_lines: int = 0,
+                workers: Optional[int] = None) -> Dict[str, List[Dict]]:
+    """{path: chunks} for many files, chunked in a process pool"""
+    items = [(f['path'], f['language'], f['content'], max_tokens, overlap_lines) for f in files]
+    return dict(zip((item[0] for item in items), parallel_map(_chunk_file, items, workers=workers, min_items=500)))
@@ -0,0 +1,220 @@
+import re
+from typing import Dict, List, Optional
+
+from core.graph_utils import connected_components, pack_components
+
+# Mermaid classDiagram arrows per relationship type
+_ARROWS = {
+    'inheritance': '<|--',
+    'realization': '<|..',
+    'composition': '*--',
+    'aggregation': 'o--',
+    'dependency': '<..',
+}
+_COLLECTION_HINTS = ('[]', 'List', 'Set', 'Collection', 'Iterable', 'Sequence', 'Map', 'Dict', 'dict', 'list',
+                     'set', 'tuple', 'Tuple', 'Array', 'Optional[List')
+_IDENT_RE = re.compile(r'[A-Za-z_$][\w$]*')
+_UNSAFE_RE = re.compile(r'[^\w\s,~\[\].]')
+_DEFAULT_VALUE_RE = re.compile(r'=[^,]*')
+
+
+def _short_name(name: str) -> str:
+    """`models.Model` / `a.b.Base` -> last segment"""
+    return re.split(r'[.:]', name.split('[')[0].split('(')[0])[-1].strip()
+
+
+def build_class_graph(symbol_tables: Dict[str, Dict]) -> Dict:
+    """Class/inheritance/composition graph from per-file symbol tables.
+
+    Returns {'classes': {id: class_info}, 'edges': [edge], 'external_bases': {id: [names]}}.
+    Edges only connect classes defined in the codebase; references to library
+    types are kept as external bases on the class instead of becoming nodes.
+    """
+    classes: Dict[str, Dict] = {}
+    by_name: Dict[str, str] = {}
+
+    for path in sorted(symbol_tables):
+        table = symbol_tables[path]
+        for cls in table['classes']:
+            class_id = _mermaid_id(cls['name'])
+            if class_id in classes:
+                suffix = 2
+                while f"{class_id}_{suffix}" in classes:
+                    suffix += 1
+                class_id = f"{class_id}_{suffix}"
+            classes[class_id] = dict(cls, id=class_id, file=path, language=table['language'])
+            by_name.setdefault(cls['name'], class_id)
+
+    edges: List[Dict] = []
+    external_bases: Dict[str, List[str]] = {}
+    seen = set()
+
+    def add_edge(parent: str, child: str, edge_type: str, label: str = ''):
+        key = (parent, child)
+        if parent == child or key in seen:
+            return
+        seen.add(key)
+        edges.append({'source': parent, 'target': child, 'type': edge_type, 'label': label})
+
+    for class_id, cls in classes.items():
+        for base in cls['bases']:
+            base_id = by_name.get(_short_name(base))
+            if base_id:
+                add_edge(base_id, class_id, 'inheritance')
+            elif _short_name(base) not in ('object', ''):
+                external_bases.setdefault(class_id, []).append(base)
+        for interface in cls['interfaces']:
+            interface_id = by_name.get(_short_name(interface))
+            if interface_id:
+                add_edge(interface_id, class_id, 'realization')
+            else:
+                external_bases.setdefault(class_id, []).append(interface)
+
+    # Structural relationships after inheritance so "is-a" wins over "has-a" for the same pair
+    for class_id, cls in classes.items():
+        for field in cls['fields']:
+            for ref in _referenced_classes(field.get('type', ''), by_name):
+                is_collection = any(hint in field['type'] for hint in _COLLECTION_HINTS)
+                add_edge(class_id, ref, 'aggregation' if is_collection else 'composition', field['name'])
+        for method in cls['methods']:
+            for ref in _referenced_classes(f"{method['signature']} {method.get('returns', '')}", by_name):
+                add_edge(ref, class_id, 'dependency', 'uses')
+
+    return {'classes': classes, 'edges': edges, 'external_bases': external_bases}
+
+
+def _referenced_classes(type_text: str, by_name: Dict[str, str]) -> List[str]:
+    refs = []
+    for name in _IDENT_RE.findall(type_text or ''):
+        class_id = by_name.get(name)
+        if class_id and class_id not in refs:
+            refs.append(class_id)
+    return refs
+
+
+def _mermaid_id(name: str) -> str:
+    return re.sub(r'\W', '_', name) or 'Anonymous'
+
+
+def _visibility(name: str, modifiers: List[str], language: str) -> str:
+    if 'private' in modifiers:
+        return '-'
+    if 'protected' in modifiers:
+        return '#'
+    if 'public' in modifiers:
+        return '+'
+    if language == 'python':
+        if name.startswith('__') and not name.endswith('__'):
+            return '-'
+        if name.startswith('_') and not name.startswith('__'):
+            return '#'
+        return '+'
+    return '~' if language == 'java' else '+'
+
+
+def _mermaid_type(text: str) -> str:
+    text = re.sub(r'^<[^>]*>\s*', '', text.strip())  # leading generic declaration of `<T> List<T>`
+    text = text.replace('[]', '\0').replace('<', '~').replace('>', '~').replace('[', '~').replace(']', '~')
+    text = text.replace('\0', '[]')
+    return ' '.join(_UNSAFE_RE.sub(' ', text).split())
+
+
+def _mermaid_params(signature: str, language: str) -> str:
+    params = signature[signature.find('(') + 1:signature.rfind(')')]
+    params = _DEFAULT_VALUE_RE.sub('', params)
+    if language == 'python':
+        names = [p.split(':')[0].strip().lstrip('*') for p in params.split(',')]
+        names = [n for n in names if n and n not in ('self', 'cls', '/')]
+        return ', '.join(_mermaid_type(n) for n in names)
+    return ', '.join(_mermaid_type(p.replace(':', ' ')) for p in params.split(',') if p.strip())
+
+
+def _member_lines(cls: Dict) -> List[str]:
+    lines = []
+    kind = cls.get('kind', 'class')
+    if kind in ('interface', 'enum', 'annotation', 'record'):
+        lines.append(f"<<{kind}>>")
+
+    for field in cls['fields']:
+        field_type = _mermaid_type(field.get('type', ''))
+        static = '$' if 'static' in field.get('modifiers', []) else ''
+        vis = _visibility(field['name'], field.get('modifiers', []), cls['language'])
+        lines.append(f"{vis}{field_type + ' ' if field_type else ''}{_mermaid_id(field['name'])}{static}")
+
+    for method in cls['methods']:
+        modifiers = method.get('modifiers', [])
+        vis = _visibility(method['name'], modifiers, cls['language'])
+        suffix = '*' if 'abstract' in modifiers else '$' if 'static' in modifiers else ''
+        returns = _mermaid_type(method.get('returns', ''))
+        params = _mermaid_params(method['signature'], cls['language'])
+        lines.append(f"{vis}{_mermaid_id(method['name'])}({params}){suffix}{' ' + returns if returns else ''}")
+
+    return lines
+
+
+def render_class_diagrams(graph: Dict, max_classes: int = 25) -> List[str]:
+    """Render the graph as one or more Mermaid classDiagram sources.
+
+    Connected classes are kept together; components are packed into
+    diagrams of at most `max_classes` nodes so each stays readable and
+    within mmdc's size limits.
+    """
+    classes = graph['classes']
+    if not classes:
+        return []
+
+    components = connected_components(classes, ((e['source'], e['target']) for e in graph['edges']))
+    groups = pack_components(components, max_classes)
+    diagrams = []
+    for group in groups:
+        members = set(group)
+        lines = ['classDiagram']
+        for class_id in group:
+            body = _member_lines(classes[class_id])
+            if body:
+                lines.append(f"    class {class_id} {{")
+                lines.extend(f"        {line}" for line in body)
+                lines.append("    }")
+            else:
+                lines.append(f"    class {class_id}")
+        for edge in graph['edges']:
+            if edge['source'] in members and edge['target'] in members:
+                label = f" : {_mermaid_id(edge['label'])}" if edge['label'] else ''
+                lines.append(f"    {edge['source']} {_ARROWS[edge['type']]} {edge['target']}{label}")
+        diagrams.append('\n'.join(lines))
+    return diagrams
+
+
+def format_class_graph(graph: Dict) -> str:
+    """Compact plain-text rendering of the graph for the LLM"""
+    lines = [f"CLASSES ({len(graph['classes'])}):"]
+    for class_id, cls in graph['classes'].items():
+        header = f"- {class_id} [{cls.get('kind', 'class')}] {cls['file']}:{cls['line']}"
+        bases = cls['bases'] + cls['interfaces']
+        if bases:
+            header += f" : {', '.join(bases)}"
+        if cls['annotations']:
+            header += f" @ {' '.join(cls['annotations'])}"
+        lines.append(header)
+        if cls['fields']:
+            lines.append("    fields: " + ', '.join(
+                f"{f['name']}: {f['type']}" if f.get('type') else f['name'] for f in cls['fields']))
+        if cls['methods']:
+            lines.append("    methods: " + ', '.join(
+                f"{m['signature']} -> {m['returns']}" if m.get('returns') else m['signature'] for m in cls['methods']))
+
+    if graph['edges']:
+        lines.append(f"\nRELATIONSHIPS ({len(graph['edges'])}):")
+        for edge in graph['edges']:
+            label = f" ({edge['label']})" if edge['label'] else ''
+            lines.append(f"- {edge['source']} {_ARROWS[edge['type']]} {edge['target']} [{edge['type']}]{label}")
+
+    return '\n'.join(lines)
+
+
+def build_classes_grounding(symbol_tables: Dict[str, Dict]) -> Optional[Dict]:
+    """Local analysis for the classes doc: compact graph context plus ready diagrams"""
+    graph = build_class_graph(symbol_tables)
+    if not graph['classes']:
+        return None
+    return {'context': format_class_graph(graph), 'diagrams': render_class_diagrams(graph)}
@@ -1,12 +1,21 @@
 import os
 import tempfile
 import subprocess
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import json
 
+from core.file_store import BlobStore, FileRecord, decode_text
+from core.budget_packer import REPRESENTATION_VALUES, pack_budget
+from core.git_history import activity_scores, collect_history
+from core.import_graph import rank_files
+from core.repo_source import iter_source_files, is_archive
+from core.security import is_sensitive_file
+from core.shards import is_project_marker
+from core.symbol_extractor import SymbolExtractor, format_symbol_signatures, format_symbol_summary
+
 class CodebaseProcessor:
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[str] = None):
         self.supported_extensions = {
             '.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.jsp', '.jspx',
             '.html', '.htm', '.css', '.scss', '.sass', '.json', '.md',
@@ -18,16 +27,41 @@ class CodebaseProcessor:
             'dist', 'build', '.next', '.nuxt', 'coverage', 'target',
             '.idea', '.vscode', '*.pyc', '*.class', '*.jar', '*.war'
         }
+        
+        self.symbol_extractor = SymbolExtractor(
+            cache_dir=os.path.join(cache_dir, 'symbols') if cache_dir else None
+        )
+        # Blob stores behind the FileRecords handed out, each holding a temp file and its mapping
+        self._stores: List[BlobStore] = []
+    
+    def close(self) -> None:
+        """Release the contents of every file read so far; call once the run is done with them"""
+        while self._stores:
+            self._stores.pop().close()
+    
+    def __enter__(self) -> 'CodebaseProcessor':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def file_activity(self, repo_path: str) -> Dict[str, float]:
+        """Per-file activity from git history (churn, recency, authors); empty for archives"""
+        return activity_scores(collect_history(repo_path))
     
     def clone_repository(self, github_url: str) -> str:
+        """Clone only the object store; files are read from git objects, never checked out"""
         temp_dir = tempfile.mkdtemp()
         try:
-            subprocess.run(['git', 'clone', github_url, temp_dir], 
+            subprocess.run(['git', 'clone', '--bare', '--quiet', github_url, temp_dir], 
                          check=True, capture_output=True, text=True)
             return temp_dir
         except subprocess.CalledProcessError as e:
             raise Exception(f"Failed to clone repository: {e}")
     
+    def is_local_archive(self, source: str) -> bool:
+        return is_archive(source)
+    
     def should_ignore(self, path: str) -> bool:
         path_parts = Path(path).parts
         for part in path_parts:
@@ -35,49 +69,37 @@ class CodebaseProcessor:
                 return True
         return False
     
-    def process_codebase(self, repo_path: str) -> Tuple[List[Dict], Dict]:
+    def process_codebase(self, repo_path: str) -> Tuple[List[FileRecord], Dict]:
+        """Read supported files from a checkout, a bare clone or a local zip/tar archive"""
         files = []
-        stats = {'total_files': 0, 'total_lines': 0, 'languages': {}}
+        stats = {'total_files': 0, 'total_lines': 0, 'languages': {}, 'project_markers': []}
+        store = BlobStore()
+        self._stores.append(store)
+        
+        def want_file(rel_path: str) -> bool:
+            if self.should_ignore(rel_path):
+                return False
+            # Build files mark subproject boundaries even when their contents are not read
+            if is_project_marker(rel_path):
+                stats['project_markers'].append(rel_path.replace('\\', '/'))
+            return Path(rel_path).suffix.lower() in self.supported_extensions
         
-        for root, dirs, filenames in os.walk(repo_path):
-            dirs[:] = [d for d in dirs if not self.should_ignore(os.path.join(root, d))]
-            
-            for filename in filenames:
-                file_path = os.path.join(root, filename)
+        for rel_path, raw in iter_source_files(repo_path, want_file, lambda d: not self.should_ignore(d)):
+            try:
+                ext = Path(rel_path).suffix.lower()
+                record = FileRecord(rel_path, self._get_language(ext), decode_text(raw), store)
+                files.append(record)
                 
-                if self.should_ignore(file_path):
-                    continue
+                stats['total_files'] += 1
+                stats['total_lines'] += record.lines
                 
-                ext = Path(filename).suffix.lower()
-                if ext not in self.supported_extensions:
-                    continue
+                if record.language not in stats['languages']:
+                    stats['languages'][record.language] = {'files': 0, 'lines': 0}
+                stats['languages'][record.language]['files'] += 1
+                stats['languages'][record.language]['lines'] += record.lines
                 
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    
-                    rel_path = os.path.relpath(file_path, repo_path)
-                    language = self._get_language(ext)
-                    lines = len(content.splitlines())
-                    
-                    files.append({
-                        'path': rel_path,
-                        'language': language,
-                        'content': content,
-                        'lines': lines,
-                        'size': len(content)
-                    })
-                    
-                    stats['total_files'] += 1
-                    stats['total_lines'] += lines
-                    
-                    if language not in stats['languages']:
-                        stats['languages'][language] = {'files': 0, 'lines': 0}
-                    stats['languages'][language]['files'] += 1
-                    stats['languages'][language]['lines'] += lines
-                    
-                except Exception:
-                    continue
+            except Exception:
+                continue
         
         return files, stats
     
@@ -92,119 +114,151 @@ class CodebaseProcessor:
         }
         return lang_map.get(ext, 'text')
       
-    def create_filtered_summary(self, files: List[Dict], stats: Dict, token_limit: int = 7500) -> str:
-        """Create intelligent summary with two-layer filtering if needed"""
+    def create_filtered_summary(self, files: List[Dict], stats: Dict, token_limit: int = 7500,
+                                activity: Optional[Dict[str, float]] = None) -> str:
+        """Create a summary that fills `token_limit` with the most valuable representation of each file.
+
+        Every file can be shown in full, as signatures only or as a single line; a knapsack
+        packer picks the combination with the highest importance (import-graph centrality,
+        weighted by git activity when `activity` scores are given) that fits the budget.
+        Security-sensitive files are left out entirely, as on the full-content path. Raises
+        ValueError when `token_limit` cannot hold even the project overview.
+        """
         from core.token_estimator import TokenEstimator
         token_estimator = TokenEstimator()
+        sensitive = sum(1 for file_data in files if is_sensitive_file(file_data))
+        if sensitive:
+            files = [file_data for file_data in files if not is_sensitive_file(file_data)]
+        symbol_tables = self.symbol_extractor.extract_all(files)
         
-        def create_first_layer_summary():
-            # First layer filtering - similar to current logic but more focused
-            important_files = []
-            database_files = []
-            config_files = []
-            regular_files = []
-            
-            for file_data in files:
-                path = file_data['path'].lower()
-                # Prioritize main application files and database files
-                if any(name in path for name in ['home.java', 'main.java', 'app.java', 'index.java']):
-                    important_files.append(file_data)
-                elif path.endswith('.sql'):
-                    database_files.append(file_data)
-                elif any(name in path for name in ['config', 'package.json', 'readme']):
-                    config_files.append(file_data)
-                else:
-                    regular_files.append(file_data)
-
-            summary_parts = [f"""
-    PROJECT OVERVIEW:
-    - Total Files: {stats['total_files']}
-    - Total Lines: {stats['total_lines']}
-    - Languages: {', '.join(stats['languages'].keys())}
-
-    LANGUAGE BREAKDOWN:
-    {json.dumps(stats['languages'], indent=2)}
-    """]
-            
-            # Important files (full content)
-            if important_files:
-                summary_parts.append("\n=== CORE FILES (FULL CONTENT) ===")
-                for file_data in important_files[:5]:
-                    summary_parts.append(f"""
-    FILE: {file_data['path']} ({file_data['language']})
-    LINES: {file_data['lines']}
-    CONTENT:
-    {file_data['content']}
-    ---
-    """)
-
-            # Database files (full content)
-            if database_files:
-                summary_parts.append("\n=== DATABASE FILES ===")
-                for file_data in database_files[:3]:
-                    summary_parts.append(f"""
-    FILE: {file_data['path']}
-    LINES: {file_data['lines']}
-    CONTENT:
-    {file_data['content']}
-    ---
-    """)
-
-            # File structure and summaries
-            summary_parts.append("\n=== FILE STRUCTURE & SUMMARIES ===")
-            for file_data in regular_files:
-                if file_data['language'] in ['javascript', 'typescript', 'python', 'java']:
-                    func_classes = self._extract_functions_classes(file_data['content'], file_data['language'])
-                    summary_parts.append(f"  - {file_data['path']}: {func_classes}")
-
-            return '\n'.join(summary_parts)
-
-        def create_second_layer_summary(first_layer: str):
-            # Ultra-focused summary for when first layer is still too large
-            critical_files = []
-            
-            for file_data in files:
-                path = file_data['path'].lower()
-                # Only include the absolute most important files
-                if any(name in path for name in ['home.java', 'main.java']):
-                    critical_files.append(file_data)
-                    if len(critical_files) >= 2:  # Limit to top 2 most important files
-                        break
-
-            summary_parts = [f"""
-    PROJECT OVERVIEW:
-    - Total Files: {stats['total_files']}
-    - Languages: {', '.join(stats['languages'].keys())}
-    """]
-            
-            if critical_files:
-                summary_parts.append("\n=== CRITICAL FILES ===")
-                for file_data in critical_files:
-                    summary_parts.append(f"""
-    FILE: {file_data['path']} ({file_data['language']})
-    {self._extract_functions_classes(file_data['content'], file_data['language'])}
-    KEY CONTENT:
-    {file_data['content'][:1000]}... (truncated)
-    ---
-    """)
-
-            return '\n'.join(summary_parts)
+        # Import-graph centrality decides which files are worth their tokens
+        ranking = rank_files(files)
+        rank_order = {path: i for i, (path, _) in enumerate(ranking)}
+        top_score = ranking[0][1] if ranking else 1.0
+        graph_scores = {path: score / top_score for path, score in ranking}
+        
+        header = f"""
+PROJECT OVERVIEW:
+- Total Files: {stats['total_files']}
+- Total Lines: {stats['total_lines']}
+- Languages: {', '.join(stats['languages'].keys())}
 
-        # Create first layer summary
-        first_layer = create_first_layer_summary()
-        first_layer_tokens = token_estimator.estimate_tokens(first_layer)
+LANGUAGE BREAKDOWN:
+{json.dumps(stats['languages'], indent=2)}
+"""
+        if sensitive:
+            header += f"\nNote: {sensitive} security-sensitive files are excluded from this summary\n"
+        
+        # Token cost per character, calibrated on a sample so files need not be tokenized one by one
+        sample = ''.join(file_data['content'][:2000] for file_data in files[:200]) or header
+        files_by_path = {file_data['path'].replace('\\', '/'): file_data for file_data in files}
+        tokens_per_char = token_estimator.estimate_tokens(sample) / max(1, len(sample))
+        
+        # Full views are rendered only for the files that get picked, so contents stay in the blob store
+        views = {}
+        items = []
+        for file_data in files:
+            path = file_data['path'].replace('\\', '/')
+            views[path] = {
+                'signature': self._signature_view(file_data, symbol_tables.get(file_data['path'])),
+                'line': self._line_view(file_data, symbol_tables.get(file_data['path']))
+            }
+            costs = {name: int(len(text) * tokens_per_char) + 1 for name, text in views[path].items()}
+            costs['full'] = int((file_data['size'] + len(path) + 40) * tokens_per_char) + 1
+            items.append({'key': path, 'score': self._importance(path, graph_scores, activity), 'costs': costs})
         
-        if first_layer_tokens <= token_limit:
-            print(f"First layer summary successful: {first_layer_tokens} tokens")
-            return first_layer
+        budget = token_limit - token_estimator.estimate_tokens(header) - 50
+        for _ in range(3):
+            choice = pack_budget(items, max(0, budget))
+            summary = self._render_summary(header, files_by_path, views, choice, rank_order)
+            summary_tokens = token_estimator.estimate_tokens(summary)
+            if summary_tokens <= token_limit:
+                break
+            # The per-character estimate was optimistic; repack with the overshoot taken off
+            budget -= int((summary_tokens - token_limit) * 1.1) + 1
         
-        # If first layer is too large, create second layer
-        print(f"First layer too large ({first_layer_tokens} tokens), creating ultra-focused summary...")
-        second_layer = create_second_layer_summary(first_layer)
-        second_layer_tokens = token_estimator.estimate_tokens(second_layer)
-        print(f"Second layer summary created: {second_layer_tokens} tokens")
+        # Still over after repacking: drop the least valuable picks until the summary fits
+        items_by_key = {item['key']: item for item in items}
+        while summary_tokens > token_limit:
+            picked = sorted((path for path, representation in choice.items() if representation),
+                            key=lambda path: items_by_key[path]['score'] * REPRESENTATION_VALUES[choice[path]])
+            if not picked:
+                raise ValueError(f"Token limit {token_limit} is too small for the project overview "
+                                 f"({summary_tokens} tokens)")
+            freed = 0
+            for path in picked:
+                freed += items_by_key[path]['costs'][choice[path]]
+                choice[path] = None
+                if freed >= summary_tokens - token_limit:
+                    break
+            summary = self._render_summary(header, files_by_path, views, choice, rank_order)
+            summary_tokens = token_estimator.estimate_tokens(summary)
         
-        return second_layer
+        counts = {name: sum(1 for value in choice.values() if value == name) for name in ('full', 'signature', 'line')}
+        print(f"Summary packed: {summary_tokens} tokens of {token_limit} "
+              f"({counts['full']} full, {counts['signature']} signatures, {counts['line']} one-line, "
+              f"{len(choice) - sum(counts.values())} omitted)")
+        return summary
+    
+    def _importance(self, path: str, graph_scores: Dict[str, float],
+                    activity: Optional[Dict[str, float]] = None) -> float:
+        lower = path.lower()
+        if lower.endswith('.sql'):
+            score = 0.5
+        elif any(name in lower for name in ['config', 'package.json', 'readme']):
+            score = 0.3
+        else:
+            score = max(graph_scores.get(path, 0.05), 0.05)
+        if activity:
+            # Actively developed files gain up to 1.5x; files untouched in the analysed history drop to 0.5x
+            score *= 0.5 + activity.get(path, 0.0)
+        return score
+    
+    def _full_view(self, file_data: Dict) -> str:
+        return f"""
+FILE: {file_data['path']} ({file_data['language']})
+LINES: {file_data['lines']}
+CONTENT:
+{file_data['content']}
+---
+"""
+    
+    def _signature_view(self, file_data: Dict, table: Optional[Dict]) -> str:
+        signatures = format_symbol_signatures(table) if table else ''
+        if not signatures:
+            # Non-code files: the opening lines usually carry the structure
+            signatures = '\n'.join(file_data['content'].splitlines()[:15])
+        return f"""
+FILE: {file_data['path']} ({file_data['language']}, {file_data['lines']} lines)
+{signatures}
+"""
+    
+    def _line_view(self, file_data: Dict, table: Optional[Dict]) -> str:
+        summary = format_symbol_summary(table) if table else f"{file_data['language']} file"
+        if len(summary) > 200:
+            summary = summary[:197] + '...'
+        return f"  - {file_data['path']} ({file_data['lines']} lines): {summary}"
+    
+    def _render_summary(self, header: str, files_by_path: Dict[str, Dict], views: Dict[str, Dict[str, str]],
+                        choice: Dict[str, Optional[str]], rank_order: Dict[str, int]) -> str:
+        ordered = sorted(views, key=lambda path: (rank_order.get(path, len(rank_order)), path))
+        sections = [
+            ('full', "\n=== CORE FILES (FULL CONTENT) ==="),
+            ('signature', "\n=== SIGNATURES ==="),
+            ('line', "\n=== FILE STRUCTURE & SUMMARIES ===")
+        ]
+        summary_parts = [header]
+        for representation, title in sections:
+            chosen = [path for path in ordered if choice[path] == representation]
+            if chosen:
+                summary_parts.append(title)
+                summary_parts.extend(self._full_view(files_by_path[path]) if representation == 'full'
+                                     else views[path][representation] for path in chosen)
+        
+        omitted = sum(1 for value in choice.values() if value is None)
+        if omitted:
+            summary_parts.append(f"\n({omitted} more files omitted for size)")
+        return '\n'.join(summary_parts)
     
 #     def create_filtered_summary(self, files: List[Dict], stats: Dict) -> str:
 #         """Create intelligent summary when full codebase exceeds token limit"""
@@ -275,25 +329,4 @@ class CodebaseProcessor:
     
     def _extract_functions_classes(self, content: str, language: str) -> str:
         """Extract function and class names for summary"""
-        import re
-        
-        if language == 'python':
-            functions = re.findall(r'def (\w+)', content)
-            classes = re.findall(r'class (\w+)', content)
-        elif language in ['javascript', 'typescript']:
-            functions = re.findall(r'function (\w+)|const (\w+)\s*=|(\w+):\s*function', content)
-            functions = [f[0] or f[1] or f[2] for f in functions if any(f)]
-            classes = re.findall(r'class (\w+)', content)
-        elif language == 'java':
-            functions = re.findall(r'(?:public|private|protected)?\s*(?:static\s+)?(?:\w+\s+)+(\w+)\s*\(', content)
-            classes = re.findall(r'(?:public\s+)?class (\w+)', content)
-        else:
-            return "Binary/config file"
-        
-        result = []
-        if functions:
-            result.append(f"Functions: {', '.join(functions[:5])}")
-        if classes:
-            result.append(f"Classes: {', '.join(classes[:3])}")
-        
-        return '; '.join(result) if result else "No functions/classes found"
+        return format_symbol_summary(self.symbol_extractor.extract(content, language))
@@ -0,0 +1,292 @@
+import json
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.chunker import chunk_text
+from core.lexer import scan
+
+# What each level strips; every level includes the ones before it
+COMPACTION_LEVELS = {
+    'none': None,
+    'light': {'comments': 'license', 'blank_lines': 'collapse', 'literal_limit': None,
+              'data_threshold': None, 'max_lines': None},
+    'standard': {'comments': 'all', 'blank_lines': 'remove', 'literal_limit': 200,
+                 'data_threshold': 4000, 'max_lines': 1500},
+    'aggressive': {'comments': 'all', 'blank_lines': 'remove', 'literal_limit': 80,
+                   'data_threshold': 0, 'max_lines': 400},
+}
+
+LOCKFILE_NAMES = {'package-lock.json', 'npm-shrinkwrap.json', 'pnpm-lock.yaml', 'yarn.lock', 'composer.lock',
+                  'poetry.lock', 'pipfile.lock', 'gemfile.lock', 'cargo.lock'}
+
+_C_LIKE = {'java', 'javascript', 'typescript'}
+# Blank lines are only removed outright from code; elsewhere (markdown, text, markup, data) they
+# separate paragraphs and blocks, so runs of them are collapsed to one instead
+_CODE_LANGUAGES = _C_LIKE | {'python', 'css', 'sql'}
+# The lexer does not know JSX, whose text (`<a>https://example.com</a>`) can look like a comment
+_JSX_SUFFIXES = ('.jsx', '.tsx')
+_DATA_LANGUAGES = ('json', 'yaml', 'properties')
+_LICENSE_RE = re.compile(r'licen[cs]e|copyright|\(c\)|spdx', re.IGNORECASE)
+_MARKUP_COMMENT_RE = re.compile(r'<!--.*?-->|<%--.*?--%>', re.DOTALL)
+_CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+_SQL_TOKEN_RE = re.compile(r"'(?:[^']|'')*'|\"[^\"]*\"|--[^\n]*|/\*.*?\*/", re.DOTALL)
+_HASH_COMMENT_LINE_RE = re.compile(r'^[ \t]*[#!][^\n]*\n?', re.MULTILINE)
+_YAML_KEY_RE = re.compile(r'^([ \t]*(?:- )?)([^:#\n]+?):(?:[ \t]|$)')
+_PROPERTIES_KEY_RE = re.compile(r'^[ \t]*([^#!=:\s][^=:\s]*)')
+# Python strings (triple-quoted first), '#' comments, and runs of anything else; prefixes such as
+# f/r/b are consumed by the preceding run, which is all literal collapsing needs
+_PY_TOKEN_RE = re.compile(r'''
+    (?P<string>"""[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*(?:""")?
+              |\'\'\'[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*(?:\'\'\')?
+              |"[^"\\\n]*(?:\\.[^"\\\n]*)*"?
+              |'[^'\\\n]*(?:\\.[^'\\\n]*)*'?)
+  | (?P<comment>\#[^\n]*)
+  | (?P<code>[^'"\#]+)
+''', re.VERBOSE | re.DOTALL)
+_MINIFIED_LINE_LENGTH = 500
+# Size of the logical units an oversized file is trimmed in
+_UNIT_TOKENS = 400
+
+
+def _token_count(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+class Compactor:
+    """Language-aware removal of prompt content that costs tokens without informing the model"""
+
+    def __init__(self, level: str = 'standard'):
+        if level not in COMPACTION_LEVELS:
+            raise ValueError(f"Unknown compaction level '{level}' (choose from {', '.join(COMPACTION_LEVELS)})")
+        self.level = level
+        self.settings = COMPACTION_LEVELS[level]
+
+    def compact(self, path: str, language: str, content: str) -> str:
+        settings = self.settings
+        if settings is None or not content:
+            return content
+
+        name = path.replace('\\', '/').rsplit('/', 1)[-1].lower()
+        if name in LOCKFILE_NAMES:
+            return _summarize_lockfile(content)
+        if language not in _DATA_LANGUAGES and _is_minified(name, content):
+            return f"{content[:300]}\n... [minified, {len(content)} chars omitted]"
+
+        data_threshold = settings['data_threshold']
+        if data_threshold is not None and len(content) > data_threshold and language in _DATA_LANGUAGES:
+            summary = _summarize_data(language, content)
+            if summary is not None:
+                return summary
+
+        content = self._strip_comments(language, content, jsx=name.endswith(_JSX_SUFFIXES))
+        if settings['literal_limit'] and language in _C_LIKE | {'python'}:
+            content = _collapse_literals(content, settings['literal_limit'], language == 'python')
+        blank_lines = settings['blank_lines'] if language in _CODE_LANGUAGES else 'collapse'
+        content = _squeeze_whitespace(content, blank_lines)
+        if settings['max_lines']:
+            content = _head_and_tail(content, language, settings['max_lines'])
+        return content
+
+    def compact_files(self, files: List[Dict],
+                      count_tokens: Optional[Callable[[str], int]] = None) -> Tuple[Dict[str, str], List[Dict]]:
+        """Compacted contents keyed by path, and a per-file report of the tokens saved"""
+        count_tokens = count_tokens or _token_count
+        compacted = {}
+        report = []
+        for file_data in files:
+            content = file_data['content']
+            result = self.compact(file_data['path'], file_data['language'], content)
+            compacted[file_data['path']] = result
+            if result is not content:
+                before, after = count_tokens(content), count_tokens(result)
+                if before > after:
+                    report.append({'path': file_data['path'], 'before': before, 'after': after})
+        report.sort(key=lambda entry: entry['after'] - entry['before'])
+        return compacted, report
+
+    def _strip_comments(self, language: str, content: str, jsx: bool = False) -> str:
+        mode = self.settings['comments']
+        if language == 'python':
+            return _strip_python_comments(content, mode)
+        if language in _C_LIKE:
+            # In JSX only the leading license header (before any markup) is safe to find, except at
+            # the aggressive level, which accepts losing the odd '//' in JSX text for the savings
+            if jsx and self.level != 'aggressive':
+                mode = 'license'
+            return _strip_c_comments(content, mode)
+        if mode != 'all':
+            return content
+        if language in ('html', 'xml', 'jsp'):
+            return _MARKUP_COMMENT_RE.sub('', content)
+        if language == 'css':
+            return _CSS_COMMENT_RE.sub('', content)
+        if language == 'sql':
+            return _SQL_TOKEN_RE.sub(lambda m: m.group(0) if m.group(0)[0] in '\'"' else '', content)
+        if language in ('yaml', 'properties'):
+            return _HASH_COMMENT_LINE_RE.sub('', content)
+        return content
+
+
+def format_compaction_report(report: List[Dict], level: str, top: int = 10) -> str:
+    before = sum(entry['before'] for entry in report)
+    after = sum(entry['after'] for entry in report)
+    lines = [f"Compaction ({level}): {before - after:,} tokens saved across {len(report)} files"]
+    for entry in report[:top]:
+        lines.append(f"  {entry['path']}: {entry['before']:,} -> {entry['after']:,} tokens")
+    return '\n'.join(lines)
+
+
+def _is_license(comment: str) -> bool:
+    return bool(_LICENSE_RE.search(comment))
+
+
+def _strip_c_comments(content: str, mode: str) -> str:
+    parts = []
+    last = 0
+    leading = True
+    for match in scan(content):
+        kind = match.lastgroup
+        if kind == 'ws':
+            continue
+        if kind == 'comment' and (mode == 'all' or (leading and _is_license(match.group()))):
+            parts.append(content[last:match.start()])
+            last = match.end()
+        elif kind != 'comment':
+            leading = False
+    parts.append(content[last:])
+    return ''.join(parts)
+
+
+def _strip_python_comments(content: str, mode: str) -> str:
+    """Drop '#' comments (license headers only for 'license'), keeping a leading shebang"""
+    parts = []
+    last = 0
+    for match in _PY_TOKEN_RE.finditer(content):
+        kind = match.lastgroup
+        if kind == 'comment':
+            if match.start() == 0 and match.group().startswith('#!'):
+                continue
+            if mode == 'all' or _is_license(match.group()):
+                start = match.start()
+                while start > last and content[start - 1] in ' \t':
+                    start -= 1
+                parts.append(content[last:start])
+                last = match.end()
+        elif mode != 'all' and (kind == 'string' or match.group().strip()):
+            break  # License headers only precede the first statement
+    parts.append(content[last:])
+    return ''.join(parts)
+
+
+def _collapse_literals(content: str, limit: int, python: bool = False) -> str:
+    parts = []
+    last = 0
+    for match in (_PY_TOKEN_RE.finditer(content) if python else scan(content)):
+        text = match.group()
+        if match.lastgroup != 'string' or len(text) <= limit:
+            continue
+        quote = text[-3:] if text[-3:] in ('"""', "'''") else text[-1]
+        parts.append(content[last:match.start()])
+        parts.append(f"{text[:limit // 2]}...[{len(text) - limit // 2} chars]{quote}")
+        last = match.end()
+    parts.append(content[last:])
+    return ''.join(parts)
+
+
+def _squeeze_whitespace(content: str, blank_lines: str) -> str:
+    lines = [line.rstrip() for line in content.splitlines()]
+    if blank_lines == 'remove':
+        lines = [line for line in lines if line]
+    else:
+        squeezed = []
+        for line in lines:
+            if line or (squeezed and squeezed[-1]):
+                squeezed.append(line)
+        lines = squeezed
+    return '\n'.join(lines).strip('\n') + '\n'
+
+
+def _head_and_tail(content: str, language: str, max_lines: int) -> str:
+    """Keep whole logical units from the start and end of an oversized file, dropping the middle"""
+    if content.count('\n') <= max_lines:
+        return content
+    chunks = list(chunk_text(content, language, max_tokens=_UNIT_TOKENS))
+    head_budget, tail_budget = max_lines * 2 // 3, max_lines // 3
+    head, used = 0, 0
+    while head < len(chunks) and (head == 0 or used + _chunk_lines(chunks[head]) <= head_budget):
+        used += _chunk_lines(chunks[head])
+        head += 1
+    tail, used = len(chunks), 0
+    while tail > head and used + _chunk_lines(chunks[tail - 1]) <= tail_budget:
+        tail -= 1
+        used += _chunk_lines(chunks[tail])
+    if tail == head:
+        return content
+    omitted = chunks[head:tail]
+    where = f", starting in {omitted[0]['context']}" if omitted[0]['context'] else ''
+    marker = (f"... [{sum(_chunk_lines(chunk) for chunk in omitted)} lines omitted "
+              f"(lines {omitted[0]['start_line']}-{omitted[-1]['end_line']}{where})] ...\n")
+    return ''.join(chunk['text'] for chunk in chunks[:head]) + marker + ''.join(chunk['text'] for chunk in chunks[tail:])
+
+
+def _chunk_lines(chunk: Dict) -> int:
+    return chunk['end_line'] - chunk['start_line'] + 1
+
+
+def _is_minified(name: str, content: str) -> bool:
+    if '.min.' in name:
+        return True
+    newlines = content.count('\n') + 1
+    return len(content) > 2000 and len(content) / newlines > _MINIFIED_LINE_LENGTH
+
+
+def _summarize_lockfile(content: str) -> str:
+    packages = len(re.findall(r'"resolved"|^\s*resolution:|^\[\[package\]\]|^  [\w@/.\-]+ \(', content, re.MULTILINE))
+    return f"[lockfile: {content.count(chr(10)) + 1} lines, ~{packages} pinned packages; contents omitted]\n"
+
+
+def _json_schema(value, depth: int = 0, max_keys: int = 40) -> str:
+    indent = '  ' * (depth + 1)
+    if isinstance(value, dict):
+        if depth >= 6:
+            return f"{{...{len(value)} keys}}"
+        keys = list(value.items())
+        body = [f"{indent}{json.dumps(key)}: {_json_schema(item, depth + 1, max_keys)}" for key, item in keys[:max_keys]]
+        if len(keys) > max_keys:
+            body.append(f"{indent}...{len(keys) - max_keys} more keys")
+        return "{\n" + ",\n".join(body) + "\n" + '  ' * depth + "}" if body else "{}"
+    if isinstance(value, list):
+        if not value:
+            return "[]"
+        return f"[{len(value)} x {_json_schema(value[0], depth, max_keys)}]"
+    if isinstance(value, bool) or value is None:
+        return json.dumps(value)
+    return type(value).__name__
+
+
+def _summarize_data(language: str, content: str) -> Optional[str]:
+    """Structure of a data file (keys and value types) instead of its values"""
+    if language == 'json':
+        try:
+            return f"[JSON structure, values omitted]\n{_json_schema(json.loads(content))}\n"
+        except ValueError:
+            return None
+    if language == 'yaml':
+        keys = []
+        seen = set()
+        for line in content.splitlines():
+            match = _YAML_KEY_RE.match(line)
+            if match:
+                key_line = f"{match.group(1)}{match.group(2).strip()}:"
+                if key_line not in seen:
+                    seen.add(key_line)
+                    keys.append(key_line)
+        return "[YAML keys, values omitted]\n" + '\n'.join(keys) + '\n'
+    if language == 'properties':
+        keys = []
+        for line in content.splitlines():
+            match = _PROPERTIES_KEY_RE.match(line)
+            if match and not line.lstrip().startswith(('#', '!')):
+                keys.append(match.group(1))
+        return "[properties keys, values omitted]\n" + '\n'.join(keys) + '\n'
+    return None
@@ -0,0 +1,195 @@
+import hashlib
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.parallel import parallel_map
+
+# One-permutation MinHash: each shingle hash lands in one of SIGNATURE_BINS bins, keeping the minimum
+SIGNATURE_BINS = 64
+LSH_BANDS = 8
+LSH_ROWS = SIGNATURE_BINS // LSH_BANDS
+# Files shorter than this (in non-blank lines) are only deduplicated when identical
+MIN_SHINGLE_LINES = 8
+# Buckets with more members than this are checked against their first member only
+_MAX_BUCKET_PAIRS = 64
+# Candidates considered when picking a cluster's representative
+_MEDOID_SAMPLE = 32
+
+_BIN_SHIFT = 32 - SIGNATURE_BINS.bit_length() + 1
+_VALUE_MASK = (1 << _BIN_SHIFT) - 1
+_EMPTY = 1 << 32
+
+
+def fingerprint(item: Tuple[str, str]) -> Tuple[str, Optional[Tuple[int, ...]]]:
+    """(exact hash, MinHash signature or None) of one file, whitespace-insensitive.
+
+    Shingles are pairs of consecutive normalised lines, so a single edited line only
+    disturbs two shingles. One hash per shingle keeps this linear in file size.
+    """
+    _, content = item
+    lines = [line.strip() for line in content.splitlines()]
+    lines = [line for line in lines if line]
+    exact = hashlib.sha1('\n'.join(lines).encode('utf-8', 'replace')).hexdigest()
+    if len(lines) < MIN_SHINGLE_LINES:
+        return exact, None
+
+    bins = [_EMPTY] * SIGNATURE_BINS
+    previous = lines[0]
+    for line in lines[1:]:
+        mixed = (zlib.crc32(f"{previous}\n{line}".encode('utf-8', 'replace')) * 0x9E3779B1) & 0xFFFFFFFF
+        slot, value = mixed >> _BIN_SHIFT, mixed & _VALUE_MASK
+        if value < bins[slot]:
+            bins[slot] = value
+        previous = line
+
+    # Densify: an empty bin borrows from the next filled one, offset by the distance
+    if _EMPTY in bins:
+        original = bins[:]
+        for i in range(SIGNATURE_BINS):
+            if original[i] == _EMPTY:
+                distance = 1
+                while original[(i + distance) % SIGNATURE_BINS] == _EMPTY:
+                    distance += 1
+                bins[i] = original[(i + distance) % SIGNATURE_BINS] + distance * _EMPTY
+    return exact, tuple(bins)
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / SIGNATURE_BINS
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def find_duplicate_clusters(files: List[Dict], threshold: float = 0.85,
+                            workers: Optional[int] = None) -> List[Dict]:
+    """Group exact and near-duplicate files.
+
+    Returns [{'representative': path, 'duplicates': [{'path', 'similarity', 'exact'}]}] for every group
+    with more than one member. Exact copies are merged by hash; near copies by LSH banding over
+    MinHash signatures, verified against `threshold`. Every step is linear in the number of files.
+    """
+    items = [(f['path'], f['content']) for f in files]
+    prints = parallel_map(fingerprint, items, workers=workers, min_items=2000)
+    groups = _UnionFind(len(items))
+
+    by_hash: Dict[str, int] = {}
+    for i, (exact, _) in enumerate(prints):
+        if not items[i][1].strip():
+            continue  # Empty files (package markers) carry nothing to deduplicate
+        first = by_hash.setdefault(exact, i)
+        if first != i:
+            groups.union(first, i)
+
+    # Only the first copy of each exact group takes part in near-duplicate matching
+    buckets: Dict[Tuple, List[int]] = {}
+    for exact, first in by_hash.items():
+        signature = prints[first][1]
+        if signature is None:
+            continue
+        for band in range(LSH_BANDS):
+            key = (band,) + signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+            buckets.setdefault(key, []).append(first)
+
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        anchors = members[:1] if len(members) > _MAX_BUCKET_PAIRS else members
+        for anchor in anchors:
+            for other in members:
+                if other > anchor and groups.find(other) != groups.find(anchor) \
+                        and similarity(prints[anchor][1], prints[other][1]) >= threshold:
+                    groups.union(anchor, other)
+
+    members_by_root: Dict[int, List[int]] = {}
+    for i in range(len(items)):
+        members_by_root.setdefault(groups.find(i), []).append(i)
+
+    clusters = []
+    for members in members_by_root.values():
+        if len(members) < 2:
+            continue
+        representative = _medoid(members, items, prints)
+        duplicates = []
+        for i in sorted(members, key=lambda i: items[i][0]):
+            if i == representative:
+                continue
+            exact = prints[i][0] == prints[representative][0]
+            if exact:
+                score = 1.0
+            elif prints[i][1] and prints[representative][1]:
+                score = similarity(prints[i][1], prints[representative][1])
+            else:
+                score = 0.0
+            duplicates.append({'path': items[i][0], 'similarity': score, 'exact': exact})
+        clusters.append({'representative': items[representative][0], 'duplicates': duplicates})
+    clusters.sort(key=lambda cluster: -len(cluster['duplicates']))
+    return clusters
+
+
+def _medoid(members: List[int], items: List[Tuple[str, str]], prints: List[Tuple]) -> int:
+    """Member most similar to the rest (over a bounded sample), so chained near-copies stay close to it;
+    ties go to the largest copy, then the shortest path"""
+    distinct = list({prints[i][0]: i for i in members}.values())
+    sample = [i for i in distinct if prints[i][1] is not None][:_MEDOID_SAMPLE]
+
+    def centrality(i: int) -> float:
+        if prints[i][1] is None:
+            return 0.0
+        return sum(similarity(prints[i][1], prints[j][1]) for j in sample)
+
+    return min(members, key=lambda i: (-centrality(i), -len(items[i][1]), len(items[i][0]), items[i][0]))
+
+
+def deduplicate(files: List[Dict], threshold: float = 0.85, workers: Optional[int] = None,
+                exclude: Optional[Callable[[Dict], bool]] = None) -> Tuple[List[Dict], List[Dict]]:
+    """Files with every duplicate removed (representatives kept, order preserved), and the clusters.
+
+    Files matching `exclude` (those the prompt filters out later, e.g. sensitive ones) are kept
+    as they are and never join a cluster, so they cannot stand in for a copy that is shown.
+    """
+    candidates = [f for f in files if not exclude(f)] if exclude else files
+    clusters = find_duplicate_clusters(candidates, threshold, workers)
+    dropped = {entry['path'] for cluster in clusters for entry in cluster['duplicates']}
+    return [f for f in files if f['path'] not in dropped], clusters
+
+
+def format_duplicate_note(cluster: Dict) -> str:
+    """One line for a representative's prompt header listing the paths it stands for"""
+    exact = [entry['path'] for entry in cluster['duplicates'] if entry['exact']]
+    near = [f"{entry['path']} (~{entry['similarity']:.0%})"
+            for entry in cluster['duplicates'] if not entry['exact']]
+    parts = []
+    if exact:
+        parts.append(f"identical copies: {', '.join(exact)}")
+    if near:
+        parts.append(f"near-duplicates: {', '.join(near)}")
+    return '; '.join(parts)
+
+
+def format_dedup_report(clusters: List[Dict], files: List[Dict],
+                        count_tokens: Optional[Callable[[str], int]] = None, top: int = 10) -> str:
+    count_tokens = count_tokens or (lambda text: len(text) // 4 + 1)
+    by_path = {f['path']: f for f in files}
+    dropped = sum(len(cluster['duplicates']) for cluster in clusters)
+    saved = sum(count_tokens(by_path[entry['path']]['content'])
+                for cluster in clusters for entry in cluster['duplicates'])
+    lines = [f"Deduplication: {dropped:,} files in {len(clusters):,} clusters folded into representatives, "
+             f"{saved:,} tokens eliminated"]
+    for cluster in clusters[:top]:
+        lines.append(f"  {cluster['representative']} stands for {len(cluster['duplicates'])} other file(s)")
+    return '\n'.join(lines)
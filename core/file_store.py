@@ -0,0 +1,110 @@
+import sys
+import mmap
+import tempfile
+from typing import Any, Iterator, Tuple
+
+
+def decode_text(raw: bytes) -> str:
+    """Decode file bytes the same way text-mode open(errors='ignore') would"""
+    text = raw.decode('utf-8', errors='ignore')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+class BlobStore:
+    """Append-only store that keeps file contents in a memory-mapped temp file.
+
+    Contents live in the page cache instead of the Python heap, so the kernel
+    can drop them under pressure and re-read them on access.
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile(prefix='codebase_blobs_')
+        self._size = 0
+        self._map = None
+        self._mapped_size = 0
+
+    def append(self, data: bytes) -> Tuple[int, int]:
+        offset = self._size
+        self._file.write(data)
+        self._size += len(data)
+        return offset, len(data)
+
+    def read(self, offset: int, length: int) -> bytes:
+        if length == 0:
+            return b''
+        if offset + length > self._mapped_size:
+            self._remap()
+        return self._map[offset:offset + length]
+
+    def _remap(self):
+        self._file.flush()
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), self._size, access=mmap.ACCESS_READ)
+        self._mapped_size = self._size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def close(self):
+        """Release the mapping and the temp file; records of this store can no longer be read"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._mapped_size = 0
+        self._file.close()
+
+    def __enter__(self) -> 'BlobStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class FileRecord:
+    """Compact per-file record.
+
+    Supports the dict-style access (``record['content']``, ``record.get('size')``)
+    used throughout the pipeline, while holding content as an offset into a
+    shared BlobStore that is decoded only when it is read.
+    """
+
+    __slots__ = ('path', 'language', 'lines', 'size', '_store', '_offset', '_length')
+
+    _keys = ('path', 'language', 'content', 'lines', 'size')
+
+    def __init__(self, path: str, language: str, content: str, store: BlobStore):
+        self.path = path
+        self.language = sys.intern(language)
+        self.lines = len(content.splitlines())
+        self.size = len(content)
+        self._store = store
+        self._offset, self._length = store.append(content.encode('utf-8'))
+
+    @property
+    def content(self) -> str:
+        return self._store.read(self._offset, self._length).decode('utf-8')
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._keys:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self._keys:
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._keys
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return ((key, getattr(self, key)) for key in self._keys)
+
+    def __repr__(self) -> str:
+        return f"FileRecord(path={self.path!r}, language={self.language!r}, lines={self.lines}, size={self.size})"
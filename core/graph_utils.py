@@ -0,0 +1,41 @@
+from typing import Dict, Iterable, List, Tuple
+
+
+def connected_components(nodes: Iterable[str], edges: Iterable[Tuple[str, str]]) -> List[List[str]]:
+    """Undirected connected components (union-find), largest first, nodes in input order"""
+    nodes = list(nodes)
+    parent = {node: node for node in nodes}
+
+    def find(node: str) -> str:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for a, b in edges:
+        if a in parent and b in parent:
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[root_a] = root_b
+
+    components: Dict[str, List[str]] = {}
+    for node in nodes:
+        components.setdefault(find(node), []).append(node)
+    return sorted(components.values(), key=len, reverse=True)
+
+
+def pack_components(components: List[List[str]], max_size: int) -> List[List[str]]:
+    """Pack components into groups of at most `max_size` nodes for separate diagrams"""
+    groups: List[List[str]] = []
+    current: List[str] = []
+    for component in components:
+        # Oversized components are split into consecutive slices
+        for start in range(0, len(component), max_size):
+            piece = component[start:start + max_size]
+            if len(current) + len(piece) > max_size and current:
+                groups.append(current)
+                current = []
+            current.extend(piece)
+    if current:
+        groups.append(current)
+    return groups
@@ -0,0 +1,220 @@
+import posixpath
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.parallel import parallel_map
+
+GRAPH_LANGUAGES = {'python', 'java', 'javascript', 'typescript', 'jsp'}
+
+_PY_IMPORT_RE = re.compile(r'^[ \t]*(?:from[ \t]+(\.*[\w.]*)[ \t]+import[ \t]+(\([^)]*\)|[^\n#;]+)'
+                           r'|import[ \t]+([^\n#;]+))', re.MULTILINE)
+_JAVA_PACKAGE_RE = re.compile(r'^[ \t]*package[ \t]+([\w.]+)[ \t]*;', re.MULTILINE)
+_JAVA_IMPORT_RE = re.compile(r'^[ \t]*import[ \t]+(?:static[ \t]+)?([\w.]+(?:\.\*)?)[ \t]*;', re.MULTILINE)
+_TYPE_NAME_RE = re.compile(r'\b[A-Z]\w*')
+_JS_IMPORT_RE = re.compile(r'''(?:\bfrom|\bimport|\brequire[ \t]*\(|\bimport[ \t]*\()[ \t]*(['"])([^'"\n]+)\1''')
+_JSP_INCLUDE_RE = re.compile(r'''<%@\s*include\s+file\s*=\s*["']([^"']+)["']|<jsp:include\s+page\s*=\s*["']([^"']+)["']''')
+_JSP_PAGE_IMPORT_RE = re.compile(r'''<%@\s*page\b[^%]*?\bimport\s*=\s*["']([^"']+)["']''')
+
+_JS_EXTENSIONS = ('', '.ts', '.tsx', '.js', '.jsx', '.mjs', '.cjs', '/index.ts', '/index.tsx', '/index.js', '/index.jsx')
+# Roots tried for non-relative JS specifiers ('@/x', 'src/x', 'components/x')
+_JS_ALIAS_ROOTS = ('', 'src/', 'app/')
+_JSP_WEB_ROOTS = ('src/main/webapp/', 'webapp/', 'WebContent/', 'web/')
+
+
+def extract_imports(item: Tuple[str, str, str]) -> Dict:
+    """Raw import references of one file: {'modules': [...], 'types': set of capitalised names}"""
+    path, language, content = item
+    refs = {'modules': [], 'types': set(), 'package': None}
+    if language == 'python':
+        for match in _PY_IMPORT_RE.finditer(content):
+            if match.group(3):
+                refs['modules'].extend(('', name.split()[0]) for name in match.group(3).split(',') if name.strip())
+            else:
+                names = match.group(2).strip('()').replace('\n', ' ')
+                for name in names.split(','):
+                    name = name.split()[0] if name.strip() else ''
+                    refs['modules'].append((match.group(1), name))
+    elif language == 'java':
+        package = _JAVA_PACKAGE_RE.search(content)
+        refs['package'] = package.group(1) if package else ''
+        refs['modules'] = _JAVA_IMPORT_RE.findall(content)
+        # Same-package and wildcard-imported classes are referenced without an import line
+        refs['types'] = set(_TYPE_NAME_RE.findall(content))
+    elif language in ('javascript', 'typescript'):
+        refs['modules'] = [match.group(2) for match in _JS_IMPORT_RE.finditer(content)]
+    elif language == 'jsp':
+        for match in _JSP_INCLUDE_RE.finditer(content):
+            refs['modules'].append(match.group(1) or match.group(2))
+        for match in _JSP_PAGE_IMPORT_RE.finditer(content):
+            refs['types'].update(name.strip() for name in match.group(1).split(',') if name.strip())
+    return refs
+
+
+def _python_module_names(path: str) -> List[str]:
+    """Dotted names a Python file can be imported as (every suffix, for src/ layouts)"""
+    parts = path[:-3].split('/')
+    if parts[-1] == '__init__':
+        parts = parts[:-1]
+    return ['.'.join(parts[start:]) for start in range(len(parts)) if parts[start:]]
+
+
+class ImportGraph:
+    """File-level dependency graph: an edge a -> b means file a imports file b"""
+
+    def __init__(self, nodes: List[str], edges: Dict[str, Set[str]]):
+        self.nodes = nodes
+        self.edges = edges
+
+    def in_degree(self) -> Dict[str, int]:
+        degree = dict.fromkeys(self.nodes, 0)
+        for targets in self.edges.values():
+            for target in targets:
+                degree[target] += 1
+        return degree
+
+    def pagerank(self, damping: float = 0.85, iterations: int = 50, tolerance: float = 1e-8) -> Dict[str, float]:
+        """Power iteration over integer-indexed adjacency; dangling mass is spread uniformly"""
+        count = len(self.nodes)
+        if not count:
+            return {}
+        index = {node: i for i, node in enumerate(self.nodes)}
+        outgoing = [[index[target] for target in self.edges.get(node, ())] for node in self.nodes]
+        dangling = [i for i, targets in enumerate(outgoing) if not targets]
+
+        rank = [1.0 / count] * count
+        for _ in range(iterations):
+            base = (1.0 - damping) / count + damping * sum(rank[i] for i in dangling) / count
+            new_rank = [base] * count
+            for i, targets in enumerate(outgoing):
+                if targets:
+                    share = damping * rank[i] / len(targets)
+                    for j in targets:
+                        new_rank[j] += share
+            delta = sum(abs(a - b) for a, b in zip(new_rank, rank))
+            rank = new_rank
+            if delta < tolerance:
+                break
+        return {node: rank[i] for i, node in enumerate(self.nodes)}
+
+    def rank(self) -> List[Tuple[str, float]]:
+        """Files by centrality: PageRank, ties broken by in-degree and path"""
+        scores = self.pagerank()
+        degree = self.in_degree()
+        return sorted(scores.items(), key=lambda item: (-item[1], -degree[item[0]], item[0]))
+
+
+def build_import_graph(files: List[Dict], workers: Optional[int] = None) -> ImportGraph:
+    """Resolve Python, Java, JS/TS and JSP imports to files of this codebase"""
+    items = [(f['path'].replace('\\', '/'), f['language'], f['content'])
+             for f in files if f['language'] in GRAPH_LANGUAGES]
+    nodes = [path for path, _, _ in items]
+    node_set = set(nodes)
+    refs = dict(zip(nodes, parallel_map(extract_imports, items, workers=workers, min_items=2000)))
+
+    python_modules: Dict[str, str] = {}
+    java_classes: Dict[str, str] = {}
+    java_packages: Dict[str, Dict[str, str]] = {}
+    for path, language, _ in items:
+        if language == 'python':
+            for name in _python_module_names(path):
+                python_modules.setdefault(name, path)
+        elif language == 'java':
+            package = refs[path]['package']
+            class_name = posixpath.splitext(posixpath.basename(path))[0]
+            java_classes[f"{package}.{class_name}" if package else class_name] = path
+            java_packages.setdefault(package, {})[class_name] = path
+
+    edges: Dict[str, Set[str]] = {}
+    for path, language, _ in items:
+        file_refs = refs[path]
+        targets: Set[str] = set()
+        if language == 'python':
+            targets.update(_resolve_python(path, file_refs['modules'], python_modules))
+        elif language == 'java':
+            targets.update(_resolve_java(file_refs, java_classes, java_packages))
+        elif language in ('javascript', 'typescript'):
+            targets.update(filter(None, (_resolve_js(path, spec, node_set) for spec in file_refs['modules'])))
+        elif language == 'jsp':
+            targets.update(filter(None, (_resolve_jsp(path, spec, node_set) for spec in file_refs['modules'])))
+            targets.update(java_classes[name] for name in file_refs['types'] if name in java_classes)
+        targets.discard(path)
+        if targets:
+            edges[path] = targets
+    return ImportGraph(nodes, edges)
+
+
+def rank_files(files: List[Dict]) -> List[Tuple[str, float]]:
+    """Ranking API for summary builders: (path, centrality score), most central first"""
+    return build_import_graph(files).rank()
+
+
+def _resolve_python(path: str, modules: List[Tuple[str, str]], python_modules: Dict[str, str]) -> Set[str]:
+    targets = set()
+    package = posixpath.dirname(path).replace('/', '.')
+    for base, name in modules:
+        if base.startswith('.'):
+            # Relative import: climb one package per extra dot
+            level = len(base) - len(base.lstrip('.'))
+            parent = package.split('.') if package else []
+            parent = parent[:len(parent) - (level - 1)] if level > 1 else parent
+            base = '.'.join(filter(None, parent + [base.lstrip('.')]))
+        candidates = [f"{base}.{name}" if base and name else base or name, base]
+        for candidate in candidates:
+            if candidate in python_modules:
+                targets.add(python_modules[candidate])
+                break
+    return targets
+
+
+def _resolve_java(refs: Dict, java_classes: Dict[str, str], java_packages: Dict[str, Dict[str, str]]) -> Set[str]:
+    targets = set()
+    types = refs['types']
+    for name in refs['modules']:
+        if name.endswith('.*'):
+            package = java_packages.get(name[:-2], {})
+            targets.update(path for class_name, path in package.items() if class_name in types)
+        elif name in java_classes:
+            targets.add(java_classes[name])
+        elif name.rsplit('.', 1)[0] in java_classes:
+            targets.add(java_classes[name.rsplit('.', 1)[0]])  # static member import
+    same_package = java_packages.get(refs['package'], {})
+    targets.update(path for class_name, path in same_package.items() if class_name in types)
+    return targets
+
+
+def _first_existing(candidates, node_set: Set[str]) -> Optional[str]:
+    for candidate in candidates:
+        if candidate in node_set:
+            return candidate
+    return None
+
+
+def _resolve_js(path: str, spec: str, node_set: Set[str]) -> Optional[str]:
+    if spec.startswith('.'):
+        base = posixpath.normpath(posixpath.join(posixpath.dirname(path), spec))
+        return _first_existing((base + ext for ext in _JS_EXTENSIONS), node_set)
+    # Path aliases such as '@/components/x' or '~/lib/x' resolve against an enclosing project
+    # directory; bare package names never match a file
+    spec = re.sub(r'^[@~]/', '', spec)
+    directory = posixpath.dirname(path)
+    while True:
+        prefix = f"{directory}/" if directory else ''
+        for root in _JS_ALIAS_ROOTS:
+            found = _first_existing((prefix + root + spec + ext for ext in _JS_EXTENSIONS), node_set)
+            if found:
+                return found
+        if not directory:
+            break
+        directory = posixpath.dirname(directory)
+    return None
+
+
+def _resolve_jsp(path: str, spec: str, node_set: Set[str]) -> Optional[str]:
+    if not spec.startswith('/'):
+        return _first_existing([posixpath.normpath(posixpath.join(posixpath.dirname(path), spec))], node_set)
+    # Absolute includes are relative to the web application root
+    for root in _JSP_WEB_ROOTS:
+        index = path.find(root)
+        if index != -1:
+            return _first_existing([path[:index + len(root)] + spec.lstrip('/')], node_set)
+    return _first_existing([spec.lstrip('/')], node_set)
@@ -0,0 +1,73 @@
+import re
+from typing import Iterator, Tuple
+
+# Linear-time lexer for C-family sources (Java, JavaScript, TypeScript).
+# Every alternative either consumes a bounded prefix or runs to a fixed
+# terminator without nested quantifiers, so the master pattern never
+# backtracks beyond a single token. Unterminated comments and strings run
+# to end of file / end of line instead of failing and being retried.
+# JavaScript regex literals need the previous token to tell them from
+# division, so `scan` tries _REGEX_RE where a '/' can only start a regex.
+_TOKEN_RE = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*[^*]*(?:\*(?!/)[^*]*)*(?:\*/)?)
+  | (?P<string>"""[^"]*(?:"(?!"")[^"]*)*(?:""")?
+              |"[^"\\\n]*(?:\\.[^"\\\n]*)*"?
+              |'[^'\\\n]*(?:\\.[^'\\\n]*)*'?
+              |`[^`\\]*(?:\\.[^`\\]*)*`?)
+  | (?P<annotation>@[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*)
+  | (?P<ident>[A-Za-z_$][\w$]*)
+  | (?P<number>\d[\w.]*)
+  | (?P<arrow>=>|->|::)
+  | (?P<punct>.)
+''', re.VERBOSE | re.DOTALL)
+_REGEX_RE = re.compile(r'(?P<regex>/(?![*/])(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*)')
+# Tokens after which '/' starts a regex literal rather than a division ('<' and '>' are left out for JSX tags)
+_REGEX_PRECEDERS = frozenset('(,=:[!&|?{};+-*%~^') | {
+    '=>', 'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw', 'case', 'do',
+    'else', 'yield', 'await'}
+
+
+def iter_tokens(content: str, skip_comments: bool = True) -> Iterator[Tuple[str, str, int]]:
+    """Yield (kind, text, offset) tokens; whitespace is always dropped"""
+    for match in scan(content):
+        kind = match.lastgroup
+        if kind == 'ws' or (skip_comments and kind == 'comment'):
+            continue
+        yield kind, match.group(), match.start()
+
+
+def scan(content: str) -> Iterator[re.Match]:
+    """Raw token matches, whitespace and comments included, for source-to-source rewriting"""
+    pos = 0
+    previous = None  # Last token that was not whitespace or a comment
+    while True:
+        for match in _TOKEN_RE.finditer(content, pos):
+            kind = match.lastgroup
+            if kind == 'ws' or kind == 'comment':
+                yield match
+                continue
+            if kind == 'punct' and content[match.start()] == '/' and (
+                    previous is None or previous.group() in _REGEX_PRECEDERS):
+                regex = _REGEX_RE.match(content, match.start())
+                if regex:
+                    yield regex
+                    previous = regex
+                    pos = regex.end()
+                    break  # Resume the token stream after the literal
+            previous = match
+            yield match
+        else:
+            return
+
+def blank_comments(content: str) -> str:
+    """Source with every comment replaced by spaces (newlines kept), so offsets and line numbers still match"""
+    parts = []
+    last = 0
+    for match in scan(content):
+        if match.lastgroup == 'comment':
+            parts.append(content[last:match.start()])
+            parts.append(re.sub(r'[^\n]', ' ', match.group()))
+            last = match.end()
+    parts.append(content[last:])
+    return ''.join(parts)
@@ -1,7 +1,13 @@
+import hashlib
 import os
-from typing import Dict, Optional
-from google import genai
-from google.genai import types
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.local_analysis import DIAGRAM_PLACEHOLDER
+from core.output_budget import THINKING_TOKENS, OutputPlanner, split_format_sections
+from docs.mermaid_renderer import MERMAID_BLOCK_RE
+from docs.mermaid_validator import validate_mermaid
 
 # Previous Llama Scout implementation
 """
@@ -38,45 +44,175 @@ class LlamaScoutClient:
             return f"Error generating response: {str(e)}"
 """
 
+SYSTEM_MESSAGES = {
+    'index': "You are a technical documentation expert specializing in project overviews and navigation.",
+    'architecture': "You are a software architect specializing in system design documentation.",
+    'database': "You are a database architect specializing in data model documentation.",
+    'classes': "You are a code analyst specializing in class structure documentation.",
+    'web': "You are a web API analyst specializing in interface documentation."
+}
+
+# Default model per tier; LLM_FAST_MODEL / LLM_LARGE_MODEL override them
+MODEL_TIERS = {'fast': 'gemini-2.5-flash', 'large': 'gemini-2.5-pro'}
+# Tier per task class; LLM_TIER_<TASK> overrides one (e.g. LLM_TIER_REPAIR=large)
+TASK_TIERS = {
+    'summarise': 'fast',   # condensing generated docs (monorepo rollups)
+    'extract': 'fast',     # structured extraction from code
+    'repair': 'fast',      # fixing invalid Mermaid diagrams
+    'final_doc': 'large',  # the documentation itself and section rewrites
+}
+# Output from a smaller tier that fails its quality check is regenerated here
+FALLBACK_TIER = 'large'
+# Lifetime of a cached codebase payload; caches are deleted at the end of a run, this only bounds a crashed one
+PAYLOAD_CACHE_TTL = '3600s'
+
+def _missing_sections(text: str) -> Optional[str]:
+    """Quality check for generated docs: they are built from `##` sections"""
+    return None if '\n## ' in f"\n{text}" else 'no sections in the output'
+
 class LlamaScoutClient:
-    def __init__(self, model: str = "gemini-2.5-pro"):
+    def __init__(self, model: str = MODEL_TIERS['large'], output_planner: Optional[OutputPlanner] = None):
         """Initialize Gemini Pro client"""
         api_key = os.environ.get("GOOGLE_API_KEY")
         if not api_key:
             raise ValueError("GOOGLE_API_KEY environment variable is required")
         
+        # google-genai takes ~0.5 s to import, so it is only loaded once a client is actually needed
+        from google import genai
         self.client = genai.Client(api_key=api_key)
-        self.model = model
-
-    def call_llm(self, prompt: str, system_message: str = "You are a code documentation assistant.") -> str:
-        """Make LLM API call with error handling."""
+        self.models = {'fast': os.getenv('LLM_FAST_MODEL', MODEL_TIERS['fast']),
+                       'large': os.getenv('LLM_LARGE_MODEL', model)}
+        self.model = self.models['large']
+        self.output_planner = output_planner or OutputPlanner()
+        # One {'task', 'tier', 'model', 'seconds', 'prompt_tokens', 'output_tokens', 'truncated', 'ok', ...}
+        # per call, for the run history
+        self.calls: List[Dict] = []
+        # (model, payload digest) -> cached content name, or None when the model refused to cache it
+        self._payload_caches: Dict[Tuple[str, str], Optional[str]] = {}
+        self._cache_lock = threading.Lock()
+
+    def call_llm(self, prompt: str, system_message: str = "You are a code documentation assistant.",
+                 payload: Optional[str] = None, max_output_tokens: Optional[int] = None,
+                 record: Optional[Dict] = None, task: str = 'final_doc', tier: Optional[str] = None,
+                 cache_payload: bool = False) -> str:
+        """Make LLM API call with error handling.
+
+        A large `payload` (the codebase) is sent as its own content part, so the same string is
+        shared by every call instead of being copied into each prompt. With `cache_payload`, the
+        payload is uploaded once per model as cached content (see `_payload_cache`) and later calls
+        only send the prompt. `max_output_tokens` bounds the visible answer (reasoning gets
+        THINKING_TOKENS on top). When given, `record` becomes the call's history entry, so the
+        caller can read its outcome. The model is the one of `tier`, by default the tier the `task`
+        class is routed to.
+        """
+        from google.genai import types
+        tier = tier or self.tier_for(task)
+        start = time.perf_counter()
+        call = {} if record is None else record
+        call.update(task=task, tier=tier, model=self.models[tier], seconds=0.0, prompt_tokens=0,
+                    prompt_chars=len(system_message) + len(prompt) + len(payload or ''),
+                    response_chars=0, output_tokens=0, max_output_tokens=max_output_tokens,
+                    truncated=False, ok=False)
         try:
             full_prompt = f"{system_message}\n\n{prompt}"
+            limits = {}
+            if max_output_tokens:
+                limits = {'max_output_tokens': max_output_tokens + THINKING_TOKENS,
+                          'thinking_config': types.ThinkingConfig(thinking_budget=THINKING_TOKENS)}
+            cached = self._payload_cache(self.models[tier], payload) if payload and cache_payload else None
+            if cached:
+                limits['cached_content'] = cached
 
             response = self.client.models.generate_content(
-                model=self.model,
-                contents=full_prompt,
+                model=self.models[tier],
+                contents=[full_prompt, payload] if payload and not cached else full_prompt,
                 config=types.GenerateContentConfig(
                     temperature=0.7,
                     top_p=0.9,
                     top_k=40,
+                    **limits
                 ),
             )
 
-            return response.text.strip() if response.text else "No response text returned."
+            text = response.text.strip() if response.text else "No response text returned."
+            usage = response.usage_metadata
+            finish_reason = response.candidates[0].finish_reason if response.candidates else None
+            call.update(response_chars=len(text), ok=bool(response.text),
+                        prompt_tokens=(usage.prompt_token_count if usage else None) or call['prompt_chars'] // 4,
+                        output_tokens=(usage.candidates_token_count if usage else None) or len(text) // 4,
+                        truncated=finish_reason == types.FinishReason.MAX_TOKENS)
+            if cached:
+                call['cached_tokens'] = (usage.cached_content_token_count if usage else None) or 0
+            return text
         except Exception as e:
             return f"Error generating response: {str(e)}"
+        finally:
+            call['seconds'] = round(time.perf_counter() - start, 4)
+            self.calls.append(call)
+    
+    def _payload_cache(self, model: str, payload: str) -> Optional[str]:
+        """Name of the cached content holding `payload` for `model`, created on first use.
+
+        Caches are per model (a fallback to another tier needs its own). A payload the API will
+        not cache (below the model's minimum size, no quota) is remembered as None and sent inline.
+        """
+        from google.genai import types
+        key = (model, hashlib.sha1(payload.encode('utf-8', 'replace')).hexdigest())
+        with self._cache_lock:
+            if key not in self._payload_caches:
+                try:
+                    cache = self.client.caches.create(model=model, config=types.CreateCachedContentConfig(
+                        contents=[payload], ttl=PAYLOAD_CACHE_TTL))
+                    self._payload_caches[key] = cache.name
+                except Exception as e:
+                    print(f"    Could not cache the codebase for {model}, sending it with every call: {e}")
+                    self._payload_caches[key] = None
+            return self._payload_caches[key]
+    
+    def release_payload_caches(self) -> None:
+        """Delete the cached payloads, which are billed for storage until they expire"""
+        with self._cache_lock:
+            names = [name for name in self._payload_caches.values() if name]
+            self._payload_caches.clear()
+        for name in names:
+            try:
+                self.client.caches.delete(name=name)
+            except Exception as e:
+                print(f"    Could not delete cached content {name} (it expires after {PAYLOAD_CACHE_TTL}): {e}")
     
-    def generate_documentation(self, codebase_content: str, doc_type: str) -> str:
-        """Generate specific documentation type using Llama-4-Scout"""
+    def tier_for(self, task: str) -> str:
+        tier = os.getenv(f"LLM_TIER_{task.upper()}", TASK_TIERS.get(task, FALLBACK_TIER))
+        return tier if tier in self.models else FALLBACK_TIER
+    
+    def _routed_call(self, task: str, prompt: str, system_message: str, check: Optional[Callable[[str], Optional[str]]] = None,
+                     record: Optional[Dict] = None, **kwargs) -> Tuple[str, Dict]:
+        """Call the model of the task's tier; output from a smaller tier that fails the quality check (no answer,
+        truncated, or `check` returning a problem) is regenerated on the fallback tier. Returns (text, call record)"""
+        entry = dict(record or {})
+        text = self.call_llm(prompt, system_message, record=entry, task=task, **kwargs)
+        if entry['tier'] == FALLBACK_TIER:
+            return text, entry
         
-        system_messages = {
-            'index': "You are a technical documentation expert specializing in project overviews and navigation.",
-            'architecture': "You are a software architect specializing in system design documentation.",
-            'database': "You are a database architect specializing in data model documentation.",
-            'classes': "You are a code analyst specializing in class structure documentation.",
-            'web': "You are a web API analyst specializing in interface documentation."
-        }
+        problem = 'no response' if not entry['ok'] else 'output truncated' if entry['truncated'] else None
+        problem = problem or (check(text) if check else None)
+        if problem is None:
+            return text, entry
+        print(f"    ↻ {task} output from the {entry['tier']} tier failed its check ({problem}), retrying on {FALLBACK_TIER}")
+        entry = dict(record or {}, fallback=True)
+        text = self.call_llm(prompt, system_message, record=entry, task=task, tier=FALLBACK_TIER, **kwargs)
+        return text, entry
+    
+    def generate_documentation(self, codebase_content: str, doc_type: str, grounding: Optional[Dict] = None) -> str:
+        """Generate specific documentation type using Llama-4-Scout.
+
+        When `grounding` from the local analysis stage is given for a doc type
+        that supports it, only that compact context is sent instead of the codebase.
+
+        A doc written in N section calls needs the whole codebase in each of them, which sent
+        inline would bill its input tokens N times. Those calls share one cached copy instead:
+        the payload is billed once at the input rate, then at the reduced cached-token rate per
+        call, plus storage until `release_payload_caches`.
+        """
         
         prompts = {
             'index': self._get_index_prompt(),
@@ -86,13 +222,138 @@ class LlamaScoutClient:
             'web': self._get_web_prompt()
         }
         
-        system_message = system_messages.get(doc_type, system_messages['index'])
-        prompt_template = prompts.get(doc_type, prompts['index'])
+        grounded_prompts = {
+            'database': self._get_database_grounded_prompt,
+            'classes': self._get_classes_grounded_prompt,
+            'web': self._get_web_grounded_prompt
+        }
+        
+        system_message = SYSTEM_MESSAGES.get(doc_type, SYSTEM_MESSAGES['index'])
         
-        full_prompt = f"{prompt_template}\n\nANALYZE THIS CODEBASE:\n\n{codebase_content}"
+        if grounding and doc_type in grounded_prompts:
+            prompt_template, payload = grounded_prompts[doc_type](), None
+            context = f"\n\nLOCAL ANALYSIS:\n\n{grounding['context']}"
+        else:
+            prompt_template, payload = prompts.get(doc_type, prompts['index']), codebase_content
+            context = "\n\nANALYZE THIS CODEBASE:"
         
-        return self.call_llm(full_prompt, system_message)
+        # Bounded output per doc type; long docs are written in sequential section calls
+        input_tokens = (len(prompt_template) + len(context) + len(payload or '')) // 4
+        plan = self.output_planner.plan(doc_type, input_tokens)
+        parts = split_format_sections(prompt_template, plan['sections'])
+        if len(parts) > 1:
+            shared = f", sharing one cached ~{len(payload) // 4:,}-token codebase" if payload else ""
+            print(f"    Writing {doc_type}.md in {len(parts)} section calls (~{plan['expected_seconds']:.0f}s each{shared})")
+        
+        outputs = []
+        for part in parts:
+            text, record = self._routed_call('final_doc', f"{part}{context}", system_message, check=_missing_sections,
+                                             record={'label': doc_type, 'input_tokens': input_tokens,
+                                                     'sections': len(parts)},
+                                             payload=payload, max_output_tokens=plan['max_output_tokens'],
+                                             cache_payload=len(parts) > 1)
+            outputs.append(text)
+            if record['truncated']:
+                print(f"    ⚠️ {doc_type}.md reached its {plan['max_output_tokens']:,}-token output budget")
+        return '\n\n'.join(outputs)
     
+    def generate_rollup(self, doc_type: str, shard_digest: str) -> str:
+        """Top-level doc for a monorepo, written from its subprojects' generated docs"""
+        prompts = {
+            'index': """Create index.md, the main entry point for the documentation of a monorepo made of the subprojects below.
+
+REQUIREMENTS:
+# [Repository Name] - Documentation
+
+## Overview
+What the repository as a whole does and how the subprojects divide the work.
+
+## Subprojects
+A table with one row per subproject: name, path, purpose, main technologies, and a link to its documentation
+using the exact relative path given under "Docs".
+
+## Technology Stack
+Technologies across the repository, noting which subprojects use each.
+
+## Getting Started
+Where to start reading and how the subprojects are built and run together.""",
+            'architecture': """Create architecture.md describing how the subprojects of this monorepo fit together.
+
+REQUIREMENTS:
+# System Architecture
+
+## Architecture Overview
+The overall system and the role of each subproject.
+
+## Subproject Dependencies
+A Mermaid `graph TD` diagram of the subprojects and the "Imports from" relationships between them, followed by a
+short explanation of each dependency.
+
+## Data Flow
+How requests and data move between the subprojects.
+
+## Technology Integration
+Shared technologies, protocols and integration points between the subprojects.
+
+Base everything on the subproject summaries; do not invent subprojects or dependencies."""
+        }
+        prompt = f"{prompts.get(doc_type, prompts['index'])}\n\nSUBPROJECTS:\n\n{shard_digest}"
+        # A rollup is bounded like the doc type it stands for, but always written in one call
+        budget = self.output_planner.plan(doc_type, len(prompt) // 4)['max_output_tokens']
+        text, _ = self._routed_call('summarise', prompt, SYSTEM_MESSAGES.get(doc_type, SYSTEM_MESSAGES['index']),
+                                    check=_missing_sections, record={'label': f"{doc_type} rollup"},
+                                    max_output_tokens=budget)
+        return text
+
+    def rewrite_section(self, doc_type: str, section: str, changes: str) -> str:
+        """Update one existing section of a generated doc for a code change, returning the new section"""
+        placeholder = (f"- Keep the line {DIAGRAM_PLACEHOLDER} as it is and draw no diagrams: they are rebuilt "
+                       f"from the code and inserted there.\n") if DIAGRAM_PLACEHOLDER in section else ""
+        prompt = f"""Below is one section of the existing {doc_type}.md documentation, followed by a code change.
+
+Update the section so it is accurate for the code after the change:
+- Keep the heading line exactly as it is and keep the section's structure, tone and formatting.
+- Keep every sentence, table row and diagram that the change does not affect word for word.
+- Add, edit or remove only what the change implies; Mermaid diagrams must stay valid.
+- If the change does not affect this section, return it unchanged.
+{placeholder}Return only the updated section in Markdown, with no commentary and no surrounding code fence.
+
+CURRENT SECTION:
+{section.strip()}
+
+CODE CHANGE:
+{changes}"""
+
+        text, _ = self._routed_call('final_doc', prompt, SYSTEM_MESSAGES.get(doc_type, SYSTEM_MESSAGES['index']))
+        return text
+
+    def repair_mermaid(self, diagram: str, errors: List[str]) -> str:
+        """Ask for a corrected version of one Mermaid diagram given the local validator errors"""
+        prompt = f"""The following Mermaid diagram failed syntax validation.
+
+ERRORS:
+{chr(10).join(f"- {error}" for error in errors)}
+
+DIAGRAM:
+```mermaid
+{diagram.strip()}
+```
+
+Fix only the syntax errors. Keep the same diagram type, nodes, labels and relationships.
+Wrap labels containing brackets, parentheses or quotes in double quotes.
+Return only the corrected diagram in a single ```mermaid code block."""
+
+        def diagram_of(response: str) -> str:
+            match = MERMAID_BLOCK_RE.search(response + '\n')
+            return match.group(1) if match else response
+        
+        def still_invalid(response: str) -> Optional[str]:
+            errors = validate_mermaid(diagram_of(response))
+            return errors[0] if errors else None
+        
+        response, _ = self._routed_call('repair', prompt, "You are a Mermaid diagram syntax expert.", check=still_invalid)
+        return diagram_of(response)
+
     def _get_index_prompt(self) -> str:
         return """Create a comprehensive index.md that serves as the main entry point for this codebase documentation.
  Try to give more concise information and along with detailed explanations instead of single line explanation.
@@ -345,6 +606,135 @@ graph LR
 
 Document only REAL classes, functions, and components found in the actual codebase."""
 
+    def _get_database_grounded_prompt(self) -> str:
+        return f"""Create database.md from the LOCAL ANALYSIS below.
+Try to give more concise information and along with detailed explanations instead of single line explanation.
+The SCHEMA was extracted statically from the SQL migrations (applied in order) and ORM model declarations:
+every table with its columns, primary keys (PK), foreign keys (FK->table.column) and the relationships
+between tables. DATA ACCESS CODE lists the repository/DAO/model classes with their method signatures, and
+DATABASE CONFIGURATION KEYS lists the relevant settings. Treat them as complete and authoritative.
+
+REQUIREMENTS:
+1. Identify the database technology from the column types and configuration
+2. Describe the real data models and the meaning of their key attributes
+3. Explain the relationships between entities and their cardinality
+4. Describe the data access patterns (ORM, repositories, raw SQL) from the data access code
+5. Do NOT draw any Mermaid diagrams. The ER diagrams are rendered from the same schema and are inserted
+   where you write the line {DIAGRAM_PLACEHOLDER}
+
+FORMAT:
+# Database Documentation
+
+## Database Overview
+[Database technology identified from types and configuration]
+
+## Data Models
+[Tables/entities with their attributes]
+
+## Entity Relationships
+{DIAGRAM_PLACEHOLDER}
+[Explanation of the relationships and cardinalities]
+
+## API Integration
+[How the data access code exposes the database to the application]
+
+## Data Access Patterns
+[ORM, Query Builder, Raw SQL, etc.]
+
+## Database Operations
+[CRUD operations visible in the data access method signatures]
+
+## Configuration
+[Database configuration from the configuration keys]
+
+Document only tables, columns and classes present in the LOCAL ANALYSIS."""
+
+    def _get_classes_grounded_prompt(self) -> str:
+        return f"""Create classes.md documenting the code structure from the LOCAL ANALYSIS below.
+Try to give more concise information and along with detailed explanations instead of single line explanation.
+The LOCAL ANALYSIS was extracted statically from the source code: every class, its file and line, fields, method
+signatures and the inheritance (<|--), realization (<|..), composition (*--), aggregation (o--) and dependency (<..)
+edges between them. Treat it as complete and authoritative.
+
+REQUIREMENTS:
+1. Explain the role of the real classes and how they collaborate
+2. Classify each inheritance/composition relationship (is-a, has-a, uses) and explain why it exists
+3. Document the real interfaces and method signatures listed
+4. Identify design patterns that the structure shows
+5. Do NOT draw any Mermaid diagrams. The class diagrams are rendered from the same analysis and are inserted
+   where you write the line {DIAGRAM_PLACEHOLDER}
+
+FORMAT:
+# Classes and Code Structure
+
+## Component Overview
+[Real components/classes with descriptions]
+
+## Class Hierarchy
+{DIAGRAM_PLACEHOLDER}
+[Explanation of the relationships shown in the diagrams]
+
+## Key Components
+[Important classes with their methods and properties]
+
+## Inheritance and Composition
+[Each relationship and what type of inheritance or composition it is]
+
+## Interfaces and Contracts
+[Interfaces and method signatures]
+
+## Design Patterns
+[Patterns identified in the structure - Singleton, Factory, Observer, etc.]
+
+## Module Dependencies
+[Dependencies and interactions between modules based on the relationships]
+
+Document only classes present in the LOCAL ANALYSIS."""
+
+    def _get_web_grounded_prompt(self) -> str:
+        return """Create web.md documenting the web interfaces and API endpoints from the LOCAL ANALYSIS below.
+Condition: Produce mermaid diagrams without syntax errors.
+Try to give more concise information and along with detailed explanations instead of single line explanation.
+The ROUTES table was extracted statically from the route declarations (Spring/JAX-RS annotations, servlet and
+web.xml mappings, JSP pages, Express/Next.js routes, Flask/FastAPI decorators): HTTP method, path, handler and
+file:line. It is complete and authoritative. HANDLER FILES contains the source of the files implementing them.
+VIEW marks JSP pages under WEB-INF that are only reachable through a forward; ANY marks mappings for every method.
+
+REQUIREMENTS:
+1. Document every route in the ROUTES table and ONLY those routes. Do not add endpoints that are not in the table
+   (no default /auth/login, /auth/register or similar unless they are listed)
+2. Describe parameters, request bodies and responses from the handler source
+3. Identify the authentication and authorization actually implemented in the handler files
+4. Map the real pages and the user interface structure
+5. Document real API integration patterns
+
+GO through the mermaid syntax and check for any syntax errors. If there are any syntax errors, fix them.
+FORMAT:
+# Web Components and APIs
+
+## API Endpoints
+[Endpoints from the ROUTES table grouped by resource, with method, path and handler]
+
+## Web Pages and Routes
+[Pages and routing structure from the ROUTES table]
+
+## User Interface Flow
+[Mermaid graph TD of the navigation between the real pages and routes]
+
+## Component Architecture
+[Mermaid graph TB of the real handler/controller components and how they connect]
+
+## Authentication Flow
+[Real authentication implementation found in the handler files, or state that none was found]
+
+## API Integration
+[How frontend integrates with backend/APIs based on actual code]
+
+## User Experience Flow
+[Actual user journeys based on the route table]
+
+Document only routes and components present in the LOCAL ANALYSIS."""
+
     def _get_web_prompt(self) -> str:
         return """Create web.md documenting actual web interfaces and API endpoints.
 Condition: Produce mermaid diagrams without syntax errors.
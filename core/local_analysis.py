@@ -0,0 +1,164 @@
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.class_graph import build_classes_grounding
+from core.route_extractor import extract_routes, format_route_table
+from core.schema_extractor import extract_schema, format_schema, render_er_diagrams
+from core.security import SENSITIVE_CONTENT_KEYWORDS, is_sensitive_file
+from core.symbol_extractor import format_symbol_summary
+
+# Line the grounded prompts ask the model to emit where locally rendered diagrams belong
+DIAGRAM_PLACEHOLDER = "{{DIAGRAMS}}"
+
+_DATA_ACCESS_RE = re.compile(r'repositor|dao|mapper|entity|entities|model|schema|persistence|database|\bdb\b|migration',
+                             re.IGNORECASE)
+_DATA_ACCESS_ANNOTATIONS = ('@Entity', '@Table', '@Repository', '@Mapper', '@Document')
+_DB_CONFIG_FILE_RE = re.compile(r'(application|persistence|hibernate|database|ormconfig|datasource|db)[^/]*'
+                                r'\.(properties|ya?ml|xml|json)$', re.IGNORECASE)
+_DB_CONFIG_KEY_RE = re.compile(r'datasource|jdbc|database|hibernate|jpa|sqlalchemy|mongo|redis|flyway|liquibase'
+                               r'|\bdb\b|\bdb[._]', re.IGNORECASE)
+_DB_CONFIG_VALUE_KEY_RE = re.compile(r'(driver|dialect|platform|ddl)', re.IGNORECASE)
+_DB_CONFIG_URL_KEY_RE = re.compile(r'(?:^|[._\-]|jdbc)ur[il]$', re.IGNORECASE)
+_URL_SCHEME_RE = re.compile(r'[A-Za-z][\w+.\-]*')
+_CONFIG_LINE_RE = re.compile(r'^\s*([\w.\-\[\]]+)\s*[=:]\s*(.*)$')
+
+# Character budget for handler file contents included with the route table
+WEB_HANDLER_CONTENT_BUDGET = 400_000
+
+
+def build_grounding(files: List[Dict], symbol_tables: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Run the static analysis stages and return per-doc-type grounding.
+
+    Each entry is {'context': compact text for the LLM, 'diagrams': [mermaid sources]}.
+    Doc types without an entry fall back to the full codebase prompt.
+    """
+    grounding = {}
+
+    classes = build_classes_grounding(symbol_tables)
+    if classes:
+        grounding['classes'] = classes
+
+    database = build_database_grounding(files, symbol_tables)
+    if database:
+        grounding['database'] = database
+
+    web = build_web_grounding(files, symbol_tables)
+    if web:
+        grounding['web'] = web
+
+    return grounding
+
+
+def _is_data_access(table: Dict) -> bool:
+    return any(annotation.startswith(_DATA_ACCESS_ANNOTATIONS)
+               for cls in table['classes'] for annotation in cls['annotations'])
+
+
+def build_database_grounding(files: List[Dict], symbol_tables: Dict[str, Dict]) -> Optional[Dict]:
+    """Schema summary + ERD, data-access symbol summaries and database config keys"""
+    schema = extract_schema(files, symbol_tables)
+    if not schema['tables']:
+        return None
+
+    parts = ["SCHEMA (from migrations and ORM models):", format_schema(schema)]
+
+    data_access = [f"- {path}: {format_symbol_summary(table)}" for path, table in sorted(symbol_tables.items())
+                   if (table['classes'] or table['functions']) and (_DATA_ACCESS_RE.search(path) or _is_data_access(table))]
+    if data_access:
+        parts.append(f"\nDATA ACCESS CODE ({len(data_access)} files):")
+        parts.extend(data_access)
+
+    config = []
+    for file_data in files:
+        if not _DB_CONFIG_FILE_RE.search(Path(file_data['path']).name):
+            continue
+        for line in file_data['content'].splitlines():
+            match = _CONFIG_LINE_RE.match(line)
+            if not match or not _DB_CONFIG_KEY_RE.search(match.group(1)):
+                continue
+            # Values are only kept for non-secret settings; connection URLs are reduced to their scheme
+            # because user info, query strings and `;key=value` parameters can all carry credentials
+            key, value = match.group(1), match.group(2).strip()
+            if any(keyword in key.lower() for keyword in SENSITIVE_CONTENT_KEYWORDS):
+                config.append(f"- {file_data['path']}: {key}")
+            elif _DB_CONFIG_URL_KEY_RE.search(key):
+                scheme = _url_scheme(value)
+                config.append(f"- {file_data['path']}: {key}" + (f" = {scheme}" if scheme else ''))
+            elif _DB_CONFIG_VALUE_KEY_RE.search(key):
+                config.append(f"- {file_data['path']}: {key} = {value}")
+            else:
+                config.append(f"- {file_data['path']}: {key}")
+    if config:
+        parts.append("\nDATABASE CONFIGURATION KEYS:")
+        parts.extend(config)
+
+    return {'context': '\n'.join(parts), 'diagrams': render_er_diagrams(schema)}
+
+
+def _url_scheme(value: str) -> Optional[str]:
+    """Database dialect named by a connection URL (`jdbc:mysql://...` -> `jdbc:mysql`), without anything after it"""
+    value = value.strip('\'"')
+    if value.lower().startswith('jdbc:'):
+        scheme, _, rest = value.partition(':')[2].partition(':')
+        return f"jdbc:{scheme}" if rest and _URL_SCHEME_RE.fullmatch(scheme) else None
+    scheme, separator, _ = value.partition('://')
+    return scheme if separator and _URL_SCHEME_RE.fullmatch(scheme) else None
+
+
+def _handler_files(routes: List[Dict], symbol_tables: Dict[str, Dict]) -> Dict[str, int]:
+    """Route count per file that implements a handler"""
+    counts: Dict[str, int] = {}
+    class_files = {cls['name']: path for path, table in symbol_tables.items() for cls in table['classes']}
+    for route in routes:
+        path = route['file']
+        # web.xml mappings point at the servlet class rather than at the source file
+        if path.endswith('web.xml'):
+            path = class_files.get(route['handler'].rsplit('.', 1)[-1], path)
+        counts[path] = counts.get(path, 0) + 1
+    return counts
+
+
+def build_web_grounding(files: List[Dict], symbol_tables: Dict[str, Dict]) -> Optional[Dict]:
+    """Route table plus the contents of the files that implement the handlers"""
+    routes = extract_routes(files, symbol_tables)
+    if not routes:
+        return None
+
+    parts = [format_route_table(routes)]
+
+    counts = _handler_files(routes, symbol_tables)
+    by_path = {file_data['path']: file_data for file_data in files}
+    included, listed, withheld = [], [], []
+    budget = WEB_HANDLER_CONTENT_BUDGET
+    for path in sorted(counts, key=lambda p: (-counts[p], p)):
+        file_data = by_path.get(path)
+        if file_data is None:
+            listed.append(path)
+        elif is_sensitive_file(file_data):
+            withheld.append(path)
+        elif file_data['size'] <= budget:
+            budget -= file_data['size']
+            included.append(file_data)
+        else:
+            listed.append(path)
+
+    if included:
+        parts.append(f"\nHANDLER FILES ({len(included)}):")
+    for file_data in included:
+        parts.append(f"""
+FILE: {file_data['path']}
+LANGUAGE: {file_data['language']}
+
+CONTENT:
+{file_data['content']}
+
+---END FILE---""")
+    if listed:
+        parts.append("\nOTHER HANDLER FILES (content omitted for size):")
+        parts.extend(f"- {path}" for path in listed)
+    if withheld:
+        parts.append("\nHANDLER FILES WITHHELD (security-sensitive content):")
+        parts.extend(f"- {path}" for path in withheld)
+
+    return {'context': '\n'.join(parts), 'diagrams': []}
@@ -0,0 +1,148 @@
+import math
+import os
+import re
+from statistics import median
+from typing import Dict, List, Optional
+
+# Starting output budgets (tokens) per doc type, used until the run history has calls of that type
+DOC_OUTPUT_BUDGETS = {
+    'index': 4000,
+    'architecture': 8000,
+    'database': 8000,
+    'classes': 12000,
+    'web': 8000,
+}
+DEFAULT_OUTPUT_BUDGET = 6000
+MIN_OUTPUT_TOKENS = 1024
+MAX_OUTPUT_TOKENS = 32000
+# Headroom over the longest recent untruncated output of a doc type
+HISTORY_HEADROOM = 1.25
+# A doc type that hit its budget recently gets this much more next time
+TRUNCATION_GROWTH = 1.5
+HISTORY_CALLS = 20
+# Input size the starting budgets are tuned for; budgets scale gently (fourth root) with the input
+REFERENCE_INPUT_TOKENS = 200_000
+# Assumed generation speed until the run history has calls to measure it
+DEFAULT_TOKENS_PER_SECOND = 60.0
+# Calls expected to take longer than this are split into sequential section calls
+LATENCY_TARGET_SECONDS = float(os.getenv('OUTPUT_LATENCY_TARGET', '120'))
+MAX_SECTION_CALLS = 4
+# Reasoning tokens allowed on top of the visible output budget (they count against max_output_tokens)
+THINKING_TOKENS = 2048
+
+# Markdown heading line (level, text) and code fence delimiters, for splitting docs and prompts into sections
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_FENCE_RE = re.compile(r'^\s*(```|~~~)')
+
+
+class OutputPlanner:
+    """Picks an output token budget per doc type and decides when to split generation into section calls.
+
+    Budgets start from DOC_OUTPUT_BUDGETS and adapt to the run history: the longest recent untruncated
+    output of a doc type (plus headroom), grown when recent calls were cut off, scaled gently with the
+    input size. The expected latency follows from the measured tokens per second; when it exceeds the
+    latency target the document is generated in up to MAX_SECTION_CALLS sequential calls.
+    """
+
+    def __init__(self, calls: Optional[List[Dict]] = None, latency_target: float = LATENCY_TARGET_SECONDS):
+        self.latency_target = latency_target
+        self.by_type: Dict[str, List[Dict]] = {}
+        for call in calls or []:
+            if call.get('label') and call.get('ok') and call.get('output_tokens'):
+                self.by_type.setdefault(call['label'], []).append(call)
+        # Generation speed of the documentation model (other tiers run at other speeds)
+        rates = [call['output_tokens'] / call['seconds'] for doc_calls in self.by_type.values()
+                 for call in doc_calls[-HISTORY_CALLS:]
+                 if call['seconds'] > 0 and call.get('task', 'final_doc') == 'final_doc']
+        self.tokens_per_second = median(rates) if rates else DEFAULT_TOKENS_PER_SECOND
+
+    @classmethod
+    def from_history(cls, runs: List[Dict], latency_target: float = LATENCY_TARGET_SECONDS) -> 'OutputPlanner':
+        return cls([call for run in runs if run['command'] == 'generate' for call in run['llm_calls']], latency_target)
+
+    def _typical_output(self, doc_type: str) -> Optional[float]:
+        recent = self.by_type.get(doc_type, [])[-HISTORY_CALLS:]
+        if not recent:
+            return None
+        # Section calls of one document are recorded separately; their outputs add up
+        outputs = [call['output_tokens'] * call.get('sections', 1) for call in recent]
+        typical = max(outputs) * HISTORY_HEADROOM
+        if any(call.get('truncated') for call in recent):
+            typical *= TRUNCATION_GROWTH
+        return typical
+
+    def _input_scale(self, doc_type: str, input_tokens: int) -> float:
+        inputs = [call['input_tokens'] for call in self.by_type.get(doc_type, [])[-HISTORY_CALLS:]
+                  if call.get('input_tokens')]
+        reference = median(inputs) if inputs else REFERENCE_INPUT_TOKENS
+        return min(2.0, max(0.75, (max(input_tokens, 1) / reference) ** 0.25))
+
+    def plan(self, doc_type: str, input_tokens: int) -> Dict:
+        """{'max_output_tokens' (per call), 'sections' (number of calls), 'expected_seconds' (per call)}"""
+        base = self._typical_output(doc_type) or DOC_OUTPUT_BUDGETS.get(doc_type, DEFAULT_OUTPUT_BUDGET)
+        budget = base * self._input_scale(doc_type, input_tokens)
+        budget = int(min(MAX_OUTPUT_TOKENS, max(MIN_OUTPUT_TOKENS, budget)))
+        expected = budget / self.tokens_per_second
+        sections = min(MAX_SECTION_CALLS, max(1, math.ceil(expected / self.latency_target)))
+        per_call = max(MIN_OUTPUT_TOKENS, math.ceil(budget / sections))
+        return {'max_output_tokens': per_call, 'sections': sections,
+                'expected_seconds': round(per_call / self.tokens_per_second, 1)}
+
+
+def parse_sections(markdown: str) -> List[Dict]:
+    """Split a document at its level-2 headings (outside code fences).
+
+    The first entry is the preamble (title and intro) with heading None; every other entry
+    holds the heading line and everything up to the next level-2 heading.
+    """
+    sections = [{'heading': None, 'lines': []}]
+    in_fence = False
+    for line in markdown.splitlines(keepends=True):
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else HEADING_RE.match(line)
+        if match and len(match.group(1)) == 2:
+            sections.append({'heading': match.group(2), 'lines': []})
+        sections[-1]['lines'].append(line)
+    return [{'heading': section['heading'], 'text': ''.join(section['lines'])} for section in sections]
+
+
+def split_format_sections(prompt: str, parts: int) -> List[str]:
+    """Split a doc prompt into `parts` prompts that each ask for a contiguous group of its FORMAT sections.
+
+    The requirements above FORMAT are repeated in every part; only the first part writes the document
+    title. Returns [prompt] when the prompt has no FORMAT block with enough `##` sections.
+    """
+    marker = prompt.find('\nFORMAT:\n')
+    if parts < 2 or marker == -1:
+        return [prompt]
+    preamble, template = prompt[:marker], prompt[marker + len('\nFORMAT:\n'):]
+    sections = parse_sections(template)
+    title = sections[0]['text'] if sections and not sections[0]['heading'] else ''
+    body = [section for section in sections if section['heading']]
+    # Text after the last section (closing instructions) belongs to every part, not to that section
+    closing = ''
+    if body:
+        last_text = body[-1]['text']
+        cut = last_text.rfind('\n\n')
+        if cut != -1 and not last_text[cut:].lstrip().startswith(('[', '`', '-', '|', '{')):
+            body[-1] = dict(body[-1], text=last_text[:cut + 1])
+            closing = last_text[cut:].strip()
+    if len(body) < parts:
+        parts = len(body)
+    if parts < 2:
+        return [prompt]
+
+    groups = [body[round(i * len(body) / parts):round((i + 1) * len(body) / parts)] for i in range(parts)]
+    prompts = []
+    for i, group in enumerate(groups):
+        names = ', '.join(section['heading'].lstrip('#').strip() for section in group)
+        if i == 0:
+            scope = f"This is part 1 of {parts} of the document. Write the title and ONLY these sections: {names}."
+        else:
+            scope = (f"This is part {i + 1} of {parts} of the document; earlier parts are written separately. "
+                     f"Write ONLY these sections, without the document title or any introduction: {names}.")
+        text = ''.join(section['text'] for section in group)
+        prompts.append(f"{preamble}\n\n{scope}\n\nFORMAT:\n{title if i == 0 else ''}{text}"
+                       + (f"\n{closing}" if closing else ''))
+    return prompts
@@ -0,0 +1,24 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence
+
+
+def parallel_map(func: Callable[[Any], Any], items: Sequence[Any], workers: Optional[int] = None,
+                 min_items: int = 64) -> List[Any]:
+    """Map `func` over `items` in a process pool, in order.
+
+    Small inputs run inline since pool start-up would dominate. `func` must be a
+    module-level function so it can be pickled. Falls back to serial execution
+    when process pools are unavailable (restricted sandboxes, frozen apps).
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(items) < min_items:
+        return [func(item) for item in items]
+
+    chunksize = max(1, len(items) // (workers * 4))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(func, items, chunksize=chunksize))
+    except (OSError, RuntimeError, ImportError) as e:
+        print(f"⚠️ Process pool unavailable ({e}), running serially")
+        return [func(item) for item in items]
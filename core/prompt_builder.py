@@ -0,0 +1,75 @@
+import mmap
+import tempfile
+from typing import Callable, Optional
+
+# Prompts up to this size stay in memory; larger ones spill to a temp file while they are built
+SPOOL_BYTES = 1024 * 1024
+
+
+class PromptPayload:
+    """Finished prompt text with its size and token totals.
+
+    Read-only: one payload is shared by every doc type's LLM call instead of being copied into each prompt.
+    """
+
+    __slots__ = ('_text', '_tokens')
+
+    def __init__(self, text: str, tokens: int):
+        self._text = text
+        self._tokens = tokens
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @property
+    def chars(self) -> int:
+        return len(self._text)
+
+    @property
+    def tokens(self) -> int:
+        return self._tokens
+
+    def __str__(self) -> str:
+        return self._text
+
+
+class PromptBuilder:
+    """Streams prompt sections into a spooled temp file, keeping running size and token totals.
+
+    The sections never exist as a list next to their joined copy: they are encoded into the spool as
+    they arrive (spilling to disk past `spool_bytes`), and `build()` decodes them once into the final
+    string, straight from a memory map when the spool has spilled.
+    """
+
+    def __init__(self, count_tokens: Optional[Callable[[str], int]] = None, spool_bytes: int = SPOOL_BYTES):
+        self.count_tokens = count_tokens
+        self.spool_bytes = spool_bytes
+        self.chars = 0
+        self.bytes = 0
+        self.tokens = 0
+        self._spool = tempfile.SpooledTemporaryFile(max_size=spool_bytes, prefix='prompt_')
+
+    def write(self, section: str) -> None:
+        if self.chars:
+            section = '\n' + section
+        data = section.encode('utf-8', errors='replace')
+        self._spool.write(data)
+        self.chars += len(section)
+        self.bytes += len(data)
+        if self.count_tokens:
+            self.tokens += self.count_tokens(section)
+
+    def build(self) -> PromptPayload:
+        """The finished payload; the builder is closed afterwards"""
+        try:
+            self._spool.flush()
+            if self.bytes > self.spool_bytes:
+                with mmap.mmap(self._spool.fileno(), self.bytes, access=mmap.ACCESS_READ) as mapped:
+                    text = str(mapped, 'utf-8', 'replace')
+            else:
+                self._spool.seek(0)
+                text = self._spool.read().decode('utf-8', errors='replace')
+        finally:
+            self._spool.close()
+        return PromptPayload(text, self.tokens if self.count_tokens else len(text) // 4)
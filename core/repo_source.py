@@ -0,0 +1,173 @@
+import os
+import tarfile
+import zipfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+
+def is_archive(path: str) -> bool:
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def is_bare_repository(path: str) -> bool:
+    return (os.path.isfile(os.path.join(path, 'HEAD'))
+            and os.path.isdir(os.path.join(path, 'objects'))
+            and not os.path.isdir(os.path.join(path, '.git')))
+
+
+def iter_source_files(source: str, want_file: Callable[[str], bool],
+                      want_dir: Optional[Callable[[str], bool]] = None) -> Iterator[Tuple[str, bytes]]:
+    """Yield (relative_path, raw_bytes) for every wanted file in a checkout, bare repo or archive"""
+    if is_archive(source):
+        return iter_archive(source, want_file)
+    if is_bare_repository(source):
+        return iter_git_objects(source, want_file)
+    return iter_directory(source, want_file, want_dir)
+
+
+def iter_directory(repo_path: str, want_file: Callable[[str], bool],
+                   want_dir: Optional[Callable[[str], bool]] = None) -> Iterator[Tuple[str, bytes]]:
+    for root, dirs, filenames in os.walk(repo_path):
+        if want_dir:
+            dirs[:] = [d for d in dirs if want_dir(os.path.relpath(os.path.join(root, d), repo_path))]
+
+        for filename in filenames:
+            file_path = os.path.join(root, filename)
+            rel_path = os.path.relpath(file_path, repo_path)
+            if not want_file(rel_path):
+                continue
+            try:
+                with open(file_path, 'rb') as f:
+                    yield rel_path, f.read()
+            except OSError:
+                continue
+
+
+def iter_git_objects(git_dir: str, want_file: Callable[[str], bool],
+                     rev: str = 'HEAD') -> Iterator[Tuple[str, bytes]]:
+    """Read blobs for `rev` straight from the object store through one `git cat-file --batch` stream"""
+    wanted = [(path, sha) for path, sha in _list_tree(git_dir, rev) if want_file(path)]
+    if not wanted:
+        return
+
+    proc = subprocess.Popen(['git', '--git-dir', git_dir, 'cat-file', '--batch'],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    # Feed object ids from a separate thread so a full stdout pipe can never block our writes
+    def feed():
+        try:
+            for _, sha in wanted:
+                proc.stdin.write(sha.encode('ascii') + b'\n')
+            proc.stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+
+    try:
+        for path, _ in wanted:
+            header = proc.stdout.readline().split()
+            if len(header) < 3:  # "<sha> missing"
+                continue
+            size = int(header[2])
+            data = proc.stdout.read(size)
+            proc.stdout.read(1)  # trailing newline
+            yield path, data
+    finally:
+        proc.stdout.close()
+        writer.join()
+        proc.wait()
+
+
+def _list_tree(git_dir: str, rev: str) -> List[Tuple[str, str]]:
+    try:
+        result = subprocess.run(['git', '--git-dir', git_dir, 'ls-tree', '-r', '-z', rev],
+                                check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        raise Exception(f"Failed to list repository tree: {e.stderr.decode('utf-8', errors='ignore')}")
+
+    entries = []
+    for entry in result.stdout.split(b'\0'):
+        if not entry:
+            continue
+        meta, path = entry.split(b'\t', 1)
+        mode, obj_type, sha = meta.split()
+        # Skip symlinks (120000) and submodules (commit entries)
+        if obj_type != b'blob' or mode == b'120000':
+            continue
+        entries.append((path.decode('utf-8', errors='replace'), sha.decode('ascii')))
+    return entries
+
+
+def iter_archive(archive_path: str, want_file: Callable[[str], bool]) -> Iterator[Tuple[str, bytes]]:
+    """Stream members out of a zip or tar archive without extracting it"""
+    if archive_path.lower().endswith('.zip'):
+        with zipfile.ZipFile(archive_path) as zf:
+            for info in zf.infolist():
+                if info.is_dir() or not want_file(info.filename):
+                    continue
+                with zf.open(info) as member:
+                    yield info.filename, member.read()
+        return
+
+    # 'r|*' reads the archive as a forward-only stream, whatever the compression
+    with tarfile.open(archive_path, 'r|*') as tf:
+        for member in tf:
+            name = member.name[2:] if member.name.startswith('./') else member.name
+            if not member.isfile() or not want_file(name):
+                continue
+            handle = tf.extractfile(member)
+            if handle is not None:
+                yield name, handle.read()
+
+
+def git_command(source: str) -> List[str]:
+    if is_bare_repository(source):
+        return ['git', '--git-dir', source]
+    return ['git', '-C', source]
+
+
+def diff_changes(source: str, diff_range: str, workers: int = 8) -> List[Dict]:
+    """Files changed in `diff_range` (e.g. 'v1.2..HEAD') of a checkout or bare repository.
+
+    Returns [{'status': A/M/D/R/..., 'path', 'old_path', 'patch'}]; 'patch' is that file's unified diff.
+    Paths come NUL-separated from `--name-status -z` and each file's patch is asked for by
+    (literal) pathspec, so quoted names and diff text inside file contents cannot confuse them.
+    """
+    if is_archive(source):
+        raise Exception("Incremental updates need a git repository; archives carry no history")
+    git = git_command(source) + ['--literal-pathspecs']
+
+    def run(args: List[str]) -> str:
+        try:
+            return subprocess.run(git + args, check=True, capture_output=True).stdout.decode('utf-8', errors='replace')
+        except subprocess.CalledProcessError as e:
+            raise Exception(f"Failed to diff {diff_range}: {e.stderr.decode('utf-8', errors='ignore')}")
+
+    changes = []
+    fields = run(['diff', '--name-status', '-M', '-z', diff_range]).split('\0')
+    i = 0
+    while i < len(fields) - 1:
+        status = fields[i]
+        if status[:1] in ('R', 'C'):
+            old_path, path = fields[i + 1], fields[i + 2]
+            i += 3
+        else:
+            old_path = path = fields[i + 1]
+            i += 2
+        changes.append({'status': status[:1], 'path': path, 'old_path': old_path})
+
+    def file_patch(change: Dict) -> str:
+        paths = [change['path']] if change['path'] == change['old_path'] else [change['old_path'], change['path']]
+        return run(['diff', '-M', '--no-color', '--no-ext-diff', diff_range, '--'] + paths)
+
+    # One git process per file; they only wait on git, so a thread pool overlaps them
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for change, patch in zip(changes, pool.map(file_patch, changes)):
+            change['patch'] = patch
+    return changes
@@ -0,0 +1,432 @@
+import re
+import ast
+import posixpath
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple
+
+from core.lexer import blank_comments
+from core.parallel import parallel_map
+
+HTTP_METHODS = ('get', 'post', 'put', 'delete', 'patch', 'options', 'head')
+
+_SPRING_MAPPINGS = {
+    '@GetMapping': 'GET', '@PostMapping': 'POST', '@PutMapping': 'PUT', '@DeleteMapping': 'DELETE',
+    '@PatchMapping': 'PATCH', '@RequestMapping': 'ANY',
+}
+_JAXRS_METHODS = {'@GET': 'GET', '@POST': 'POST', '@PUT': 'PUT', '@DELETE': 'DELETE', '@PATCH': 'PATCH',
+                  '@HEAD': 'HEAD', '@OPTIONS': 'OPTIONS'}
+_SERVLET_METHODS = {'doGet': 'GET', 'doPost': 'POST', 'doPut': 'PUT', 'doDelete': 'DELETE', 'service': 'ANY'}
+_ANNOTATION_STRING_RE = re.compile(r'"((?:[^"\\]|\\.)*)"')
+_ANNOTATION_PATH_ARG_RE = re.compile(r'\b(?:value|path|urlPatterns)\s*=\s*(\{[^}]*\}|"[^"]*")')
+_REQUEST_METHOD_RE = re.compile(r'RequestMethod\.(\w+)')
+
+# Routers are only the names bound to an Express app or router: `app = express()`, `router = express.Router()`,
+# `router: Router = Router()` (Router imported from express or koa-router), `require('express').Router()`
+_EXPRESS_ROUTER_RE = re.compile(
+    r'\b(\w+)\s*(?::\s*[\w.]+\s*)?=\s*(?:(express)\s*\(\s*\)|express\s*\.\s*Router\s*\(|(?:new\s+)?(Router)\s*\('
+    r'|require\s*\(\s*[\'"]express[\'"]\s*\)\s*(?:\(\s*\)|\.\s*Router\s*\())')
+_ROUTER_MODULE_RE = re.compile(r'[\'"](?:express|@koa/router|koa-router)[\'"]')
+_EXPRESS_ROUTE_RE = re.compile(
+    r'\b(\w+)\s*\.\s*(get|post|put|delete|patch|options|head|all)\s*\(\s*([\'"`])([^\'"`\n]*)\3\s*,([^\n]*)')
+_EXPRESS_USE_RE = re.compile(r'\b(\w+)\s*\.\s*use\s*\(\s*([\'"`])([^\'"`\n]*)\2\s*,([^\n]*)')
+_REQUIRE_RE = re.compile(r'require\s*\(\s*[\'"]([^\'"]+)[\'"]\s*\)')
+_REQUIRE_BINDING_RE = re.compile(r'\b(?:const|let|var)\s+(\w+)\s*=\s*require\s*\(\s*[\'"]([^\'"]+)[\'"]\s*\)')
+_IMPORT_DEFAULT_RE = re.compile(r'\bimport\s+(\w+)\s*(?:,\s*\{[^}]*\}\s*)?from\s*[\'"]([^\'"]+)[\'"]')
+_IMPORT_NAMED_RE = re.compile(r'\bimport\s*(?:\w+\s*,\s*)?\{([^}]*)\}\s*from\s*[\'"]([^\'"]+)[\'"]')
+_EXPORT_DEFAULT_RE = re.compile(r'\b(?:module\.exports|export\s+default)\s*=?\s*(\w+)\s*;?\s*$', re.MULTILINE)
+_EXPORT_NAMED_RE = re.compile(r'\b(?:module\.)?exports\.(\w+)\s*=\s*(\w+)|\bexport\s+(?:const|let|var)\s+(\w+)\b')
+_EXPRESS_CHAIN_RE = re.compile(r'\b(\w+)\s*\.\s*route\s*\(\s*([\'"`])([^\'"`\n]*)\2\s*\)((?:\s*\.\s*\w+\s*\([^()\n]*\))+)')
+_CHAIN_METHOD_RE = re.compile(r'\.\s*(\w+)\s*\(\s*([^()\n]*)\)')
+_JS_IDENT_RE = re.compile(r'[A-Za-z_$][\w$.]*')
+_JS_NOT_HANDLER = {'async', 'function', 'req', 'res', 'next', 'request', 'response', 'ctx', 'return', 'await'}
+_NEXT_HANDLER_RE = re.compile(r'export\s+(?:async\s+)?(?:function\s+|const\s+)(GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS)\b')
+_NEXT_API_METHOD_RE = re.compile(r'(?:req|request)\.method\s*===?\s*[\'"](\w+)[\'"]')
+
+_WEB_ROOTS = ('src/main/webapp/', 'webapp/', 'WebContent/', 'web/', 'public/')
+_JS_LANGUAGES = ('javascript', 'typescript')
+_PAGE_EXTENSIONS = ('.js', '.jsx', '.ts', '.tsx')
+_MODULE_EXTENSIONS = ('.js', '.ts', '.mjs', '.cjs', '.jsx', '.tsx')
+# Mount chains deeper than this are treated as cycles
+_MAX_MOUNT_DEPTH = 10
+
+
+def _route(method: str, path: str, handler: str, file_path: str, line: int) -> Dict:
+    return {'method': method.upper(), 'path': path or '/', 'handler': handler, 'file': file_path, 'line': line}
+
+
+def _join_url(prefix: str, path: str) -> str:
+    if not prefix:
+        return path if path.startswith('/') or not path else f"/{path}"
+    joined = f"{prefix.rstrip('/')}/{path.lstrip('/')}" if path else prefix
+    return joined if joined.startswith('/') else f"/{joined}"
+
+
+def _line_of(content: str, offset: int) -> int:
+    return content.count('\n', 0, offset) + 1
+
+
+# ------------------------------------------------------------------ Java
+
+def _annotation_paths(annotation: str) -> List[str]:
+    """Paths declared by a mapping annotation: positional, value=, path= or urlPatterns= (string or array)"""
+    if '(' not in annotation:
+        return ['']
+    args = annotation[annotation.index('(') + 1:annotation.rindex(')')] if ')' in annotation else ''
+    named = _ANNOTATION_PATH_ARG_RE.search(args)
+    if named:
+        return _ANNOTATION_STRING_RE.findall(named.group(1)) or ['']
+    if args.lstrip().startswith(('"', '{')):
+        head = args.lstrip()
+        head = head[:head.index('}') + 1] if head.startswith('{') and '}' in head else head.split(',')[0]
+        return _ANNOTATION_STRING_RE.findall(head) or ['']
+    return ['']
+
+
+def routes_from_java_symbols(symbol_table: Dict, file_path: str) -> List[Dict]:
+    """Spring MVC, JAX-RS and @WebServlet routes from an already extracted Java symbol table"""
+    routes = []
+    for cls in symbol_table['classes']:
+        class_annotations = {a.split('(')[0]: a for a in cls['annotations']}
+
+        if '@WebServlet' in class_annotations:
+            methods = [(_SERVLET_METHODS[m['name']], m) for m in cls['methods'] if m['name'] in _SERVLET_METHODS]
+            for url in _annotation_paths(class_annotations['@WebServlet']):
+                for http_method, method in methods or [('ANY', {'name': 'service', 'line': cls['line']})]:
+                    routes.append(_route(http_method, url, f"{cls['name']}.{method['name']}", file_path,
+                                         method['line']))
+            continue
+
+        prefixes = ['']
+        if '@RequestMapping' in class_annotations:
+            prefixes = _annotation_paths(class_annotations['@RequestMapping'])
+        elif '@Path' in class_annotations:
+            prefixes = _annotation_paths(class_annotations['@Path'])
+        is_controller = any(name in class_annotations for name in ('@Controller', '@RestController',
+                                                                   '@RequestMapping', '@Path'))
+
+        for method in cls['methods']:
+            annotations = {a.split('(')[0]: a for a in method['annotations']}
+            handler = f"{cls['name']}.{method['name']}"
+            for name, http_method in _SPRING_MAPPINGS.items():
+                if name not in annotations:
+                    continue
+                if name == '@RequestMapping':
+                    declared = _REQUEST_METHOD_RE.findall(annotations[name])
+                    http_methods = declared or ['ANY']
+                else:
+                    http_methods = [http_method]
+                for prefix in prefixes:
+                    for path in _annotation_paths(annotations[name]):
+                        for verb in http_methods:
+                            routes.append(_route(verb, _join_url(prefix, path), handler, file_path, method['line']))
+
+            jaxrs = [verb for name, verb in _JAXRS_METHODS.items() if name in annotations]
+            if jaxrs and is_controller:
+                paths = _annotation_paths(annotations['@Path']) if '@Path' in annotations else ['']
+                for prefix in prefixes:
+                    for path in paths:
+                        for verb in jaxrs:
+                            routes.append(_route(verb, _join_url(prefix, path), handler, file_path, method['line']))
+    return routes
+
+
+def _routes_from_web_xml(content: str, file_path: str) -> List[Dict]:
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError:
+        return []
+
+    classes = {}
+    for servlet in root.iterfind('.//{*}servlet'):
+        name = servlet.findtext('{*}servlet-name', '').strip()
+        target = servlet.findtext('{*}servlet-class') or servlet.findtext('{*}jsp-file') or ''
+        classes[name] = target.strip()
+
+    routes = []
+    for mapping in root.iterfind('.//{*}servlet-mapping'):
+        name = mapping.findtext('{*}servlet-name', '').strip()
+        for pattern in mapping.iterfind('{*}url-pattern'):
+            url = (pattern.text or '').strip()
+            line = _line_of(content, content.find(url)) if url else 1
+            routes.append(_route('ANY', url, classes.get(name, name), file_path, line))
+    return routes
+
+
+def _jsp_route(file_path: str) -> Dict:
+    path = file_path.replace('\\', '/')
+    for root in _WEB_ROOTS:
+        index = path.find(root)
+        if index != -1:
+            path = path[index + len(root):]
+            break
+    method = 'VIEW' if path.upper().startswith('WEB-INF/') or '/WEB-INF/' in path.upper() else 'GET'
+    return _route(method, '/' + path.lstrip('/'), 'JSP', file_path, 1)
+
+
+# ---------------------------------------------------------------- Python
+
+def _routes_from_python(content: str, file_path: str) -> List[Dict]:
+    if '.route(' not in content and not any(f".{verb}(" in content for verb in HTTP_METHODS + ('api_route',)):
+        return []
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return []
+
+    # Same-file prefixes: Blueprint(..., url_prefix='/x') / APIRouter(prefix='/x')
+    prefixes = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Call) and len(node.targets) == 1 \
+                and isinstance(node.targets[0], ast.Name):
+            for keyword in node.value.keywords:
+                if keyword.arg in ('url_prefix', 'prefix') and isinstance(keyword.value, ast.Constant):
+                    prefixes[node.targets[0].id] = str(keyword.value.value)
+
+    routes = []
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for decorator in node.decorator_list:
+            if not isinstance(decorator, ast.Call) or not isinstance(decorator.func, ast.Attribute):
+                continue
+            attr = decorator.func.attr
+            if attr not in ('route', 'api_route', 'websocket') + HTTP_METHODS:
+                continue
+            path_node = decorator.args[0] if decorator.args else next(
+                (k.value for k in decorator.keywords if k.arg in ('rule', 'path')), None)
+            if not isinstance(path_node, ast.Constant) or not isinstance(path_node.value, str):
+                continue
+            owner = ast.unparse(decorator.func.value)
+            if attr in ('route', 'api_route'):
+                methods_node = next((k.value for k in decorator.keywords if k.arg == 'methods'), None)
+                methods = [e.value for e in getattr(methods_node, 'elts', []) if isinstance(e, ast.Constant)] \
+                    or ['GET']
+            elif attr == 'websocket':
+                methods = ['WS']
+            else:
+                methods = [attr]
+            for method in methods:
+                routes.append(_route(method, _join_url(prefixes.get(owner, ''), path_node.value), node.name,
+                                     file_path, decorator.lineno))
+    return routes
+
+
+# ------------------------------------------------------------ JavaScript
+
+def _express_handler(rest: str) -> str:
+    if '=>' in rest or re.search(r'\bfunction\b', rest):
+        return 'inline handler'
+    names = [name for name in _JS_IDENT_RE.findall(rest) if name not in _JS_NOT_HANDLER]
+    return names[-1] if names else 'inline handler'
+
+
+def _express_routers(content: str) -> Dict[str, bool]:
+    """{name: is_app} for the names this file binds to an Express app or router"""
+    imports_router = bool(_ROUTER_MODULE_RE.search(content))
+    routers = {}
+    for match in _EXPRESS_ROUTER_RE.finditer(content):
+        name, app, bare_router = match.groups()
+        if bare_router and not imports_router:
+            continue
+        routers[name] = bool(app) or routers.get(name, False)
+    return routers
+
+
+def _express_imports(content: str) -> Dict[str, Tuple[str, str]]:
+    """{local name: (module specifier, exported name)} for relative imports; 'default' for default exports"""
+    imports = {}
+    for name, spec in _REQUIRE_BINDING_RE.findall(content):
+        imports[name] = (spec, 'default')
+    for name, spec in _IMPORT_DEFAULT_RE.findall(content):
+        imports[name] = (spec, 'default')
+    for names, spec in _IMPORT_NAMED_RE.findall(content):
+        for item in names.split(','):
+            exported, _, local = item.strip().partition(' as ')
+            if exported.strip():
+                imports[(local or exported).strip()] = (spec, exported.strip())
+    return {name: target for name, target in imports.items() if target[0].startswith('.')}
+
+
+def _routes_from_js(content: str, file_path: str) -> Dict:
+    """Express routes of one file, relative to their router, plus what is needed to resolve mount prefixes.
+
+    Returns {'routes': [route with 'router'], 'routers': {name: is_app}, 'mounts': [{'parent', 'prefix',
+    'child'}], 'imports': {name: (specifier, export)}, 'exports': {export: name}}. A mount's child is a
+    local name or ('require', specifier) for `app.use('/x', require('./x'))`.
+    """
+    content = blank_comments(content)
+    routers = _express_routers(content)
+    result = {'routes': [], 'routers': routers, 'mounts': [], 'imports': {}, 'exports': {}}
+    if not routers:
+        return result
+
+    for match in _EXPRESS_ROUTE_RE.finditer(content):
+        owner, verb, _, path, rest = match.groups()
+        if owner in routers:
+            route = _route(verb, path, _express_handler(rest), file_path, _line_of(content, match.start()))
+            result['routes'].append(dict(route, router=owner))
+
+    for match in _EXPRESS_CHAIN_RE.finditer(content):
+        owner, _, path, chain = match.groups()
+        if owner not in routers:
+            continue
+        for verb, args in _CHAIN_METHOD_RE.findall(chain):
+            if verb in HTTP_METHODS + ('all',):
+                route = _route(verb, path, _express_handler(args), file_path, _line_of(content, match.start()))
+                result['routes'].append(dict(route, router=owner))
+
+    imports = _express_imports(content)
+    result['imports'] = imports
+    for match in _EXPRESS_USE_RE.finditer(content):
+        owner, _, prefix, rest = match.groups()
+        if owner not in routers:
+            continue
+        # Middleware arguments are skipped; only routers (local, imported or required inline) are mounts
+        children = [name for name in _JS_IDENT_RE.findall(rest) if name in routers or name in imports]
+        children += [('require', spec) for spec in _REQUIRE_RE.findall(rest) if spec.startswith('.')]
+        for child in children:
+            result['mounts'].append({'parent': owner, 'prefix': prefix, 'child': child})
+
+    for match in _EXPORT_DEFAULT_RE.finditer(content):
+        result['exports']['default'] = match.group(1)
+    for match in _EXPORT_NAMED_RE.finditer(content):
+        exported, local, declared = match.groups()
+        if declared:
+            result['exports'][declared] = declared
+        else:
+            result['exports'][exported] = local
+    return result
+
+
+def _resolve_module(file_path: str, spec: str, known: Dict) -> Optional[str]:
+    base = posixpath.normpath(posixpath.join(posixpath.dirname(file_path.replace('\\', '/')), spec))
+    candidates = [base] + [base + ext for ext in _MODULE_EXTENSIONS] + \
+        [f"{base}/index{ext}" for ext in _MODULE_EXTENSIONS]
+    return next((candidate for candidate in candidates if candidate in known), None)
+
+
+def _resolve_express(scans: Dict[str, Dict]) -> List[Dict]:
+    """Express routes with the prefixes of every `use()` chain that mounts their router, across files"""
+    def exported_router(path: Optional[str], export: str) -> Optional[Tuple[str, str]]:
+        if path is None:
+            return None
+        scan_result = scans[path]
+        name = scan_result['exports'].get(export)
+        if name not in scan_result['routers'] and len(scan_result['routers']) == 1 and export == 'default':
+            name = next(iter(scan_result['routers']))
+        return (path, name) if name in scan_result['routers'] else None
+
+    parents: Dict[Tuple[str, str], List[Tuple[Tuple[str, str], str]]] = {}
+    for path, scan_result in scans.items():
+        for mount in scan_result['mounts']:
+            child = mount['child']
+            if isinstance(child, tuple):
+                target = exported_router(_resolve_module(path, child[1], scans), 'default')
+            elif child in scan_result['routers']:
+                target = (path, child)
+            else:
+                spec, export = scan_result['imports'][child]
+                target = exported_router(_resolve_module(path, spec, scans), export)
+            if target:
+                parents.setdefault(target, []).append(((path, mount['parent']), mount['prefix']))
+
+    def prefixes(router: Tuple[str, str], depth: int = 0) -> List[str]:
+        if router not in parents or depth > _MAX_MOUNT_DEPTH:
+            return ['']
+        return [_join_url(outer, prefix) for parent, prefix in parents[router]
+                for outer in prefixes(parent, depth + 1)]
+
+    routes = []
+    for path, scan_result in scans.items():
+        for route in scan_result['routes']:
+            route = dict(route)
+            router = (path, route.pop('router'))
+            for prefix in sorted(set(prefixes(router))):
+                routes.append(dict(route, path=_join_url(prefix, route['path']) if prefix else route['path']))
+    return routes
+
+
+def _next_route_path(segments: List[str]) -> str:
+    parts = []
+    for segment in segments:
+        if segment.startswith('(') and segment.endswith(')') or segment.startswith('@'):
+            continue  # route groups and parallel-route slots do not appear in the URL
+        parts.append(segment)
+    return '/' + '/'.join(parts)
+
+
+def _next_routes(content: str, file_path: str) -> List[Dict]:
+    path = file_path.replace('\\', '/')
+    stem, ext = posixpath.splitext(path)
+    if ext not in _PAGE_EXTENSIONS:
+        return []
+    segments = stem.split('/')
+
+    # App router: app/**/page.tsx and app/**/route.ts
+    if 'app' in segments[:-1] and segments[-1] in ('page', 'route'):
+        route_segments = segments[segments.index('app') + 1:-1]
+        url = _next_route_path(route_segments)
+        if segments[-1] == 'page':
+            return [_route('GET', url, 'page', file_path, 1)]
+        return [_route(match.group(1), url, match.group(1), file_path, _line_of(content, match.start()))
+                for match in _NEXT_HANDLER_RE.finditer(content)]
+
+    # Pages router: pages/**/*.tsx, with pages/api/** as API routes
+    if 'pages' in segments[:-1] and not segments[-1].startswith('_'):
+        route_segments = segments[segments.index('pages') + 1:]
+        if route_segments[-1] == 'index':
+            route_segments = route_segments[:-1]
+        url = _next_route_path(route_segments)
+        if route_segments[:1] == ['api']:
+            methods = sorted(set(m.upper() for m in _NEXT_API_METHOD_RE.findall(content))) or ['ANY']
+            return [_route(method, url, 'default export', file_path, 1) for method in methods]
+        return [_route('GET', url, 'page', file_path, 1)]
+    return []
+
+
+# ------------------------------------------------------------------ driver
+
+def _routes_for_file(item: Tuple[str, str, str]) -> Tuple[List[Dict], Optional[Dict]]:
+    """(routes, Express scan to resolve across files)"""
+    file_path, language, content = item
+    if language == 'python':
+        return _routes_from_python(content, file_path), None
+    if language in _JS_LANGUAGES:
+        return _next_routes(content, file_path), _routes_from_js(content, file_path)
+    if language == 'xml':
+        return _routes_from_web_xml(content, file_path), None
+    return [], None
+
+
+def extract_routes(files: List[Dict], symbol_tables: Dict[str, Dict], workers: Optional[int] = None) -> List[Dict]:
+    """Route table (method, path, handler, file, line) for the whole codebase"""
+    routes = []
+    work = []
+    for file_data in files:
+        language = file_data['language']
+        if language == 'jsp':
+            routes.append(_jsp_route(file_data['path']))
+        elif language == 'java':
+            if file_data['path'] in symbol_tables:
+                routes.extend(routes_from_java_symbols(symbol_tables[file_data['path']], file_data['path']))
+        elif language in ('python',) + _JS_LANGUAGES or \
+                (language == 'xml' and posixpath.basename(file_data['path'].replace('\\', '/')) == 'web.xml'):
+            work.append((file_data['path'], language, file_data['content']))
+
+    express = {}
+    for (file_path, _, _), (file_routes, express_scan) in zip(work, parallel_map(_routes_for_file, work,
+                                                                                 workers=workers)):
+        routes.extend(file_routes)
+        if express_scan and express_scan['routers']:
+            express[file_path] = express_scan
+    routes.extend(_resolve_express(express))
+
+    routes.sort(key=lambda r: (r['path'], r['method'], r['file']))
+    return routes
+
+
+def format_route_table(routes: List[Dict]) -> str:
+    lines = [f"ROUTES ({len(routes)}):", "METHOD | PATH | HANDLER | LOCATION"]
+    for route in routes:
+        lines.append(f"{route['method']} | {route['path']} | {route['handler']} | {route['file']}:{route['line']}")
+    return '\n'.join(lines)
@@ -0,0 +1,156 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from statistics import median
+from typing import Dict, Iterator, List, Optional
+
+HISTORY_FILE = 'run_history.jsonl'
+# A run is a regression when its cost is this many times the median of the previous runs on the same repository
+REGRESSION_RATIO = 1.25
+REGRESSION_WINDOW = 5
+
+
+class RunRecorder:
+    """Collects stage timings, token counts, LLM latencies and cache hit rates for one pipeline run"""
+
+    def __init__(self, command: str = '', source: str = ''):
+        self.record = {
+            'command': command,
+            'repository_url': source,
+            'started': datetime.now().isoformat(),
+            'status': 'running',
+            'seconds': 0.0,
+            'stages': {},
+            'counts': {},
+            'llm_calls': [],
+            'caches': {},
+        }
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block; repeated stages (one per shard) add up"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stages = self.record['stages']
+            stages[name] = round(stages.get(name, 0.0) + time.perf_counter() - start, 4)
+
+    def count(self, name: str, value: int) -> None:
+        counts = self.record['counts']
+        counts[name] = counts.get(name, 0) + value
+
+    def cache(self, name: str, hits: int, misses: int) -> None:
+        self.record['caches'][name] = {'hits': hits, 'misses': misses}
+
+    def finish(self, status: str, llm_calls: Optional[List[Dict]] = None) -> Dict:
+        self.record['status'] = status
+        self.record['seconds'] = round(time.perf_counter() - self._start, 4)
+        self.record['llm_calls'] = list(llm_calls or [])
+        return self.record
+
+
+def append_run(history_path: str, record: Dict) -> None:
+    """Append one run to the history; earlier lines are never rewritten"""
+    os.makedirs(os.path.dirname(os.path.abspath(history_path)), exist_ok=True)
+    with open(history_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+
+def load_history(history_path: str) -> List[Dict]:
+    """Every recorded run, oldest first; lines cut short by an interrupted write are skipped"""
+    runs = []
+    if not os.path.exists(history_path):
+        return runs
+    with open(history_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                runs.append(json.loads(line))
+            except ValueError:
+                continue
+    return runs
+
+
+def run_cost(run: Dict) -> Optional[float]:
+    """Seconds per 1,000 source lines, so runs on the same repository compare as it grows"""
+    lines = run['counts'].get('lines', 0)
+    return run['seconds'] * 1000 / lines if lines else None
+
+
+def llm_latency(run: Dict, quantile: float = 0.5) -> Optional[float]:
+    latencies = sorted(call['seconds'] for call in run['llm_calls'])
+    if not latencies:
+        return None
+    return latencies[min(len(latencies) - 1, int(quantile * len(latencies)))]
+
+
+def cache_hit_rate(run: Dict) -> Optional[float]:
+    hits = sum(cache['hits'] for cache in run['caches'].values())
+    total = hits + sum(cache['misses'] for cache in run['caches'].values())
+    return hits / total if total else None
+
+
+def tier_summary(calls: List[Dict]) -> Dict[str, Dict]:
+    """{tier: {'calls', 'fallbacks', 'prompt_tokens', 'cached_tokens', 'output_tokens', 'seconds', 'p50_seconds'}}
+    over LLM calls; `prompt_tokens` includes the `cached_tokens` read from a cached payload"""
+    tiers: Dict[str, Dict] = {}
+    for call in calls:
+        tier = tiers.setdefault(call.get('tier', 'large'), {'calls': 0, 'fallbacks': 0, 'prompt_tokens': 0,
+                                                             'cached_tokens': 0, 'output_tokens': 0, 'seconds': 0.0,
+                                                             'latencies': []})
+        tier['calls'] += 1
+        tier['fallbacks'] += bool(call.get('fallback'))
+        tier['prompt_tokens'] += call.get('prompt_tokens') or call.get('prompt_chars', 0) // 4
+        tier['cached_tokens'] += call.get('cached_tokens', 0)
+        tier['output_tokens'] += call.get('output_tokens') or call.get('response_chars', 0) // 4
+        tier['seconds'] += call['seconds']
+        tier['latencies'].append(call['seconds'])
+    for tier in tiers.values():
+        latencies = sorted(tier.pop('latencies'))
+        tier['p50_seconds'] = latencies[len(latencies) // 2]
+        tier['seconds'] = round(tier['seconds'], 2)
+    return tiers
+
+
+def format_tier_summary(calls: List[Dict]) -> str:
+    lines = ["LLM usage by model tier:"]
+    for name, tier in sorted(tier_summary(calls).items()):
+        cached = f" ({tier['cached_tokens']:,} cached)" if tier['cached_tokens'] else ""
+        lines.append(f"  {name}: {tier['calls']} calls ({tier['fallbacks']} fallbacks), "
+                     f"{tier['prompt_tokens']:,} prompt{cached} + {tier['output_tokens']:,} output tokens, "
+                     f"{tier['seconds']:.1f}s total, p50 {tier['p50_seconds']:.1f}s")
+    return '\n'.join(lines)
+
+
+def find_regressions(runs: List[Dict], ratio: float = REGRESSION_RATIO,
+                     window: int = REGRESSION_WINDOW) -> List[Dict]:
+    """Completed runs noticeably slower or more token-hungry than the recent runs of the same command and repository.
+
+    Returns [{'index', 'metric', 'value', 'baseline'}], comparing each run with the median of up to
+    `window` earlier ones.
+    """
+    metrics = {
+        'seconds per 1k lines': run_cost,
+        'prompt tokens': lambda run: run['counts'].get('input_tokens') or None,
+        'p50 LLM latency': llm_latency,
+    }
+    previous: Dict[tuple, List[int]] = {}
+    regressions = []
+    for index, run in enumerate(runs):
+        if run['status'] != 'ok':
+            continue
+        key = (run['command'], run['repository_url'])
+        earlier = previous.setdefault(key, [])
+        for metric, measure in metrics.items():
+            value = measure(run)
+            baseline_values = [v for v in (measure(runs[i]) for i in earlier[-window:]) if v is not None]
+            if value is None or not baseline_values:
+                continue
+            baseline = median(baseline_values)
+            if baseline and value > baseline * ratio:
+                regressions.append({'index': index, 'metric': metric, 'value': value, 'baseline': baseline})
+        earlier.append(index)
+    return regressions
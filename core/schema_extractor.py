@@ -0,0 +1,612 @@
+import re
+import ast
+from typing import Dict, List, Optional, Tuple
+
+from core.graph_utils import connected_components, pack_components
+
+_SQL_TOKEN_RE = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<comment>--[^\n]*|\#[^\n]*|/\*[^*]*(?:\*(?!/)[^*]*)*(?:\*/)?)
+  | (?P<string>'[^']*(?:''[^']*)*'?)
+  | (?P<quoted>"[^"]*"?|`[^`]*`?|\[[^\]]*\]?)
+  | (?P<word>[A-Za-z_][\w$]*)
+  | (?P<number>\d[\w.]*)
+  | (?P<punct>.)
+''', re.VERBOSE | re.DOTALL)
+
+_NATURAL_KEY_RE = re.compile(r'(\d+)')
+_TABLE_CONSTRAINTS = {'CONSTRAINT', 'PRIMARY', 'FOREIGN', 'UNIQUE', 'CHECK', 'KEY', 'INDEX', 'EXCLUDE', 'FULLTEXT'}
+_COLUMN_STOP_WORDS = {'NOT', 'NULL', 'PRIMARY', 'REFERENCES', 'UNIQUE', 'DEFAULT', 'CHECK', 'CONSTRAINT',
+                      'AUTO_INCREMENT', 'AUTOINCREMENT', 'IDENTITY', 'GENERATED', 'COLLATE', 'COMMENT', 'ON'}
+
+_JPA_RELATIONS = {
+    '@ManyToOne': ('}o', '||'),
+    '@OneToOne': ('||', '||'),
+    '@OneToMany': ('||', 'o{'),
+    '@ManyToMany': ('}o', 'o{'),
+}
+_ANNOTATION_ARG_RE = re.compile(r'\b(name|mappedBy)\s*=\s*"([^"]*)"')
+_NOT_NULLABLE_RE = re.compile(r'nullable\s*=\s*false|optional\s*=\s*false')
+_GENERIC_ARG_RE = re.compile(r'<\s*([\w.]+)\s*>')
+
+
+def _natural_key(path: str) -> List:
+    """Sort migrations V2__x.sql before V10__y.sql"""
+    return [int(part) if part.isdigit() else part.lower() for part in _NATURAL_KEY_RE.split(path)]
+
+
+def _unquote(text: str) -> str:
+    if text[:1] in ('"', '`', '[') and len(text) > 1:
+        return text[1:-1]
+    return text
+
+
+class SchemaBuilder:
+    """Accumulates a normalised schema from SQL DDL and ORM model declarations.
+
+    Tables are keyed by their lower-cased, unqualified name so later
+    migrations (ALTER/DROP) and references from other tables resolve to the
+    same entry regardless of quoting or schema prefixes.
+    """
+
+    def __init__(self):
+        self.tables: Dict[str, Dict] = {}
+        self.relations: List[Dict] = []
+
+    # ------------------------------------------------------------ helpers
+
+    def _table(self, name: str, source: str) -> Dict:
+        key = name.lower()
+        if key not in self.tables:
+            self.tables[key] = {'name': name, 'columns': {}, 'primary_key': [], 'foreign_keys': [],
+                                'unique': [], 'source': source}
+        return self.tables[key]
+
+    @staticmethod
+    def _add_column(table: Dict, name: str, col_type: str, nullable: bool = True) -> Dict:
+        column = table['columns'].setdefault(name.lower(), {'name': name, 'type': col_type, 'nullable': nullable})
+        column['type'] = col_type or column['type']
+        column['nullable'] = column['nullable'] and nullable
+        return column
+
+    @staticmethod
+    def _add_foreign_key(table: Dict, columns: List[str], ref_table: str, ref_columns: List[str]):
+        fk = {'columns': columns, 'ref_table': ref_table, 'ref_columns': ref_columns}
+        if fk not in table['foreign_keys']:
+            table['foreign_keys'].append(fk)
+
+    # ---------------------------------------------------------------- SQL
+
+    def add_sql(self, content: str, path: str):
+        for statement, line in _split_statements(content):
+            try:
+                self._apply_statement(statement, f"{path}:{line}")
+            except (IndexError, ValueError):
+                continue
+
+    def _apply_statement(self, tokens: List[Tuple[str, str]], source: str):
+        def word(k: int) -> str:
+            return tokens[k][1].upper() if k < len(tokens) else ''
+
+        if word(0) == 'CREATE':
+            i = 1
+            while word(i) in ('OR', 'REPLACE', 'TEMP', 'TEMPORARY', 'GLOBAL', 'LOCAL', 'UNLOGGED', 'EXTERNAL'):
+                i += 1
+            if word(i) != 'TABLE':
+                return
+            i += 1
+            if word(i) == 'IF':
+                i += 3  # IF NOT EXISTS
+            name, i = _qualified_name(tokens, i)
+            if word(i) != '(':
+                return  # CREATE TABLE ... AS SELECT
+            table = self._table(name, source)
+            close = _matching(tokens, i)
+            for definition in _split_commas(tokens[i + 1:close]):
+                self._apply_definition(table, definition)
+
+        elif word(0) == 'ALTER' and word(1) == 'TABLE':
+            i = 2
+            while word(i) in ('IF', 'EXISTS', 'ONLY'):
+                i += 1
+            name, i = _qualified_name(tokens, i)
+            table = self._table(name, source)
+            for action in _split_commas(tokens[i:]):
+                self._apply_alter(table, action)
+
+        elif word(0) == 'DROP' and word(1) == 'TABLE':
+            i = 2
+            if word(i) == 'IF':
+                i += 2  # IF EXISTS
+            while i < len(tokens):
+                name, i = _qualified_name(tokens, i)
+                self.tables.pop(name.lower(), None)
+                if word(i) != ',':
+                    break
+                i += 1
+
+    def _apply_definition(self, table: Dict, tokens: List[Tuple[str, str]]):
+        if not tokens:
+            return
+        head = tokens[0][1].upper() if tokens[0][0] == 'word' else ''
+        if head in _TABLE_CONSTRAINTS:
+            self._apply_table_constraint(table, tokens)
+            return
+
+        name = _unquote(tokens[0][1])
+        type_parts = []
+        i = 1
+        while i < len(tokens) and not (tokens[i][0] == 'word' and tokens[i][1].upper() in _COLUMN_STOP_WORDS):
+            if tokens[i][1] == '(':
+                close = _matching(tokens, i)
+                type_parts.append('(' + ''.join(t[1] for t in tokens[i + 1:close]) + ')')
+                i = close + 1
+                continue
+            type_parts.append(tokens[i][1])
+            i += 1
+        col_type = ' '.join(type_parts).replace(' (', '(')
+
+        upper = [t[1].upper() for t in tokens]
+        nullable = not any(upper[k] == 'NOT' and k + 1 < len(upper) and upper[k + 1] == 'NULL'
+                           for k in range(len(upper)))
+        column = self._add_column(table, name, col_type, nullable)
+
+        if 'PRIMARY' in upper:
+            if name not in table['primary_key']:
+                table['primary_key'].append(name)
+            column['nullable'] = False
+        if 'UNIQUE' in upper:
+            table['unique'].append([name])
+        if 'REFERENCES' in upper:
+            k = upper.index('REFERENCES')
+            ref_table, j = _qualified_name(tokens, k + 1)
+            ref_columns = _paren_names(tokens, j) if j < len(tokens) and tokens[j][1] == '(' else []
+            self._add_foreign_key(table, [name], ref_table, ref_columns)
+
+    def _apply_table_constraint(self, table: Dict, tokens: List[Tuple[str, str]]):
+        upper = [t[1].upper() for t in tokens]
+        if 'PRIMARY' in upper:
+            k = upper.index('PRIMARY')
+            open_index = upper.index('(', k)
+            for name in _paren_names(tokens, open_index):
+                if name not in table['primary_key']:
+                    table['primary_key'].append(name)
+        elif 'FOREIGN' in upper:
+            k = upper.index('FOREIGN')
+            columns = _paren_names(tokens, upper.index('(', k))
+            r = upper.index('REFERENCES')
+            ref_table, j = _qualified_name(tokens, r + 1)
+            ref_columns = _paren_names(tokens, j) if j < len(tokens) and tokens[j][1] == '(' else []
+            self._add_foreign_key(table, columns, ref_table, ref_columns)
+        elif 'UNIQUE' in upper and '(' in upper:
+            table['unique'].append(_paren_names(tokens, upper.index('(')))
+
+    def _apply_alter(self, table: Dict, tokens: List[Tuple[str, str]]):
+        if not tokens:
+            return
+        upper = [t[1].upper() for t in tokens]
+        if upper[0] == 'ADD':
+            rest = tokens[1:]
+            if rest and rest[0][1].upper() == 'COLUMN':
+                rest = rest[1:]
+            if rest and rest[0][1].upper() == 'IF':
+                rest = rest[3:]
+            self._apply_definition(table, rest)
+        elif upper[0] == 'DROP' and len(upper) > 1 and upper[1] not in ('CONSTRAINT', 'INDEX', 'KEY',
+                                                                        'PRIMARY', 'FOREIGN'):
+            k = 2 if upper[1] == 'COLUMN' else 1
+            if upper[k] == 'IF':
+                k += 2
+            name = _unquote(tokens[k][1]).lower()
+            table['columns'].pop(name, None)
+            table['primary_key'] = [c for c in table['primary_key'] if c.lower() != name]
+            table['foreign_keys'] = [fk for fk in table['foreign_keys']
+                                     if name not in (c.lower() for c in fk['columns'])]
+            table['unique'] = [u for u in table['unique'] if name not in (c.lower() for c in u)]
+        elif upper[0] == 'RENAME' and len(upper) > 2:
+            if upper[1] == 'TO':
+                new_name = _unquote(tokens[2][1])
+                self.tables.pop(table['name'].lower(), None)
+                table['name'] = new_name
+                self.tables[new_name.lower()] = table
+            elif upper[1] == 'COLUMN' and 'TO' in upper:
+                old, new = _unquote(tokens[2][1]), _unquote(tokens[upper.index('TO') + 1][1])
+                if old.lower() in table['columns']:
+                    # Rebuild to keep the column in its original position
+                    table['columns'] = {(new.lower() if key == old.lower() else key): column
+                                        for key, column in table['columns'].items()}
+                    table['columns'][new.lower()]['name'] = new
+                    self._rename_column(table, old, new)
+
+    def _rename_column(self, table: Dict, old: str, new: str):
+        """Follow a column rename through the table's keys and the foreign keys that reference it"""
+        def renamed(columns: List[str]) -> List[str]:
+            return [new if c.lower() == old.lower() else c for c in columns]
+
+        table['primary_key'] = renamed(table['primary_key'])
+        table['unique'] = [renamed(u) for u in table['unique']]
+        for fk in table['foreign_keys']:
+            fk['columns'] = renamed(fk['columns'])
+        for other in self.tables.values():
+            for fk in other['foreign_keys']:
+                if fk['ref_table'].lower() == table['name'].lower():
+                    fk['ref_columns'] = renamed(fk['ref_columns'])
+
+    # ---------------------------------------------------------------- JPA
+
+    def add_jpa_entities(self, symbol_table: Dict, path: str):
+        for cls in symbol_table['classes']:
+            if not any(a.startswith('@Entity') for a in cls['annotations']):
+                continue
+            table_name = _annotation_arg(cls['annotations'], '@Table', 'name') or cls['name']
+            table = self._table(table_name, f"{path}:{cls['line']}")
+            table['entity'] = cls['name']
+
+            for field in cls['fields']:
+                annotations = field.get('annotations', [])
+                if 'static' in field.get('modifiers', []) or any(a.startswith('@Transient') for a in annotations):
+                    continue
+                relation = next((a.split('(')[0] for a in annotations if a.split('(')[0] in _JPA_RELATIONS), None)
+                if relation:
+                    generic = _GENERIC_ARG_RE.search(field['type'])
+                    target = (generic.group(1) if generic else field['type']).rsplit('.', 1)[-1]
+                    self.relations.append({'source': cls['name'], 'target': target, 'kind': relation,
+                                           'label': field['name']})
+                    join_column = _annotation_arg(annotations, '@JoinColumn', 'name')
+                    if relation in ('@ManyToOne', '@OneToOne') and (join_column or not _annotation_arg(
+                            annotations, relation, 'mappedBy')):
+                        column_name = join_column or f"{field['name']}_id"
+                        self._add_column(table, column_name, 'bigint')
+                        table.setdefault('entity_fks', []).append((column_name, target))
+                    continue
+
+                column_name = _annotation_arg(annotations, '@Column', 'name') or field['name']
+                self._add_column(table, column_name, field['type'],
+                                 nullable=not any(_NOT_NULLABLE_RE.search(a) for a in annotations))
+                if any(a.startswith(('@Id', '@EmbeddedId')) for a in annotations):
+                    table['primary_key'].append(column_name)
+
+    # ------------------------------------------------------------- Python
+
+    def add_python_models(self, content: str, path: str):
+        """SQLAlchemy declarative models and Django models"""
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            return
+
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.ClassDef):
+                continue
+            bases = [ast.unparse(b) for b in node.bases]
+            is_django = any(b.endswith('models.Model') or b == 'Model' for b in bases)
+            table_name = None
+            for item in node.body:
+                if isinstance(item, ast.Assign) and any(isinstance(t, ast.Name) and t.id == '__tablename__'
+                                                        for t in item.targets):
+                    if isinstance(item.value, ast.Constant):
+                        table_name = str(item.value.value)
+            if not table_name and not is_django:
+                continue
+
+            table = self._table(table_name or node.name.lower(), f"{path}:{node.lineno}")
+            table['entity'] = node.name
+            if is_django and not any(c.lower() == 'id' for c in table['primary_key']):
+                self._add_column(table, 'id', 'AutoField', nullable=False)
+                table['primary_key'].append('id')
+
+            for item in node.body:
+                target, value, annotation = None, None, None
+                if isinstance(item, ast.Assign) and len(item.targets) == 1 and isinstance(item.targets[0], ast.Name):
+                    target, value = item.targets[0].id, item.value
+                elif isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name):
+                    target, value, annotation = item.target.id, item.value, item.annotation
+                if target is None or not isinstance(value, ast.Call):
+                    continue
+                self._python_column(table, node.name, target, value, annotation, is_django)
+
+    def _python_column(self, table: Dict, class_name: str, name: str, call: ast.Call,
+                       annotation, is_django: bool):
+        func = ast.unparse(call.func).rsplit('.', 1)[-1]
+        kwargs = {kw.arg: kw.value for kw in call.keywords if kw.arg}
+
+        if func in ('Column', 'mapped_column'):
+            col_type = ''
+            column_name = name
+            for arg in call.args:
+                if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                    column_name = arg.value
+                elif isinstance(arg, ast.Call) and ast.unparse(arg.func).endswith('ForeignKey'):
+                    if arg.args and isinstance(arg.args[0], ast.Constant):
+                        ref = str(arg.args[0].value)
+                        ref_table, _, ref_column = ref.rpartition('.')
+                        self._add_foreign_key(table, [column_name], ref_table or ref, [ref_column] if ref_table else [])
+                elif not col_type:
+                    col_type = ast.unparse(arg)
+            if not col_type and annotation is not None:
+                col_type = ast.unparse(annotation)
+            nullable = not (_is_true(kwargs.get('primary_key')) or _is_false(kwargs.get('nullable')))
+            self._add_column(table, column_name, col_type, nullable)
+            if _is_true(kwargs.get('primary_key')):
+                table['primary_key'].append(column_name)
+            if _is_true(kwargs.get('unique')):
+                table['unique'].append([column_name])
+
+        elif func == 'relationship' and call.args:
+            target = ast.unparse(call.args[0]).strip('\'"')
+            annotation_text = ast.unparse(annotation) if annotation is not None else ''
+            if 'secondary' in kwargs:
+                kind = '@ManyToMany'
+            elif _is_false(kwargs.get('uselist')):
+                kind = '@OneToOne'
+            elif 'List' in annotation_text or 'list[' in annotation_text:
+                kind = '@OneToMany'
+            else:
+                kind = '@ManyToOne'
+            self.relations.append({'source': class_name, 'target': target, 'kind': kind, 'label': name})
+
+        elif is_django and func in ('ForeignKey', 'OneToOneField'):
+            target = ast.unparse(call.args[0] if call.args else kwargs.get('to', ast.Constant(''))).strip('\'"')
+            target = target.rsplit('.', 1)[-1]
+            column_name = f"{name}_id"
+            self._add_column(table, column_name, func, _is_true(kwargs.get('null')))
+            table.setdefault('entity_fks', []).append((column_name, target))
+            self.relations.append({'source': class_name, 'target': target,
+                                   'kind': '@OneToOne' if func == 'OneToOneField' else '@ManyToOne',
+                                   'label': name})
+
+        elif is_django and func == 'ManyToManyField':
+            target = ast.unparse(call.args[0]).strip('\'"').rsplit('.', 1)[-1] if call.args else ''
+            self.relations.append({'source': class_name, 'target': target, 'kind': '@ManyToMany',
+                                   'label': name})
+
+        elif is_django and func.endswith('Field'):
+            self._add_column(table, name, func, _is_true(kwargs.get('null')))
+            if _is_true(kwargs.get('primary_key')):
+                # An explicit primary key replaces Django's implicit `id`
+                if name != 'id':
+                    table['columns'].pop('id', None)
+                table['primary_key'] = [name]
+
+    # -------------------------------------------------------------- output
+
+    def schema(self) -> Dict:
+        """Normalised schema: tables with columns/keys plus resolved relationships"""
+        entity_to_table = {t.get('entity', '').lower(): key for key, t in self.tables.items() if t.get('entity')}
+
+        def resolve(name: str) -> Optional[str]:
+            key = name.lower().rsplit('.', 1)[-1]
+            if key in self.tables:
+                return key
+            return entity_to_table.get(key)
+
+        tables = {}
+        relationships = []
+        seen = set()
+        for key, table in self.tables.items():
+            foreign_keys = list(table['foreign_keys'])
+            for column_name, entity in table.get('entity_fks', []):
+                target = resolve(entity)
+                if target:
+                    pk = self.tables[target]['primary_key']
+                    foreign_keys.append({'columns': [column_name], 'ref_table': self.tables[target]['name'],
+                                         'ref_columns': pk[:1]})
+            tables[key] = {
+                'name': table['name'],
+                'source': table['source'],
+                'columns': list(table['columns'].values()),
+                'primary_key': table['primary_key'],
+                'foreign_keys': foreign_keys,
+                'unique': table['unique'],
+            }
+            for fk in foreign_keys:
+                target = resolve(fk['ref_table'])
+                if not target:
+                    continue
+                unique_cols = [u for u in table['unique']] + [table['primary_key']]
+                one_to_one = any(sorted(c.lower() for c in fk['columns']) == sorted(c.lower() for c in u)
+                                 for u in unique_cols if u)
+                edge = (target, key, ','.join(fk['columns']))
+                if edge not in seen:
+                    seen.add(edge)
+                    relationships.append({'parent': target, 'child': key, 'label': ', '.join(fk['columns']),
+                                          'cardinality': ('||', '||') if one_to_one else ('||', 'o{')})
+
+        # ORM relationships not backed by a foreign key column (OneToMany/ManyToMany)
+        for relation in self.relations:
+            source, target = resolve(relation['source']), resolve(relation['target'])
+            if not source or not target or relation['kind'] in ('@ManyToOne', '@OneToOne'):
+                continue
+            left, right = _JPA_RELATIONS[relation['kind']]
+            pair = (source, target) if relation['kind'] == '@OneToMany' else tuple(sorted((source, target)))
+            if any((r['parent'], r['child']) in (pair, pair[::-1]) for r in relationships):
+                continue
+            relationships.append({'parent': pair[0], 'child': pair[1], 'label': relation['label'],
+                                  'cardinality': (left, right)})
+
+        return {'tables': tables, 'relationships': relationships}
+
+
+# --------------------------------------------------------------- SQL lexing
+
+def _split_statements(content: str) -> List[Tuple[List[Tuple[str, str]], int]]:
+    """Split SQL into token lists per statement (top-level ';'), with the starting line"""
+    statements = []
+    current: List[Tuple[str, str]] = []
+    depth = 0
+    line = 1
+    start_line = 1
+    for match in _SQL_TOKEN_RE.finditer(content):
+        kind = match.lastgroup
+        text = match.group()
+        if kind in ('ws', 'comment'):
+            line += text.count('\n')
+            continue
+        if not current:
+            start_line = line
+        if kind == 'string':
+            line += text.count('\n')
+        if kind == 'quoted':
+            kind, text = 'word', _unquote(text)
+        if text == '(':
+            depth += 1
+        elif text == ')':
+            depth = max(0, depth - 1)
+        if text == ';' and depth == 0:
+            if current:
+                statements.append((current, start_line))
+            current = []
+            continue
+        current.append((kind, text))
+    if current:
+        statements.append((current, start_line))
+    return statements
+
+
+def _matching(tokens: List[Tuple[str, str]], start: int) -> int:
+    depth = 0
+    for j in range(start, len(tokens)):
+        if tokens[j][1] == '(':
+            depth += 1
+        elif tokens[j][1] == ')':
+            depth -= 1
+            if depth == 0:
+                return j
+    return len(tokens)
+
+
+def _split_commas(tokens: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+    parts, current, depth = [], [], 0
+    for token in tokens:
+        if token[1] == '(':
+            depth += 1
+        elif token[1] == ')':
+            depth -= 1
+        if token[1] == ',' and depth == 0:
+            parts.append(current)
+            current = []
+            continue
+        current.append(token)
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _qualified_name(tokens: List[Tuple[str, str]], i: int) -> Tuple[str, int]:
+    """Read `schema.table` at i; return the unqualified table name and the next index"""
+    name = _unquote(tokens[i][1])
+    i += 1
+    while i + 1 < len(tokens) and tokens[i][1] == '.':
+        name = _unquote(tokens[i + 1][1])
+        i += 2
+    return name, i
+
+
+def _paren_names(tokens: List[Tuple[str, str]], open_index: int) -> List[str]:
+    close = _matching(tokens, open_index)
+    return [_unquote(t[1]) for t in tokens[open_index + 1:close] if t[0] == 'word']
+
+
+def _annotation_arg(annotations: List[str], name: str, arg: str) -> Optional[str]:
+    for annotation in annotations:
+        if annotation.split('(')[0] == name:
+            for key, value in _ANNOTATION_ARG_RE.findall(annotation):
+                if key == arg:
+                    return value
+    return None
+
+
+def _is_true(node) -> bool:
+    return isinstance(node, ast.Constant) and node.value is True
+
+
+def _is_false(node) -> bool:
+    return isinstance(node, ast.Constant) and node.value is False
+
+
+# ------------------------------------------------------------------ rendering
+
+def _er_token(text: str) -> str:
+    return re.sub(r'\W', '_', text.split('(')[0].strip()) or 'unknown'
+
+
+def render_er_diagrams(schema: Dict, max_tables: int = 30) -> List[str]:
+    """Mermaid erDiagram sources, split into readable groups of related tables"""
+    tables = schema['tables']
+    if not tables:
+        return []
+
+    components = connected_components(tables, ((r['parent'], r['child']) for r in schema['relationships']))
+    diagrams = []
+    for group in pack_components(components, max_tables):
+        members = set(group)
+        lines = ['erDiagram']
+        for key in group:
+            table = tables[key]
+            fk_columns = {c.lower() for fk in table['foreign_keys'] for c in fk['columns']}
+            pk_columns = {c.lower() for c in table['primary_key']}
+            unique_columns = {u[0].lower() for u in table['unique'] if len(u) == 1}
+            lines.append(f"    {_er_token(table['name'])} {{")
+            for column in table['columns']:
+                keys = [k for k, present in (('PK', column['name'].lower() in pk_columns),
+                                             ('FK', column['name'].lower() in fk_columns),
+                                             ('UK', column['name'].lower() in unique_columns)) if present]
+                key_text = f" {', '.join(keys)}" if keys else ''
+                lines.append(f"        {_er_token(column['type'] or 'unknown')} {_er_token(column['name'])}{key_text}")
+            lines.append("    }")
+        for relation in schema['relationships']:
+            if relation['parent'] in members and relation['child'] in members:
+                left, right = relation['cardinality']
+                parent = _er_token(tables[relation['parent']]['name'])
+                child = _er_token(tables[relation['child']]['name'])
+                label = relation['label'].replace('"', "'") or 'relates'
+                lines.append(f"    {parent} {left}--{right} {child} : \"{label}\"")
+        diagrams.append('\n'.join(lines))
+    return diagrams
+
+
+def format_schema(schema: Dict) -> str:
+    """Compact schema summary for the LLM"""
+    lines = [f"TABLES ({len(schema['tables'])}):"]
+    for table in schema['tables'].values():
+        pk = {c.lower() for c in table['primary_key']}
+        fks = {c.lower(): f"{fk['ref_table']}.{','.join(fk['ref_columns']) or '?'}"
+               for fk in table['foreign_keys'] for c in fk['columns']}
+        columns = []
+        for column in table['columns']:
+            text = f"{column['name']} {column['type']}".strip()
+            if column['name'].lower() in pk:
+                text += ' PK'
+            if column['name'].lower() in fks:
+                text += f" FK->{fks[column['name'].lower()]}"
+            if not column['nullable'] and column['name'].lower() not in pk:
+                text += ' NOT NULL'
+            columns.append(text)
+        lines.append(f"- {table['name']} [{table['source']}]: {'; '.join(columns)}")
+
+    if schema['relationships']:
+        lines.append(f"\nRELATIONSHIPS ({len(schema['relationships'])}):")
+        for relation in schema['relationships']:
+            left, right = relation['cardinality']
+            lines.append(f"- {schema['tables'][relation['parent']]['name']} {left}--{right} "
+                         f"{schema['tables'][relation['child']]['name']} ({relation['label']})")
+    return '\n'.join(lines)
+
+
+def extract_schema(files: List[Dict], symbol_tables: Dict[str, Dict]) -> Dict:
+    """Schema from SQL migrations (applied in natural path order) and ORM models"""
+    builder = SchemaBuilder()
+    for file_data in sorted((f for f in files if f['language'] == 'sql'), key=lambda f: _natural_key(f['path'])):
+        builder.add_sql(file_data['content'], file_data['path'])
+
+    for path, table in symbol_tables.items():
+        if table['language'] == 'java':
+            builder.add_jpa_entities(table, path)
+
+    for file_data in files:
+        if file_data['language'] == 'python':
+            content = file_data['content']
+            if '__tablename__' in content or 'models.Model' in content:
+                builder.add_python_models(content, file_data['path'])
+
+    return builder.schema()
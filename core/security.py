@@ -0,0 +1,40 @@
+from typing import Dict
+
+# Security sensitive patterns to filter out
+SENSITIVE_PATH_PATTERNS = {
+    # Environment and configuration files
+    '.env', 'config.json', 'settings.json', 'appsettings.json',
+    # Authentication files
+    'auth', 'credentials', 'secret', 'password', 'token',
+    # Virtual environments and dependencies
+    'venv', 'env', 'node_modules', '__pycache__', 'vendor',
+    # Build and cache
+    'dist', 'build', '.next', '.nuxt', 'coverage', 'target',
+    # IDE and editor files
+    '.idea', '.vscode', '.vs',
+    # Compiled files
+    '.pyc', '.class', '.jar', '.war',
+    # Key and certificate files
+    '.pem', '.key', '.crt', '.cer', '.pfx', '.p12',
+    # Database files
+    '.db', '.sqlite', '.sqlite3',
+    # Log files
+    '.log', 'logs/',
+    # Temporary files
+    'tmp/', 'temp/', '.tmp', '.temp'
+}
+
+SENSITIVE_CONTENT_KEYWORDS = ['password', 'secret', 'token', 'key', 'credential', 'auth']
+
+
+def is_sensitive_file(file_data: Dict) -> bool:
+    """True if a file's path or content suggests it may hold secrets"""
+    path = file_data['path'].lower()
+    
+    # Skip if file contains sensitive patterns
+    if any(pattern in path for pattern in SENSITIVE_PATH_PATTERNS):
+        return True
+    
+    # Skip if file might contain sensitive content
+    content = file_data['content'].lower()
+    return any(keyword in content for keyword in SENSITIVE_CONTENT_KEYWORDS)
@@ -0,0 +1,86 @@
+import posixpath
+from typing import Dict, List, Optional
+
+from core.import_graph import build_import_graph
+
+# Build files that mark the root of an independently built subproject
+PROJECT_MARKERS = {'package.json', 'pom.xml', 'build.gradle', 'build.gradle.kts', 'pyproject.toml', 'setup.py',
+                   'setup.cfg', 'go.mod', 'cargo.toml', 'composer.json', 'gemfile'}
+# Subprojects smaller than this are folded into their enclosing project
+MIN_SHARD_FILES = 20
+ROOT_SHARD = 'root'
+
+
+def is_project_marker(path: str) -> bool:
+    name = posixpath.basename(path.replace('\\', '/')).lower()
+    return name in PROJECT_MARKERS or name.endswith('.csproj')
+
+
+def detect_subprojects(marker_paths: List[str]) -> List[str]:
+    """Directories that hold a build file, deepest first ('' is the repository root)"""
+    roots = {posixpath.dirname(path.replace('\\', '/')) for path in marker_paths}
+    return sorted(roots, key=lambda root: (-root.count('/') - bool(root), root))
+
+
+def _owner(path: str, roots: List[str]) -> str:
+    """Deepest root enclosing `path`; `roots` must be ordered deepest first"""
+    for root in roots:
+        if not root or path.startswith(root + '/'):
+            return root
+    return ''
+
+
+def _shard_stats(files: List[Dict]) -> Dict:
+    stats = {'total_files': len(files), 'total_lines': 0, 'languages': {}}
+    for file_data in files:
+        stats['total_lines'] += file_data['lines']
+        language = stats['languages'].setdefault(file_data['language'], {'files': 0, 'lines': 0})
+        language['files'] += 1
+        language['lines'] += file_data['lines']
+    return stats
+
+
+def shard_name(root: str) -> str:
+    return root.replace('/', '-') if root else ROOT_SHARD
+
+
+def plan_shards(files: List[Dict], marker_paths: List[str],
+                min_files: int = MIN_SHARD_FILES) -> List[Dict]:
+    """Split a codebase at subproject boundaries.
+
+    Every file belongs to the deepest directory holding a build file; subprojects with fewer
+    than `min_files` files are folded into the next enclosing one, and files outside every
+    subproject form the root shard. Returns [{'name', 'root', 'files', 'stats'}], largest
+    first, or a single shard when the repository is one project.
+    """
+    roots = detect_subprojects(marker_paths)
+    if '' not in roots:
+        roots.append('')
+
+    # Fold small subprojects upwards until every remaining one is big enough
+    while True:
+        members: Dict[str, List[Dict]] = {root: [] for root in roots}
+        for file_data in files:
+            members[_owner(file_data['path'].replace('\\', '/'), roots)].append(file_data)
+        small = [root for root in roots if root and len(members[root]) < min_files]
+        if not small:
+            break
+        roots = [root for root in roots if root not in small]
+
+    shards = [{'name': shard_name(root), 'root': root, 'files': shard_files, 'stats': _shard_stats(shard_files)}
+              for root, shard_files in members.items() if shard_files]
+    shards.sort(key=lambda shard: (-len(shard['files']), shard['root']))
+    return shards
+
+
+def shard_dependencies(shards: List[Dict], workers: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+    """{shard: {shard it imports from: number of file-level imports}} across shard boundaries"""
+    owner = {file_data['path'].replace('\\', '/'): shard['name'] for shard in shards for file_data in shard['files']}
+    graph = build_import_graph([file_data for shard in shards for file_data in shard['files']], workers)
+    dependencies: Dict[str, Dict[str, int]] = {}
+    for source, targets in graph.edges.items():
+        for target in targets:
+            if owner[source] != owner[target]:
+                counts = dependencies.setdefault(owner[source], {})
+                counts[owner[target]] = counts.get(owner[target], 0) + 1
+    return dependencies
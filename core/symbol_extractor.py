@@ -0,0 +1,604 @@
+import os
+import re
+import ast
+import json
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from core.lexer import iter_tokens
+from core.parallel import parallel_map
+
+SYMBOL_LANGUAGES = {'python', 'java', 'javascript', 'typescript'}
+
+_CLASS_KEYWORDS = {'class', 'interface', 'enum', 'record', '@interface'}
+_NOT_MEMBER_NAMES = {
+    'if', 'for', 'while', 'switch', 'catch', 'synchronized', 'return', 'new', 'throw',
+    'else', 'do', 'try', 'super', 'this', 'typeof', 'await', 'function', 'extends', 'implements'
+}
+_MODIFIERS = {
+    'public', 'private', 'protected', 'static', 'final', 'abstract', 'native', 'synchronized',
+    'transient', 'volatile', 'default', 'strictfp', 'readonly', 'async', 'export', 'declare',
+    'override', 'get', 'set', 'sealed'
+}
+
+_PY_DEF_RE = re.compile(r'([ \t]*)(?:async[ \t]+)?def[ \t]+(\w+)[ \t]*\(([^)\n]*)')
+_PY_CLASS_RE = re.compile(r'([ \t]*)class[ \t]+(\w+)[ \t]*(?:\(([^)\n]*)\))?')
+
+
+def empty_symbol_table(language: str) -> Dict:
+    return {'language': language, 'classes': [], 'functions': []}
+
+
+def extract_symbols(language: str, content: str) -> Dict:
+    """Build a symbol table (classes, members, signatures, inheritance) for one source file"""
+    if language == 'python':
+        return _extract_python(content)
+    if language in ('java', 'javascript', 'typescript'):
+        return _extract_clike(content, language)
+    return empty_symbol_table(language)
+
+
+def _extract_from_pair(item: Tuple[str, str]) -> Dict:
+    return extract_symbols(*item)
+
+
+def format_symbol_summary(table: Dict) -> str:
+    """One-line rendering of a symbol table for prompt summaries"""
+    if table['language'] not in SYMBOL_LANGUAGES:
+        return "Binary/config file"
+
+    result = []
+    if table['functions']:
+        result.append(f"Functions: {', '.join(f['signature'] for f in table['functions'])}")
+    if table['classes']:
+        classes = []
+        for cls in table['classes']:
+            header = cls['name']
+            if cls['bases']:
+                header += f" extends {', '.join(cls['bases'])}"
+            if cls['interfaces']:
+                header += f" implements {', '.join(cls['interfaces'])}"
+            if cls['methods']:
+                header += f" {{{', '.join(m['signature'] for m in cls['methods'])}}}"
+            classes.append(header)
+        result.append(f"Classes: {'; '.join(classes)}")
+
+    return '; '.join(result) if result else "No functions/classes found"
+
+
+def format_symbol_signatures(table: Dict) -> str:
+    """Multi-line signature view of a symbol table: class headers, fields and member signatures"""
+    lines = []
+    for function in table['functions']:
+        returns = f" -> {function['returns']}" if function['returns'] else ''
+        lines.append(f"  {function['signature']}{returns}")
+    for cls in table['classes']:
+        header = ' '.join(cls['annotations'] + [cls['kind'], cls['name']])
+        if cls['bases']:
+            header += f" extends {', '.join(cls['bases'])}"
+        if cls['interfaces']:
+            header += f" implements {', '.join(cls['interfaces'])}"
+        lines.append(f"  {header}")
+        for field in cls['fields']:
+            lines.append(f"    {field['type'] + ' ' if field['type'] else ''}{field['name']}")
+        for method in cls['methods']:
+            returns = f" -> {method['returns']}" if method['returns'] else ''
+            lines.append(f"    {method['signature']}{returns}")
+    return '\n'.join(lines)
+
+
+class SymbolExtractor:
+    """Extracts symbol tables for many files, in parallel, cached by content hash"""
+
+    CACHE_VERSION = 4
+
+    def __init__(self, cache_dir: Optional[str] = None, workers: Optional[int] = None):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self._memory: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def content_key(self, content: str, language: str) -> str:
+        digest = hashlib.sha1(f"{self.CACHE_VERSION}:{language}:".encode('utf-8'))
+        digest.update(content.encode('utf-8'))
+        return digest.hexdigest()
+
+    def extract(self, content: str, language: str) -> Dict:
+        key = self.content_key(content, language)
+        table = self._lookup(key)
+        if table is None:
+            table = extract_symbols(language, content)
+            self._store(key, table)
+        return table
+
+    def extract_all(self, files: List[Dict]) -> Dict[str, Dict]:
+        """Symbol tables for every supported file, keyed by path"""
+        tables = {}
+        pending = []
+        for file_data in files:
+            if file_data['language'] not in SYMBOL_LANGUAGES:
+                continue
+            content = file_data['content']
+            key = self.content_key(content, file_data['language'])
+            table = self._lookup(key)
+            if table is None:
+                pending.append((file_data['path'], key, file_data['language'], content))
+            else:
+                tables[file_data['path']] = table
+
+        if pending:
+            results = parallel_map(_extract_from_pair, [(lang, content) for _, _, lang, content in pending],
+                                   workers=self.workers)
+            for (path, key, _, _), table in zip(pending, results):
+                self._store(key, table)
+                tables[path] = table
+
+        return tables
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _lookup(self, key: str) -> Optional[Dict]:
+        table = self._memory.get(key)
+        if table is None and self.cache_dir:
+            try:
+                with open(self._cache_path(key), 'r', encoding='utf-8') as f:
+                    table = json.load(f)
+                self._memory[key] = table
+            except (OSError, ValueError):
+                table = None
+        if table is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return table
+
+    def _store(self, key: str, table: Dict):
+        self._memory[key] = table
+        if self.cache_dir:
+            path = self._cache_path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(table, f)
+            except OSError:
+                pass
+
+
+# ---------------------------------------------------------------- Python
+
+def _extract_python(content: str) -> Dict:
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return _extract_python_fallback(content)
+
+    table = empty_symbol_table('python')
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            table['functions'].append(_python_function(node))
+        elif isinstance(node, ast.ClassDef):
+            _python_class(node, table['classes'])
+    return table
+
+
+def _python_function(node) -> Dict:
+    return {
+        'name': node.name,
+        'signature': f"{node.name}({ast.unparse(node.args)})",
+        'returns': ast.unparse(node.returns) if node.returns else '',
+        'line': node.lineno,
+        'modifiers': ['async'] if isinstance(node, ast.AsyncFunctionDef) else [],
+        'annotations': [f"@{ast.unparse(d)}" for d in node.decorator_list],
+    }
+
+
+def _python_class(node: ast.ClassDef, classes: List[Dict]):
+    cls = {
+        'name': node.name,
+        'kind': 'class',
+        'line': node.lineno,
+        'bases': [ast.unparse(b) for b in node.bases],
+        'interfaces': [],
+        'annotations': [f"@{ast.unparse(d)}" for d in node.decorator_list],
+        'methods': [],
+        'fields': [],
+    }
+    classes.append(cls)
+    fields = {}
+
+    for item in node.body:
+        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            cls['methods'].append(_python_function(item))
+            for sub in ast.walk(item):
+                if isinstance(sub, ast.AnnAssign) and _is_self_attr(sub.target):
+                    fields.setdefault(sub.target.attr, (ast.unparse(sub.annotation), sub.lineno))
+                elif isinstance(sub, ast.Assign):
+                    for target in sub.targets:
+                        if _is_self_attr(target):
+                            fields.setdefault(target.attr, (_python_value_type(sub.value), sub.lineno))
+        elif isinstance(item, ast.ClassDef):
+            _python_class(item, classes)
+        elif isinstance(item, ast.AnnAssign) and isinstance(item.target, ast.Name):
+            fields.setdefault(item.target.id, (ast.unparse(item.annotation), item.lineno))
+        elif isinstance(item, ast.Assign):
+            for target in item.targets:
+                if isinstance(target, ast.Name):
+                    fields.setdefault(target.id, (_python_value_type(item.value), item.lineno))
+
+    cls['fields'] = [{'name': name, 'type': field_type, 'line': line, 'modifiers': [], 'annotations': []}
+                     for name, (field_type, line) in fields.items()]
+
+
+def _is_self_attr(node) -> bool:
+    return isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == 'self'
+
+
+def _python_value_type(value) -> str:
+    """Best-effort type of an assigned value: the class for `x = Foo(...)`"""
+    if isinstance(value, ast.Call):
+        callee = ast.unparse(value.func)
+        if callee.rsplit('.', 1)[-1][:1].isupper():
+            return callee
+    return ''
+
+
+def _extract_python_fallback(content: str) -> Dict:
+    """Line-based extraction for files ast cannot parse (e.g. Python 2 sources)"""
+    table = empty_symbol_table('python')
+    current_class, class_indent = None, -1
+    for lineno, line in enumerate(content.splitlines(), start=1):
+        class_match = _PY_CLASS_RE.match(line)
+        def_match = _PY_DEF_RE.match(line) if not class_match else None
+        if class_match:
+            indent = len(class_match.group(1).expandtabs())
+            bases = [b.strip() for b in (class_match.group(3) or '').split(',') if b.strip()]
+            current_class = {'name': class_match.group(2), 'kind': 'class', 'line': lineno, 'bases': bases,
+                             'interfaces': [], 'annotations': [], 'methods': [], 'fields': []}
+            class_indent = indent
+            table['classes'].append(current_class)
+        elif def_match:
+            indent = len(def_match.group(1).expandtabs())
+            func = {'name': def_match.group(2), 'signature': f"{def_match.group(2)}({def_match.group(3).strip()})",
+                    'returns': '', 'line': lineno, 'modifiers': [], 'annotations': []}
+            if current_class is not None and indent > class_indent:
+                current_class['methods'].append(func)
+            elif indent == 0:
+                current_class = None
+                table['functions'].append(func)
+    return table
+
+
+# ------------------------------------------------------ Java / JS / TS
+
+class _LineCounter:
+    """Maps monotonically increasing offsets to line numbers in linear total time"""
+
+    def __init__(self, content: str):
+        self.content = content
+        self.offset = 0
+        self.line = 1
+
+    def line_at(self, offset: int) -> int:
+        if offset > self.offset:
+            self.line += self.content.count('\n', self.offset, offset)
+            self.offset = offset
+        return self.line
+
+
+def _match_paren(tokens: List[Tuple[str, str, int]], start: int) -> int:
+    """Index of the ')' closing the '(' at `start` (or the last token)"""
+    depth = 0
+    for j in range(start, len(tokens)):
+        text = tokens[j][1]
+        if text == '(':
+            depth += 1
+        elif text == ')':
+            depth -= 1
+            if depth == 0:
+                return j
+    return len(tokens) - 1
+
+
+def _squash(text: str) -> str:
+    return ' '.join(text.split())
+
+
+def _is_word(text: str) -> bool:
+    return text == '?' or text[0].isalnum() or text[0] in '_$'
+
+
+def _join_type(texts: List[str]) -> str:
+    """Type tokens back to source form: `Map<K, V>`, `List<? extends T>`, `A & B`, `string | null`"""
+    joined = ''
+    previous = ''
+    for text in texts:
+        if text == ',':
+            joined += ', '
+        elif text in ('&', '|'):
+            joined += f" {text} "
+        elif joined and _is_word(previous) and _is_word(text):
+            joined += ' ' + text
+        else:
+            joined += text
+        previous = text
+    return joined
+
+
+def _split_type_params(prefix: List[str]) -> Tuple[str, List[str]]:
+    """Separate a leading generic declaration (`<T extends Comparable<T>> T`) from the return type"""
+    if not prefix or prefix[0] != '<':
+        return '', prefix
+    depth = 0
+    for k, text in enumerate(prefix):
+        depth += (text == '<') - (text == '>')
+        if depth == 0:
+            return _join_type(prefix[:k + 1]), prefix[k + 1:]
+    return '', prefix
+
+
+def _extract_clike(content: str, language: str) -> Dict:
+    tokens = list(iter_tokens(content))
+    lines = _LineCounter(content)
+    table = empty_symbol_table(language)
+    n = len(tokens)
+
+    # One entry per open brace: {'class': record or None, 'body': bool, 'enum_head': bool}
+    stack: List[Dict] = []
+    stmt: List[Tuple[str, str, int]] = []
+    stmt_is_member = False
+    annotations: List[str] = []
+    last_was_arrow = False
+
+    def class_scope() -> Optional[Dict]:
+        return stack[-1]['class'] if stack else None
+
+    i = 0
+    while i < n:
+        kind, text, offset = tokens[i]
+        cls = class_scope()
+        prev = tokens[i - 1][1] if i else ''
+
+        if kind == 'annotation' and text != '@interface':
+            end = i
+            if i + 1 < n and tokens[i + 1][1] == '(':
+                end = _match_paren(tokens, i + 1)
+            annotations.append(_squash(content[offset:tokens[end][2] + len(tokens[end][1])]))
+            i = end + 1
+            continue
+
+        if text in _CLASS_KEYWORDS and prev != '.' and i + 1 < n and tokens[i + 1][0] == 'ident' \
+                and tokens[i + 1][1] not in ('extends', 'implements'):
+            record = {
+                'name': tokens[i + 1][1],
+                'kind': 'annotation' if text == '@interface' else text,
+                'line': lines.line_at(offset),
+                'bases': [],
+                'interfaces': [],
+                'annotations': annotations,
+                'methods': [],
+                'fields': [],
+            }
+            annotations = []
+            table['classes'].append(record)
+
+            target, angle, j = None, 0, i + 2
+            while j < n and tokens[j][1] not in ('{', ';'):
+                t_kind, t_text, _ = tokens[j]
+                if t_text == '<':
+                    angle += 1
+                elif t_text == '>':
+                    angle = max(0, angle - 1)
+                elif t_text == '(':
+                    j = _match_paren(tokens, j)
+                elif angle == 0 and t_text == 'extends':
+                    target = record['bases']
+                elif angle == 0 and t_text == 'implements':
+                    target = record['interfaces']
+                elif angle == 0 and t_kind == 'ident' and target is not None:
+                    if tokens[j - 1][1] == '.' and target:
+                        target[-1] = t_text
+                    else:
+                        target.append(t_text)
+                j += 1
+
+            if j < n and tokens[j][1] == '{':
+                stack.append({'class': record, 'body': True, 'enum_head': record['kind'] == 'enum'})
+                stmt, stmt_is_member = [], False
+            i = j + 1
+            continue
+
+        if text == '{':
+            if cls is not None and (stmt_is_member or last_was_arrow or not any(t[1] == '=' for t in stmt)):
+                stack.append({'class': None, 'body': True, 'enum_head': False})
+            else:
+                stack.append({'class': None, 'body': False, 'enum_head': False})
+            last_was_arrow = False
+            i += 1
+            continue
+
+        if text == '}':
+            popped = stack.pop() if stack else None
+            if popped and (popped['body'] or popped['class'] is not None) and class_scope() is not None:
+                stmt, stmt_is_member = [], False
+            annotations = []
+            i += 1
+            continue
+
+        last_was_arrow = kind == 'arrow' and text == '=>'
+
+        if cls is not None:
+            scope = stack[-1]
+            if text == ';':
+                if scope['enum_head']:
+                    scope['enum_head'] = False
+                elif not stmt_is_member and stmt:
+                    field = _clike_field(stmt, annotations, lines)
+                    if field:
+                        cls['fields'].append(field)
+                stmt, stmt_is_member, annotations = [], False, []
+                i += 1
+                continue
+
+            if scope['enum_head']:
+                if text == '(':
+                    i = _match_paren(tokens, i) + 1
+                    continue
+                i += 1
+                continue
+
+            if text == '(' and not stmt_is_member and stmt and stmt[-1][0] == 'ident' \
+                    and stmt[-1][1] not in _NOT_MEMBER_NAMES:
+                has_assign = any(t[1] == '=' for t in stmt)
+                close = _match_paren(tokens, i)
+                if not has_assign:
+                    cls['methods'].append(_clike_method(stmt, tokens, i, close, annotations, content, lines))
+                    stmt_is_member, annotations = True, []
+                i = close + 1
+                stmt.append(('punct', '()', offset))
+                continue
+
+            # Arrow-function class fields: `handle = (e) => {...}` / `handle = async e => ...`
+            if text == '=>' and not stmt_is_member:
+                names = [t for t in stmt if t[0] == 'ident' and t[1] not in _MODIFIERS]
+                eq_index = next((k for k, t in enumerate(stmt) if t[1] == '='), None)
+                if names and eq_index is not None and eq_index > 0 and stmt[eq_index - 1][0] == 'ident':
+                    name_tok = stmt[eq_index - 1]
+                    params = content[stmt[eq_index + 1][2]:offset].strip() if eq_index + 1 < len(stmt) else ''
+                    params = _squash(params).removeprefix('async').strip().strip('()')
+                    cls['methods'].append({
+                        'name': name_tok[1], 'signature': f"{name_tok[1]}({params})", 'returns': '',
+                        'line': lines.line_at(name_tok[2]), 'modifiers': [], 'annotations': annotations,
+                    })
+                    stmt_is_member, annotations = True, []
+
+            stmt.append((kind, text, offset))
+            i += 1
+            continue
+
+        if text == ';':
+            annotations = []
+
+        # Outside class bodies: free functions (JS/TS)
+        if language != 'java':
+            if text == 'function' and i + 2 < n and tokens[i + 1][0] == 'ident' and tokens[i + 2][1] == '(':
+                close = _match_paren(tokens, i + 2)
+                name = tokens[i + 1][1]
+                table['functions'].append({
+                    'name': name,
+                    'signature': f"{name}({_squash(content[tokens[i + 2][2] + 1:tokens[close][2]])})",
+                    'returns': '', 'line': lines.line_at(offset), 'modifiers': [], 'annotations': [],
+                })
+                annotations = []
+                i = close + 1
+                continue
+            if text in ('const', 'let', 'var') and not stack and i + 3 < n and tokens[i + 1][0] == 'ident' \
+                    and tokens[i + 2][1] == '=':
+                function = _js_bound_function(tokens, i + 1, content, lines)
+                if function:
+                    table['functions'].append(function)
+                    i += 3
+                    continue
+
+        i += 1
+
+    return table
+
+
+def _js_bound_function(tokens: List[Tuple[str, str, int]], name_index: int, content: str,
+                       lines: _LineCounter) -> Optional[Dict]:
+    """`name = function (...)`, `name = (...) =>`, `name = async x =>` at module level"""
+    name = tokens[name_index][1]
+    j = name_index + 2
+    n = len(tokens)
+    if j < n and tokens[j][1] == 'async':
+        j += 1
+    if j >= n:
+        return None
+    if tokens[j][1] == 'function':
+        j += 1
+        if j < n and tokens[j][0] == 'ident':
+            j += 1
+    if j < n and tokens[j][1] == '(':
+        close = _match_paren(tokens, j)
+        is_function = tokens[j - 1][1] == 'function' or tokens[j - 2][1] == 'function' \
+            or (close + 1 < n and tokens[close + 1][1] in ('=>', ':'))
+        if not is_function:
+            return None
+        params = _squash(content[tokens[j][2] + 1:tokens[close][2]])
+    elif tokens[j][0] == 'ident' and j + 1 < n and tokens[j + 1][1] == '=>':
+        params = tokens[j][1]
+    else:
+        return None
+    return {'name': name, 'signature': f"{name}({params})", 'returns': '',
+            'line': lines.line_at(tokens[name_index][2]), 'modifiers': [], 'annotations': []}
+
+
+def _clike_method(stmt: List[Tuple[str, str, int]], tokens: List[Tuple[str, str, int]], open_index: int,
+                  close_index: int, annotations: List[str], content: str, lines: _LineCounter) -> Dict:
+    name_tok = stmt[-1]
+    prefix = [t[1] for t in stmt[:-1]]
+    modifiers = [t for t in prefix if t in _MODIFIERS]
+    type_params, return_tokens = _split_type_params([t for t in prefix if t not in _MODIFIERS])
+    returns = _join_type(return_tokens)
+
+    # TypeScript return annotation: `name(...): Type {`
+    j = close_index + 1
+    if j < len(tokens) and tokens[j][1] == ':':
+        type_tokens = []
+        j += 1
+        while j < len(tokens) and tokens[j][1] not in ('{', ';', '=>'):
+            type_tokens.append(tokens[j][1])
+            j += 1
+        returns = _join_type(type_tokens)
+
+    params = _squash(content[tokens[open_index][2] + 1:tokens[close_index][2]])
+    return {
+        'name': name_tok[1],
+        'signature': f"{type_params + ' ' if type_params else ''}{name_tok[1]}({params})",
+        'returns': returns,
+        'line': lines.line_at(name_tok[2]),
+        'modifiers': modifiers,
+        'annotations': annotations,
+    }
+
+
+def _clike_field(stmt: List[Tuple[str, str, int]], annotations: List[str], lines: _LineCounter) -> Optional[Dict]:
+    eq_index = next((k for k, t in enumerate(stmt) if t[1] == '='), len(stmt))
+    decl = [t for t in stmt[:eq_index] if t[1] not in _MODIFIERS]
+    modifiers = [t[1] for t in stmt[:eq_index] if t[1] in _MODIFIERS]
+    if not decl:
+        return None
+
+    colon = next((k for k, t in enumerate(decl) if t[1] == ':'), None)
+    if colon is not None:
+        # TypeScript: `name?: Type`
+        name_tokens = [t for t in decl[:colon] if t[0] == 'ident']
+        if not name_tokens:
+            return None
+        name_tok = name_tokens[-1]
+        field_type = _join_type([t[1] for t in decl[colon + 1:]])
+    else:
+        # Java: `Type<Args> name` (first declarator only)
+        comma = next((k for k, t in enumerate(decl) if t[1] == ',' and not _inside_angle(decl, k)), len(decl))
+        decl = decl[:comma]
+        if decl[-1][0] != 'ident':
+            return None
+        name_tok = decl[-1]
+        field_type = _join_type([t[1] for t in decl[:-1]])
+
+    if name_tok[1] in _NOT_MEMBER_NAMES:
+        return None
+    return {'name': name_tok[1], 'type': field_type, 'line': lines.line_at(name_tok[2]),
+            'modifiers': modifiers, 'annotations': annotations}
+
+
+def _inside_angle(tokens: List[Tuple[str, str, int]], index: int) -> bool:
+    depth = 0
+    for t in tokens[:index]:
+        if t[1] == '<':
+            depth += 1
+        elif t[1] == '>':
+            depth -= 1
+    return depth > 0
@@ -1,21 +1,83 @@
-import tiktoken
 import os
-from typing import Dict, List, Tuple
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Local tiktoken encoding files (tiktoken cache layout: files named by the sha1 of their URL), written by
+# `agent.py bundle-tokenizer` while online so the encoder later loads without network access. Not shipped
+# with the tool; TIKTOKEN_CACHE_DIR, when set, takes precedence.
+TOKENIZER_BUNDLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'tiktoken')
+
+_encoders = {}
+_cache_dir_lock = threading.Lock()
+
+
+@contextmanager
+def _tiktoken_cache_dir(path: Optional[str]) -> Iterator[None]:
+    """Point tiktoken at `path` for the duration of a load; the process environment is restored afterwards"""
+    with _cache_dir_lock:
+        if path is None:
+            yield
+            return
+        previous = os.environ.get('TIKTOKEN_CACHE_DIR')
+        os.environ['TIKTOKEN_CACHE_DIR'] = path
+        try:
+            yield
+        finally:
+            if previous is None:
+                os.environ.pop('TIKTOKEN_CACHE_DIR', None)
+            else:
+                os.environ['TIKTOKEN_CACHE_DIR'] = previous
+
+
+def _load_encoder(model_name: str):
+    """tiktoken encoder for `model_name`, imported and built on first use; None when unavailable"""
+    if model_name in _encoders:
+        return _encoders[model_name]
+    bundle = TOKENIZER_BUNDLE_DIR if 'TIKTOKEN_CACHE_DIR' not in os.environ and os.path.isdir(TOKENIZER_BUNDLE_DIR) \
+        else None
+    try:
+        import tiktoken
+        with _tiktoken_cache_dir(bundle):
+            encoder = tiktoken.encoding_for_model(model_name)
+    except Exception as e:  # Missing package, or encoding neither bundled nor downloadable
+        print(f"⚠️ Tokenizer unavailable ({type(e).__name__}), estimating tokens as characters / 4")
+        encoder = None
+    _encoders[model_name] = encoder
+    return encoder
+
+
+def bundle_encoding(model_name: str = "gpt-4", bundle_dir: str = TOKENIZER_BUNDLE_DIR) -> List[str]:
+    """Download the encoding for `model_name` into `bundle_dir` (run once, online); returns the files written"""
+    import tiktoken
+    os.makedirs(bundle_dir, exist_ok=True)
+    before = set(os.listdir(bundle_dir))
+    with _tiktoken_cache_dir(bundle_dir):
+        _encoders[model_name] = tiktoken.encoding_for_model(model_name)
+    return sorted(os.path.join(bundle_dir, name) for name in set(os.listdir(bundle_dir)) - before)
+
 
 class TokenEstimator:
     def __init__(self, model_name: str = "gpt-4"):
-        self.encoder = tiktoken.encoding_for_model(model_name)
-    
+        self.model_name = model_name
+
+    @property
+    def encoder(self):
+        return _load_encoder(self.model_name)
+
     def estimate_tokens(self, text: str) -> int:
-        return len(self.encoder.encode(text))
-    
+        encoder = self.encoder
+        if encoder is None:
+            return len(text) // 4
+        return len(encoder.encode(text, disallowed_special=()))
+
     def estimate_file_tokens(self, file_path: str) -> int:
         try:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                 return self.estimate_tokens(f.read())
         except:
             return 0
-    
+
     def estimate_codebase_tokens(self, files: List[Dict]) -> int:
         total = 0
         for file_data in files:
@@ -23,4 +85,4 @@ class TokenEstimator:
                 total += self.estimate_tokens(file_data['content'])
             else:
                 total += file_data.get('size', 0) // 4  # Rough estimate
-        return total
\ No newline at end of file
+        return total
@@ -1,96 +1,158 @@
+import hashlib
+import html
 import os
+import posixpath
 import re
-import subprocess
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 import markdown
-from bs4 import BeautifulSoup
-from bs4.element import CData
-from atlassian import Confluence
+from markdown.extensions import Extension
+from markdown.extensions.fenced_code import FencedBlockPreprocessor
+from markdown.postprocessors import Postprocessor
+from markdown.preprocessors import Preprocessor
+from markdown.treeprocessors import Treeprocessor
 
-def replace_mermaid_with_png(content, output_dir, file_prefix):
+from docs.doc_generator import SHARDS_DIR, doc_files
+from docs.http_session import create_pooled_session
+from docs.mermaid_renderer import MERMAID_BLOCK_RE, MermaidRenderer, extract_mermaid_blocks
+
+# Markdown -> storage converters: one rendering pass, or the rendered HTML re-parsed with BeautifulSoup
+MARKDOWN_BACKENDS = ("single-pass", "html.parser", "lxml")
+
+# Page property holding the hashes of the last published body and attachments
+HASH_PROPERTY_KEY = "docgen-content-hash"
+PAGE_EXPAND = f"version,metadata.properties.{HASH_PROPERTY_KEY}"
+
+# Relative links to other docs in converted storage bodies
+_DOC_LINK_RE = re.compile(r'<a href="(?![a-zA-Z][a-zA-Z0-9+.-]*:|/|#)([^"#]+\.md)(?:#[^"]*)?">(.*?)</a>', re.DOTALL)
+
+def replace_mermaid_with_png(content, output_dir, file_prefix, renderer=None):
     """
     Convert all mermaid blocks in content to PNGs.
     Returns updated content and list of generated PNG paths.
     """
-    # First check if mermaid-cli is installed
     try:
-        mmdc_path = None
-        # Check common installation paths
-        possible_paths = [
-            os.path.join(os.environ.get('APPDATA', ''), 'npm', 'mmdc.cmd'),
-            os.path.join(os.environ.get('PROGRAMFILES', ''), 'nodejs', 'node_modules', '@mermaid-js', 'mermaid-cli', 'bin', 'mmdc.js'),
-            'mmdc',  # Check in PATH
-        ]
-        
-        for path in possible_paths:
-            try:
-                subprocess.run([path, "--version"], capture_output=True, check=True)
-                mmdc_path = path
-                break
-            except:
-                continue
-                
-        if not mmdc_path:
+        if renderer is None:
+            renderer = MermaidRenderer(os.path.join(os.path.dirname(os.path.abspath(output_dir)), '.cache', 'mermaid'))
+        if not renderer.available:
             print("⚠️ Mermaid CLI not found. Please install it using: npm install -g @mermaid-js/mermaid-cli")
             return content, []
 
-        matches = re.findall(r"```mermaid\n(.*?)```", content, re.DOTALL)
+        # Already-rendered diagrams come straight from the cache
+        rendered = renderer.render_all(extract_mermaid_blocks(content))
         generated_pngs = []
         
         # Create diagrams directory if it doesn't exist
         diagrams_dir = os.path.join(output_dir, 'diagrams')
         os.makedirs(diagrams_dir, exist_ok=True)
 
-        for i, code in enumerate(matches, start=1):
-            png_file = os.path.join(diagrams_dir, f"{file_prefix}_diagram_{i}.png")
-            mmd_file = os.path.join(diagrams_dir, f"{file_prefix}_diagram_{i}.mmd")
-
-            # Write temp .mmd
-            with open(mmd_file, "w", encoding="utf-8") as f:
-                f.write(code.strip())
-
-            try:
-                # Generate PNG with explicit paths and error handling
-                result = subprocess.run(
-                    [mmdc_path, "-i", mmd_file, "-o", png_file],
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-                
-                generated_pngs.append(png_file)
-                
-                # Replace mermaid block with Confluence image macro
-                ac_image = f"""<ac:image><ri:attachment ri:filename="{os.path.basename(png_file)}" /></ac:image>"""
-                content = content.replace(f"```mermaid\n{code}```", ac_image)
-                
-            except subprocess.CalledProcessError as e:
-                print(f"⚠️ Error generating diagram: {e.stderr}")
-                continue
-            finally:
-                # Cleanup temp file
-                if os.path.exists(mmd_file):
-                    try:
-                        os.remove(mmd_file)
-                    except:
-                        pass
+        def replacer(match):
+            code = match.group(1)
+            if code not in rendered:
+                print(f"⚠️ Error generating diagram: {renderer.failed.get(code, 'render failed')}")
+                return match.group(0)
+
+            png_file = os.path.join(diagrams_dir, f"{file_prefix}_diagram_{len(generated_pngs) + 1}.png")
+            shutil.copyfile(rendered[code], png_file)
+            generated_pngs.append(png_file)
+            
+            # Replace mermaid block with Confluence image macro
+            return f"""<ac:image><ri:attachment ri:filename="{os.path.basename(png_file)}"></ri:attachment></ac:image>"""
 
+        content = MERMAID_BLOCK_RE.sub(replacer, content)
         return content, generated_pngs
 
     except Exception as e:
         print(f"⚠️ Error in Mermaid processing: {str(e)}")
         return content, []
 
-def md_to_confluence_storage(md_content: str) -> str:
+def code_macro(code, lang=None):
+    """Confluence code macro with the code body as CDATA"""
+    param = f'<ac:parameter ac:name="language">{lang}</ac:parameter>' if lang else ""
+    return (f'<ac:structured-macro ac:name="code">{param}'
+            f'<ac:plain-text-body><![CDATA[\n{code}\n]]></ac:plain-text-body></ac:structured-macro>')
+
+class ConfluenceCodePreprocessor(Preprocessor):
+    """
+    Turns fenced code blocks straight into Confluence code macros (stashed as raw HTML),
+    so the rendered HTML never has to be re-parsed to find them.
+    """
+
+    def run(self, lines):
+        text = "\n".join(lines)
+
+        def replace(match):
+            lang = match.group("lang")
+            if not lang and match.group("attrs"):
+                classes = re.findall(r"\.([\w\-]+)", match.group("attrs"))
+                lang = classes[0] if classes else None
+            code = match.group("code")
+
+            # Skip mermaid/plantuml (handled earlier); left as escaped code blocks
+            if lang in ("mermaid", "plantuml"):
+                escaped = code.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+                return self.md.htmlStash.store(f'<pre><code class="language-{lang}">{escaped}</code></pre>')
+
+            return self.md.htmlStash.store(code_macro(code, lang))
+
+        return FencedBlockPreprocessor.FENCED_BLOCK_RE.sub(replace, text).split("\n")
+
+class IndentedCodeTreeprocessor(Treeprocessor):
+    """
+    Turns the remaining <pre><code> blocks (indented code, including fences nested in list items)
+    into code macros; fenced blocks were already stashed by ConfluenceCodePreprocessor.
+    """
+
+    def run(self, root):
+        for parent in root.iter():
+            for index, child in enumerate(parent):
+                if child.tag != "pre" or len(child) != 1 or child[0].tag != "code":
+                    continue
+                # The block text is already HTML-escaped; the CDATA body needs it as written
+                code = (child[0].text or "").replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&")
+                placeholder = parent.makeelement("p", {})
+                placeholder.text = self.md.htmlStash.store(code_macro(code))
+                placeholder.tail = child.tail
+                parent[index] = placeholder
+
+class VoidTagPostprocessor(Postprocessor):
+    """Writes void elements as <br/> like the storage format Confluence hands back"""
+
+    VOID_TAG_RE = re.compile(r"<(br|hr|img)\b([^>]*?) />")
+
+    def run(self, text):
+        return self.VOID_TAG_RE.sub(r"<\1\2/>", text)
+
+class ConfluenceStorageExtension(Extension):
+    def extendMarkdown(self, md):
+        # Runs ahead of fenced_code (priority 25) so that it sees every fence first
+        md.preprocessors.register(ConfluenceCodePreprocessor(md), "confluence_code", 30)
+        # After prettify (priority 10) has normalised the code text
+        md.treeprocessors.register(IndentedCodeTreeprocessor(md), "confluence_indented_code", 5)
+        # Keep the stashed macros out of <p> wrappers
+        md.block_level_elements.append("ac:structured-macro")
+        # Runs before the raw HTML stash (priority 30) is restored, so code bodies are untouched
+        md.postprocessors.register(VoidTagPostprocessor(md), "void_tags", 40)
+
+def md_to_confluence_storage(md_content: str, backend: str = "single-pass") -> str:
     """
     Convert Markdown content into Confluence storage format XHTML.
+    "single-pass" emits the code macros while rendering; "html.parser" and "lxml" render plain HTML
+    and rebuild the code blocks from a BeautifulSoup parse with that parser (the original converter).
     """
-    html_content = markdown.markdown(
-        md_content,
-        extensions=["fenced_code", "tables"]
-    )
-    soup = BeautifulSoup(html_content, "html.parser")
+    if backend == "single-pass":
+        return markdown.markdown(
+            md_content,
+            extensions=[ConfluenceStorageExtension(), "fenced_code", "tables"]
+        )
+    if backend not in MARKDOWN_BACKENDS:
+        raise ValueError(f"Unknown Markdown backend '{backend}' (choose from {', '.join(MARKDOWN_BACKENDS)})")
+    return _soup_to_confluence_storage(markdown.markdown(md_content, extensions=["fenced_code", "tables"]), backend)
+
+def _soup_to_confluence_storage(html_content, parser):
+    from bs4 import BeautifulSoup, CData  # Only the re-parsing backends need bs4
 
-    # Handle fenced code blocks
+    soup = BeautifulSoup(html_content, parser)
     for pre in soup.find_all("pre"):
         code = pre.code
         if code:
@@ -103,21 +165,20 @@ def md_to_confluence_storage(md_content: str) -> str:
             if lang in ("mermaid", "plantuml"):
                 continue
 
-            # Build Confluence macro
-            code_macro = soup.new_tag("ac:structured-macro", **{"ac:name": "code"})
+            code_macro_tag = soup.new_tag("ac:structured-macro", **{"ac:name": "code"})
             if lang:
                 param = soup.new_tag("ac:parameter", **{"ac:name": "language"})
                 param.string = lang
-                code_macro.append(param)
+                code_macro_tag.append(param)
 
-            # Add plain-text-body with CDATA preserved
             body = soup.new_tag("ac:plain-text-body")
             body.append(CData("\n" + code.get_text() + "\n"))
-            code_macro.append(body)
+            code_macro_tag.append(body)
 
-            pre.replace_with(code_macro)
+            pre.replace_with(code_macro_tag)
 
-    return str(soup)
+    # lxml wraps fragments in <html><body>
+    return soup.body.decode_contents() if soup.body else str(soup)
 
 def convert_links(content, parent_page_title, child_pages):
     """
@@ -134,72 +195,222 @@ def convert_links(content, parent_page_title, child_pages):
 
     return re.sub(r"\[([^\]]+)\]\(([^)]+)\)", replacer, content)
 
-def publish_to_confluence(confluence_url, space_key, docs_folder, username, api_token):
+def page_titles(md_files, contents):
+    """
+    Page title and parent doc of every doc ({filename: title}, {filename: parent filename or None}).
+    Top-level docs and each subproject's index sit under index.md; a subproject's
+    other docs sit under its index.
+    """
+    titles, parents = {}, {}
+    index_title = None
+    if "index.md" in contents:
+        index_title = contents["index.md"].splitlines()[0].lstrip("# ").strip() or "Project Documentation"
+    for filename in md_files:
+        folder, basename = posixpath.split(filename)
+        name = basename.replace(".md", "").capitalize()
+        if filename == "index.md":
+            titles[filename], parents[filename] = index_title, None
+            continue
+        if folder.startswith(f"{SHARDS_DIR}/"):
+            shard = folder[len(SHARDS_DIR) + 1:]
+            name = shard if basename == "index.md" else f"{shard} - {name}"
+            shard_index = f"{folder}/index.md"
+            parents[filename] = shard_index if basename != "index.md" and shard_index in contents else "index.md"
+        else:
+            parents[filename] = "index.md"
+        titles[filename] = f"{index_title} - {name}" if index_title else name
+    return titles, parents
+
+def link_doc_pages(body, filename, titles):
+    """
+    Point relative links to other docs (e.g. the rollup's shards/<name>/index.md)
+    at their Confluence pages; links to docs that are not published stay as they are
+    """
+    def replacer(match):
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(filename), html.unescape(match.group(1))))
+        if target not in titles:
+            return match.group(0)
+        return (f'<ac:link><ri:page ri:content-title="{html.escape(titles[target])}" />'
+                f'<ac:link-body>{match.group(2)}</ac:link-body></ac:link>')
+
+    return _DOC_LINK_RE.sub(replacer, body)
+
+def content_hash(data) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+def _first_page(response):
+    """Normalise get_page_by_title results across atlassian-python-api versions"""
+    if isinstance(response, dict) and "results" in response:
+        return response["results"][0] if response["results"] else None
+    return response or None
+
+def _published_state(page):
+    """Stored hashes and property version of an existing page (empty for new pages)"""
+    prop = ((page or {}).get("metadata", {}).get("properties", {}) or {}).get(HASH_PROPERTY_KEY) or {}
+    value = prop.get("value") or {}
+    return {
+        "body": value.get("body"),
+        "attachments": dict(value.get("attachments") or {}),
+        "property_version": (prop.get("version") or {}).get("number"),
+    }
+
+def find_existing_pages(confluence, space_key, parent_title):
+    """Look up the parent page and all of its children once: {title: page}"""
+    pages = {}
+    parent = _first_page(confluence.get_page_by_title(space_key, parent_title, expand=PAGE_EXPAND))
+    if parent:
+        pages[parent["title"]] = parent
+        for child in confluence.get_page_child_by_type(parent["id"], type="page", expand=PAGE_EXPAND) or []:
+            pages[child["title"]] = child
+    return pages
+
+def lookup_page(confluence, space_key, title, existing_pages):
+    """Page from the initial lookup, else a title search (titles are unique per space)"""
+    if title in existing_pages:
+        return existing_pages[title]
+    return _first_page(confluence.get_page_by_title(space_key, title, expand=PAGE_EXPAND))
+
+def upsert_page(confluence, space_key, title, body, parent_id, existing):
+    """
+    Create the page or update it when its storage body hash changed.
+    Returns (page id, published state, whether the body was sent).
+    """
+    state = _published_state(existing)
+    body_hash = content_hash(body)
+    if existing and state["body"] == body_hash:
+        return existing["id"], state, False
+
+    if existing:
+        confluence.update_page(existing["id"], title, body, parent_id=parent_id, type="page",
+                               representation="storage", always_update=True)
+        page_id = existing["id"]
+    else:
+        page = confluence.create_page(space=space_key, title=title, body=body, parent_id=parent_id,
+                                      type="page", representation="storage")
+        page_id = page["id"]
+    state["body"] = body_hash
+    return page_id, state, True
+
+def save_published_state(confluence, page_id, state):
+    value = {"body": state["body"], "attachments": state["attachments"]}
+    if state["property_version"] is None:
+        confluence.set_page_property(page_id, {"key": HASH_PROPERTY_KEY, "value": value})
+    else:
+        confluence.update_page_property(page_id, {
+            "key": HASH_PROPERTY_KEY,
+            "value": value,
+            "version": {"number": state["property_version"] + 1, "minorEdit": True}
+        })
+
+def publish_to_confluence(confluence_url, space_key, docs_folder, username, api_token,
+                          concurrency=8, requests_per_second=10.0, markdown_backend="single-pass"):
     """
-    Publish documentation to Confluence
+    Publish documentation to Confluence.
+    The parent page is published first; child pages and then attachments are
+    published concurrently over one pooled, rate limited session. The subprojects
+    of a sharded run (shards/<name>/) become child pages with their docs below them.
+    `markdown_backend` picks the storage converter (see MARKDOWN_BACKENDS).
     """
+    from atlassian import Confluence  # ~0.3 s to import; only publishing needs it
     confluence = Confluence(
         url=confluence_url,
         username=username,
-        password=api_token
+        password=api_token,
+        session=create_pooled_session(concurrency, requests_per_second)
     )
 
-    parent_page_id = None
-
-    # Ensure index.md is processed first
-    md_files = sorted([f for f in os.listdir(docs_folder) if f.endswith(".md")])
-    if "index.md" in md_files:
-        md_files.remove("index.md")
-        md_files = ["index.md"] + md_files
+    # index.md is processed first; a sharded run's subproject docs follow the top-level ones
+    md_files = doc_files(docs_folder)
 
+    contents = {}
     for filename in md_files:
-        file_path = os.path.join(docs_folder, filename)
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
+        with open(os.path.join(docs_folder, filename), "r", encoding="utf-8") as f:
+            contents[filename] = f.read()
+
+    # Render every diagram of the run in one batch; the pages below then read from the cache
+    renderer = MermaidRenderer(os.path.join(os.path.dirname(os.path.abspath(docs_folder)), '.cache', 'mermaid'))
+    if renderer.available:
+        renderer.render_all(source for content in contents.values() for source in extract_mermaid_blocks(content))
+        print(f"🖼️ Diagrams: {renderer.rendered} rendered, {renderer.hits} cached, {len(renderer.failed)} failed")
 
-        file_prefix = os.path.splitext(filename)[0]
+    titles, parents = page_titles(md_files, contents)
+
+    # Convert every page locally before any request is made
+    pages = []
+    for filename in md_files:
+        folder, basename = posixpath.split(filename)
 
         # Convert mermaid -> PNG + replace with <ac:image>
-        content, generated_pngs = replace_mermaid_with_png(content, os.path.dirname(file_path), file_prefix)
+        content, generated_pngs = replace_mermaid_with_png(
+            contents[filename], os.path.join(docs_folder, folder), os.path.splitext(basename)[0], renderer)
 
         # Convert Markdown -> Confluence storage
-        page_body = md_to_confluence_storage(content)
+        pages.append({
+            "filename": filename,
+            "title": titles[filename],
+            "parent": parents[filename],
+            "body": link_doc_pages(md_to_confluence_storage(content, markdown_backend), filename, titles),
+            "pngs": generated_pngs,
+        })
 
-        if filename == "index.md":
-            parent_title = content.splitlines()[0].lstrip("# ").strip() or "Project Documentation"
-            page_title = parent_title
-            parent_page = confluence.create_page(
-                space=space_key,
-                title=page_title,
-                body=page_body,
-                type="page",
-                representation="storage"
-            )
-            parent_page_id = parent_page["id"]
-            target_page_id = parent_page_id
-            print(f"📤 Published parent page: {page_title} (ID: {parent_page_id})")
+    parent_page_id = None
+    existing_pages = {}
+    if pages and pages[0]["filename"] == "index.md":
+        parent = pages.pop(0)
+        # Existing pages are looked up once, together with their stored content hashes
+        existing_pages = find_existing_pages(confluence, space_key, parent["title"])
+        parent_page_id, parent["state"], parent["changed"] = upsert_page(
+            confluence, space_key, parent["title"], parent["body"], None, existing_pages.get(parent["title"])
+        )
+        parent["id"] = parent_page_id
+        if parent["changed"]:
+            print(f"📤 Published parent page: {parent['title']} (ID: {parent_page_id})")
         else:
-            child_suffix = filename.replace(".md", "").capitalize()
-            if parent_title:
-                page_title = f"{parent_title} - {child_suffix}"
-            else:
-                page_title = child_suffix
-            if parent_page_id:
-                child_page = confluence.create_page(
-                    space=space_key,
-                    title=page_title,
-                    body=page_body,
-                    parent_id=parent_page_id,
-                    type="page",
-                    representation="storage"
-                )
-                target_page_id = child_page["id"]
-                print(f"📤 Published child page: {page_title} (ID: {target_page_id})")
-            else:
-                print(f"⚠️ Skipped {page_title}, parent page not created yet!")
-                continue
+            print(f"⏭️ Unchanged parent page: {parent['title']} (ID: {parent_page_id})")
+
+    if not parent_page_id:
+        for page in pages:
+            print(f"⚠️ Skipped {page['title']}, parent page not created yet!")
+        return
+
+    by_filename = {page["filename"]: page for page in pages}
+    by_filename[parent["filename"]] = parent
+
+    def publish_child(page):
+        page["id"], page["state"], page["changed"] = upsert_page(
+            confluence, space_key, page["title"], page["body"], by_filename[page["parent"]]["id"],
+            lookup_page(confluence, space_key, page["title"], existing_pages)
+        )
+        if page["changed"]:
+            print(f"📤 Published child page: {page['title']} (ID: {page['id']})")
+        else:
+            print(f"⏭️ Unchanged child page: {page['title']} (ID: {page['id']})")
+
+    def attach(upload):
+        page, png, name, png_hash = upload
+        confluence.attach_file(png, page_id=page["id"])
+        page["state"]["attachments"][name] = png_hash
+        print(f"🖼️ Attached diagram: {name}")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        # Subproject pages are created under the index first, then their own docs under them
+        list(pool.map(publish_child, [page for page in pages if page["parent"] == parent["filename"]]))
+        list(pool.map(publish_child, [page for page in pages if page["parent"] != parent["filename"]]))
+        pages.insert(0, parent)
+
+        # Attach only the PNGs whose content changed since the last publish
+        uploads = []
+        for page in pages:
+            for png in page["pngs"]:
+                name = os.path.basename(png)
+                with open(png, "rb") as f:
+                    png_hash = content_hash(f.read())
+                if page["state"]["attachments"].get(name) != png_hash:
+                    uploads.append((page, png, name, png_hash))
+                    page["changed"] = True
+        list(pool.map(attach, uploads))
 
-        # Attach all PNGs
-        for png in generated_pngs:
-            confluence.attach_file(png, page_id=target_page_id)
-            print(f"🖼️ Attached diagram: {os.path.basename(png)}")
\ No newline at end of file
+        list(pool.map(lambda page: save_published_state(confluence, page["id"], page["state"]),
+                      [page for page in pages if page["changed"]]))
@@ -1,24 +1,86 @@
+import glob
 import os
-from typing import Dict, List
+import shutil
+from typing import Callable, Dict, List, Optional
+
+from core.output_budget import parse_sections
+from docs.doc_patcher import DocPatcher, insert_diagrams, normalize_heading
+from docs.mermaid_validator import find_invalid_diagrams, validate_mermaid
+
+DOC_TYPES = ['index', 'architecture', 'database', 'classes', 'web']
+ROLLUP_DOC_TYPES = ['index', 'architecture']
+# Sections of each subproject's docs that feed the top-level rollup, and how much of each
+ROLLUP_SECTIONS = {
+    'index': ('overview', 'technology stack', 'key features'),
+    'architecture': ('architecture overview', 'component architecture', 'technology integration', 'data flow'),
+}
+ROLLUP_SECTION_CHARS = 3000
+# Folder under the docs where a sharded run writes each subproject's docs, published and built with the rollup
+SHARDS_DIR = 'shards'
+
+# Focused repair calls per broken diagram before it is left as generated
+MAX_DIAGRAM_REPAIR_ATTEMPTS = 2
+
+
+def doc_files(docs_dir: str) -> List[str]:
+    """Docs under `docs_dir` as '/'-separated relative paths: index.md first, the other top-level docs,
+    then the docs of each subproject of a sharded run (shards/<name>/), each led by its own index.md"""
+    def ordered(folder: str, prefix: str = '') -> List[str]:
+        names = sorted(name for name in os.listdir(folder) if name.endswith('.md'))
+        return [prefix + name for name in sorted(names, key=lambda name: name != 'index.md')]
+    
+    files = ordered(docs_dir)
+    shards_dir = os.path.join(docs_dir, SHARDS_DIR)
+    if os.path.isdir(shards_dir):
+        for name in sorted(os.listdir(shards_dir)):
+            if os.path.isdir(os.path.join(shards_dir, name)):
+                files += ordered(os.path.join(shards_dir, name), f'{SHARDS_DIR}/{name}/')
+    return files
 
 class DocumentationGenerator:
-    def __init__(self, output_dir: str):
+    def __init__(self, output_dir: str, docs_dir: Optional[str] = None):
         self.output_dir = output_dir
-        self.docs_dir = os.path.join(output_dir, 'docs')
+        self.docs_dir = docs_dir or os.path.join(output_dir, 'docs')
         os.makedirs(self.docs_dir, exist_ok=True)
     
-    def generate_all_docs(self, llm_client, codebase_content: str) -> Dict[str, str]:
+    def shard_generator(self, name: str) -> 'DocumentationGenerator':
+        """Generator writing one subproject's docs to <docs>/shards/<name>, where the rollup links to them"""
+        return DocumentationGenerator(self.output_dir, os.path.join(self.docs_dir, SHARDS_DIR, name))
+    
+    def remove_shard_docs(self) -> None:
+        """Drop the subproject docs of an earlier sharded run, so they are not published as current"""
+        shutil.rmtree(os.path.join(self.docs_dir, SHARDS_DIR), ignore_errors=True)
+    
+    def remove_docs(self, doc_types: List[str]) -> None:
+        """Drop earlier docs of these types and their rendered diagrams"""
+        for doc_type in doc_types:
+            stale = [os.path.join(self.docs_dir, f'{doc_type}.md')]
+            stale += glob.glob(os.path.join(self.docs_dir, 'diagrams', f'{glob.escape(doc_type)}_diagram_*.png'))
+            for path in stale:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+    
+    def generate_all_docs(self, llm_client, codebase_content: str,
+                          grounding: Optional[Dict[str, Dict]] = None) -> Dict[str, str]:
         """Generate all 5 documentation files"""
         
-        doc_types = ['index', 'architecture', 'database', 'classes', 'web']
+        doc_types = DOC_TYPES
         generated_files = {}
+        grounding = grounding or {}
+        self.remove_shard_docs()
         
         print("Generating documentation files...")
         
         for doc_type in doc_types:
             print(f"  Generating {doc_type}.md...")
             
-            content = llm_client.generate_documentation(codebase_content, doc_type)
+            doc_grounding = grounding.get(doc_type)
+            content = llm_client.generate_documentation(codebase_content, doc_type, doc_grounding)
+            if doc_grounding:
+                content = insert_diagrams(content, doc_grounding['diagrams'])
+            content = self._repair_diagrams(llm_client, content)
             
             file_path = os.path.join(self.docs_dir, f'{doc_type}.md')
             with open(file_path, 'w', encoding='utf-8') as f:
@@ -27,103 +89,80 @@ class DocumentationGenerator:
             generated_files[doc_type] = file_path
             print(f"    ✓ {doc_type}.md created")
         
-        # # Generate combined HTML
-        # html_path = self._generate_combined_html(generated_files)
-        # generated_files['html'] = html_path
-        
         return generated_files
     
-    def _generate_combined_html(self, doc_files: Dict[str, str]) -> str:
-        """Generate combined HTML documentation"""
-        
-        html_content = """<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Complete Documentation</title>
-    <style>
-        body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; margin: 0; padding: 0; background: #f8f9fa; }
-        .container { max-width: 1400px; margin: 0 auto; display: flex; min-height: 100vh; }
-        .sidebar { width: 280px; background: #2c3e50; color: white; padding: 20px; position: fixed; height: 100vh; overflow-y: auto; }
-        .main-content { flex: 1; margin-left: 280px; padding: 40px; background: white; }
-        .nav-item { display: block; padding: 10px 15px; margin: 5px 0; background: rgba(255,255,255,0.1); border-radius: 5px; text-decoration: none; color: white; cursor: pointer; }
-        .nav-item:hover, .nav-item.active { background: #3498db; }
-        .section { display: none; }
-        .section.active { display: block; }
-        pre { background: #f8f9fa; padding: 15px; border-radius: 5px; overflow-x: auto; }
-        code { background: #f8f9fa; padding: 2px 6px; border-radius: 3px; }
-    </style>
-    <script src="https://unpkg.com/mermaid/dist/mermaid.min.js"></script>
-</head>
-<body>
-    <div class="container">
-        <div class="sidebar">
-            <h2>Documentation</h2>
-            <nav>
-                <a href="#" class="nav-item active" onclick="showSection('index')">📋 Overview</a>
-                <a href="#" class="nav-item" onclick="showSection('architecture')">📐 Architecture</a>
-                <a href="#" class="nav-item" onclick="showSection('database')">🗄️ Database</a>
-                <a href="#" class="nav-item" onclick="showSection('classes')">🏗️ Classes</a>
-                <a href="#" class="nav-item" onclick="showSection('web')">🌐 Web</a>
-            </nav>
-        </div>
-        
-        <div class="main-content">
-"""
-        
-        # Add content sections
-        for doc_type, file_path in doc_files.items():
-            if doc_type == 'html':
-                continue
-                
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                active_class = 'active' if doc_type == 'index' else ''
-                html_content += f"""
-            <section id="{doc_type}" class="section {active_class}">
-                <div id="{doc_type}-content">
-                    <pre>{content}</pre>
-                </div>
-            </section>
-"""
-            except:
-                html_content += f"""
-            <section id="{doc_type}" class="section">
-                <div id="{doc_type}-content">
-                    <p>Error loading {doc_type} content.</p>
-                </div>
-            </section>
-"""
-        
-        html_content += """
-        </div>
-    </div>
+    def patch_docs(self, llm_client, changes: List[Dict],
+                   load_diagrams: Optional[Callable[[], Dict[str, List[str]]]] = None) -> Dict[str, List[str]]:
+        """Rewrite only the sections of existing docs that `changes` (from a git diff) affect;
+        `load_diagrams` rebuilds the grounded ER and class diagrams (see DocPatcher.patch)"""
+        patcher = DocPatcher(self.docs_dir)
+        patched = patcher.patch(llm_client, changes, DOC_TYPES,
+                                postprocess=lambda text: self._repair_diagrams(llm_client, text),
+                                load_diagrams=load_diagrams)
+        for doc_type, headings in patched.items():
+            print(f"    ✓ {doc_type}.md: updated {', '.join(headings)}")
+        return patched
     
-    <script>
-        function showSection(sectionId) {
-            document.querySelectorAll('.section').forEach(s => s.classList.remove('active'));
-            document.querySelectorAll('.nav-item').forEach(n => n.classList.remove('active'));
-            
-            document.getElementById(sectionId).classList.add('active');
-            event.target.classList.add('active');
-            
-            if (typeof mermaid !== 'undefined') {
-                mermaid.init();
-            }
-        }
-        
-        if (typeof mermaid !== 'undefined') {
-            mermaid.initialize({ startOnLoad: true, theme: 'default' });
-        }
-    </script>
-</body>
-</html>"""
-        
-        html_path = os.path.join(self.output_dir, 'complete_documentation.html')
-        with open(html_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        return html_path
\ No newline at end of file
+    def generate_rollup(self, llm_client, shards: List[Dict], shard_docs: Dict[str, Dict[str, str]],
+                        dependencies: Dict[str, Dict[str, int]]) -> Dict[str, str]:
+        """Top-level index and architecture docs written from the subprojects' own docs, not from code"""
+        digest = self._shard_digest(shards, shard_docs, dependencies)
+        # The other doc types now live per subproject; top-level copies from an earlier run would be stale
+        self.remove_docs([doc_type for doc_type in DOC_TYPES if doc_type not in ROLLUP_DOC_TYPES])
+        generated_files = {}
+        for doc_type in ROLLUP_DOC_TYPES:
+            print(f"  Generating rollup {doc_type}.md...")
+            content = self._repair_diagrams(llm_client, llm_client.generate_rollup(doc_type, digest))
+            file_path = os.path.join(self.docs_dir, f'{doc_type}.md')
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            generated_files[doc_type] = file_path
+            print(f"    ✓ {doc_type}.md created")
+        return generated_files
+    
+    def _shard_digest(self, shards: List[Dict], shard_docs: Dict[str, Dict[str, str]],
+                      dependencies: Dict[str, Dict[str, int]]) -> str:
+        parts = []
+        for shard in shards:
+            stats = shard['stats']
+            docs = shard_docs.get(shard['name'], {})
+            index_link = os.path.relpath(docs['index'], self.docs_dir).replace(os.sep, '/') if 'index' in docs else ''
+            lines = [f"### SUBPROJECT: {shard['name']}",
+                     f"Path: {shard['root'] or '(repository root)'}",
+                     f"Docs: {index_link}",
+                     f"Files: {stats['total_files']}, lines: {stats['total_lines']}, "
+                     f"languages: {', '.join(stats['languages'])}"]
+            uses = dependencies.get(shard['name'], {})
+            if uses:
+                lines.append("Imports from: " + ', '.join(f"{name} ({count} refs)" for name, count in
+                                                          sorted(uses.items(), key=lambda item: -item[1])))
+            for doc_type, wanted in ROLLUP_SECTIONS.items():
+                if doc_type not in docs or not os.path.exists(docs[doc_type]):
+                    continue
+                with open(docs[doc_type], 'r', encoding='utf-8') as f:
+                    sections = parse_sections(f.read())
+                for section in sections:
+                    if section['heading'] and normalize_heading(section['heading']).startswith(wanted):
+                        text = section['text'].strip()
+                        if len(text) > ROLLUP_SECTION_CHARS:
+                            text = text[:ROLLUP_SECTION_CHARS] + "\n... [truncated]"
+                        lines.append(f"[{doc_type}.md] {text}")
+            parts.append('\n'.join(lines))
+        return '\n\n'.join(parts)
+    
+    def _repair_diagrams(self, llm_client, content: str) -> str:
+        """Validate Mermaid blocks locally and send only the broken ones back for repair"""
+        for diagram, errors in find_invalid_diagrams(content):
+            print(f"    ⚠️ Invalid Mermaid diagram ({errors[0]}), requesting repair...")
+            repaired = diagram
+            for _ in range(MAX_DIAGRAM_REPAIR_ATTEMPTS):
+                repaired = llm_client.repair_mermaid(repaired, errors)
+                errors = validate_mermaid(repaired)
+                if not errors:
+                    break
+            if errors:
+                print(f"    ⚠️ Diagram still invalid after repair: {errors[0]}")
+                continue
+            content = content.replace(f"```mermaid\n{diagram}```", f"```mermaid\n{repaired.strip()}\n```", 1)
+            print("    ✓ Diagram repaired")
+        return content
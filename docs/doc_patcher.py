@@ -0,0 +1,289 @@
+import os
+import posixpath
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set
+
+from core.local_analysis import DIAGRAM_PLACEHOLDER
+from core.output_budget import HEADING_RE, parse_sections
+from docs.mermaid_renderer import MERMAID_BLOCK_RE
+
+# Change signals each section of the generated docs depends on, keyed by normalised heading prefix
+SECTION_TRIGGERS = {
+    'index': {
+        'project statistics': {'structure'},
+        'technology stack': {'build'},
+        'getting started': {'build', 'config'},
+        'key features': {'routes'},
+        'project structure': {'structure'},
+    },
+    'architecture': {
+        'component architecture': {'types'},
+        'system flow': {'routes'},
+        'technology integration': {'build'},
+        'data flow': {'data_access', 'routes'},
+        'security architecture': {'auth'},
+        'directory structure': {'structure'},
+    },
+    'database': {
+        'database overview': {'schema'},
+        'data models': {'schema'},
+        'entity relationships': {'schema'},
+        'api integration': {'data_access', 'routes'},
+        'data access patterns': {'data_access'},
+        'database operations': {'data_access'},
+        'configuration': {'config'},
+    },
+    'classes': {
+        'component overview': {'types'},
+        'class hierarchy': {'inheritance'},
+        'key components': {'types'},
+        'inheritance and composition': {'inheritance'},
+        'interfaces and contracts': {'interfaces'},
+        'component relationships': {'types'},
+        'module dependencies': {'imports', 'build'},
+    },
+    'web': {
+        'api endpoints': {'routes'},
+        'web pages and routes': {'routes', 'pages'},
+        'user interface flow': {'ui'},
+        'component architecture': {'ui'},
+        'authentication flow': {'auth'},
+        'api integration': {'routes', 'data_access'},
+        'state management': {'ui'},
+        'user experience flow': {'ui'},
+    },
+}
+
+# Sections whose Mermaid diagrams the local analysis builds (ER and class diagrams); their prose is
+# rewritten around a placeholder and the diagrams are rebuilt locally instead of by the model
+DIAGRAM_SECTIONS = {
+    'database': 'entity relationships',
+    'classes': 'class hierarchy',
+}
+
+BUILD_FILES = {'pom.xml', 'build.gradle', 'build.gradle.kts', 'settings.gradle', 'package.json', 'requirements.txt',
+               'pyproject.toml', 'setup.py', 'setup.cfg', 'pipfile', 'dockerfile', 'docker-compose.yml',
+               'docker-compose.yaml', 'tsconfig.json', 'webpack.config.js', 'vite.config.ts', 'vite.config.js'}
+CONFIG_EXTENSIONS = ('.properties', '.yaml', '.yml', '.xml', '.ini', '.toml', '.conf')
+UI_EXTENSIONS = ('.jsp', '.jspx', '.html', '.htm', '.css', '.scss', '.sass', '.jsx', '.tsx', '.vue')
+CODE_EXTENSIONS = ('.py', '.java', '.js', '.jsx', '.ts', '.tsx')
+
+# Patterns over the changed lines of a diff
+_SIGNAL_PATTERNS = {
+    'schema': re.compile(r'@Entity|@Table|@Column|@Id\b|@(?:One|Many)To(?:One|Many)|\bCREATE\s+TABLE|\bALTER\s+TABLE'
+                         r'|models\.\w+Field|\bColumn\(|\bmongoose\.Schema|\bdb\.Model', re.IGNORECASE),
+    'data_access': re.compile(r'executeQuery|executeUpdate|prepareStatement|createStatement|\bJdbcTemplate|Repository\b'
+                              r'|session\.(?:query|add|commit)|cursor\.execute|\.objects\.|\bSELECT\b|\bINSERT\s+INTO'
+                              r'|\bUPDATE\s+\w+\s+SET|\bDELETE\s+FROM|DriverManager'),
+    'routes': re.compile(r'@(?:Get|Post|Put|Delete|Patch|Request)Mapping|@Path\b|@WebServlet|@(?:GET|POST|PUT|DELETE)\b'
+                         r'|\bdo(?:Get|Post|Put|Delete)\s*\(|<servlet-mapping>|<url-pattern>|@\w+\.(?:route|get|post|put'
+                         r'|delete|patch)\(|\b(?:app|router)\.(?:get|post|put|delete|patch|use|route)\s*\(|urlpatterns'
+                         r'|\bpath\(\s*[\'"]'),
+    'auth': re.compile(r'auth|login|logout|password|credential|session|token|jwt|oauth|permission|@Secured'
+                       r'|@PreAuthorize', re.IGNORECASE),
+    'types': re.compile(r'\b(?:class|interface|enum|record)\s+\w|^\s*(?:async\s+)?def\s|\bfunction\s+\w', re.MULTILINE),
+    'inheritance': re.compile(r'\b(?:extends|implements)\b|^\s*class\s+\w+\s*\(\s*\w', re.MULTILINE),
+    'interfaces': re.compile(r'\b(?:interface|abstract|Protocol|ABC)\b'),
+    'imports': re.compile(r'^\s*(?:import|from\s+\S+\s+import)\b|\brequire\s*\(', re.MULTILINE),
+    'ui': re.compile(r'JFrame|JPanel|JButton|ActionListener|<form|<input|<button|onClick|onSubmit|useState|render\s*\('),
+}
+_CODE_SIGNALS = ('types', 'inheritance', 'interfaces', 'imports')
+# Bounds on what one section rewrite may see of the change
+MAX_PATCH_CHARS = 6000
+MAX_CHANGE_CHARS = 40000
+
+
+def render_sections(sections: List[Dict]) -> str:
+    return ''.join(section['text'] for section in sections)
+
+
+def normalize_heading(heading: str) -> str:
+    """'📐 2. API Endpoints (Database Layer)' -> 'api endpoints (database layer)'"""
+    text = re.sub(r'[^\w\s()&/-]', '', heading).strip().lower()
+    return re.sub(r'^\d+(\.\d+)*\s*', '', text)
+
+
+def change_signals(change: Dict) -> Set[str]:
+    """What kinds of documentation a changed file can affect"""
+    path = change['path'].replace('\\', '/')
+    name = posixpath.basename(path).lower()
+    signals = set()
+    if change['status'] in ('A', 'D', 'R', 'C'):
+        signals.add('structure')
+    if name in BUILD_FILES:
+        signals.add('build')
+    elif name.endswith(CONFIG_EXTENSIONS) or name.startswith('application.'):
+        signals.add('config')
+    if name.endswith('.sql'):
+        signals.update(('schema', 'data_access'))
+    if name.endswith(UI_EXTENSIONS):
+        signals.add('ui')
+        if change['status'] in ('A', 'D', 'R'):
+            signals.add('pages')
+    if name == 'web.xml':
+        signals.add('routes')
+    if _SIGNAL_PATTERNS['auth'].search(path):
+        signals.add('auth')
+
+    changed_lines = '\n'.join(line[1:] for line in change['patch'].splitlines()
+                              if line[:1] in '+-' and not line.startswith(('+++', '---')))
+    if not changed_lines and change['status'] in ('A', 'D', 'R'):
+        changed_lines = path  # Binary or pure rename: only the path is known
+    for signal, pattern in _SIGNAL_PATTERNS.items():
+        if signal in _CODE_SIGNALS and not name.endswith(CODE_EXTENSIONS):
+            continue
+        if pattern.search(changed_lines):
+            signals.add(signal)
+    return signals
+
+
+def affected_sections(doc_type: str, sections: List[Dict], changes: List[Dict]) -> Dict[str, List[Dict]]:
+    """{heading: changes that bear on it} for the sections of one doc a set of changes touches"""
+    triggers = SECTION_TRIGGERS.get(doc_type, {})
+    affected = {}
+    for section in sections:
+        if section['heading'] is None:
+            continue
+        normalized = normalize_heading(section['heading'])
+        wanted = next((signals for prefix, signals in triggers.items() if normalized.startswith(prefix)), None)
+        if not wanted:
+            continue
+        relevant = [change for change in changes if change['signals'] & wanted]
+        if relevant:
+            affected[section['heading']] = relevant
+    return affected
+
+
+def insert_diagrams(content: str, diagrams: List[str]) -> str:
+    """Splice locally rendered Mermaid diagrams in at the placeholder (or append them)"""
+    blocks = '\n\n'.join(f"```mermaid\n{diagram}\n```" for diagram in diagrams)
+    if DIAGRAM_PLACEHOLDER in content:
+        head, _, tail = content.partition(DIAGRAM_PLACEHOLDER)
+        return head + blocks + tail.replace(DIAGRAM_PLACEHOLDER, '')
+    return f"{content.rstrip()}\n\n{blocks}\n" if blocks else content
+
+
+def is_diagram_section(doc_type: str, heading: Optional[str]) -> bool:
+    return heading is not None and doc_type in DIAGRAM_SECTIONS \
+        and normalize_heading(heading).startswith(DIAGRAM_SECTIONS[doc_type])
+
+
+def _hold_diagrams(text: str) -> str:
+    """Section text with its Mermaid blocks replaced by one placeholder line"""
+    held = MERMAID_BLOCK_RE.sub(DIAGRAM_PLACEHOLDER, text, count=1)
+    return MERMAID_BLOCK_RE.sub('', held)
+
+
+def format_changes(changes: List[Dict]) -> str:
+    """Compact description of a set of changes for one section rewrite"""
+    parts, total = [], 0
+    for change in changes:
+        label = {'A': 'added', 'D': 'deleted', 'R': 'renamed', 'C': 'copied'}.get(change['status'], 'modified')
+        title = f"{change['old_path']} -> {change['path']}" if change['path'] != change['old_path'] else change['path']
+        patch = change['patch']
+        if len(patch) > MAX_PATCH_CHARS:
+            patch = f"{patch[:MAX_PATCH_CHARS]}\n... [{len(patch) - MAX_PATCH_CHARS} chars of diff omitted]"
+        part = f"FILE ({label}): {title}\n{patch}".rstrip() + '\n'
+        if total + len(part) > MAX_CHANGE_CHARS:
+            parts.append(f"... and {len(changes) - len(parts)} more changed files: "
+                         f"{', '.join(c['path'] for c in changes[len(parts):])}\n")
+            break
+        parts.append(part)
+        total += len(part)
+    return '\n'.join(parts)
+
+
+class DocPatcher:
+    """Updates existing docs in place: only the sections a diff affects are rewritten by the LLM"""
+
+    def __init__(self, docs_dir: str, workers: int = 4):
+        self.docs_dir = docs_dir
+        self.workers = workers
+
+    def plan(self, changes: List[Dict], doc_types: List[str]) -> Dict[str, Dict]:
+        """{doc_type: {'sections': parsed sections, 'affected': {heading: changes}}} for docs that exist"""
+        for change in changes:
+            change.setdefault('signals', change_signals(change))
+        plans = {}
+        for doc_type in doc_types:
+            path = os.path.join(self.docs_dir, f'{doc_type}.md')
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                sections = parse_sections(f.read())
+            affected = affected_sections(doc_type, sections, changes)
+            if affected:
+                plans[doc_type] = {'sections': sections, 'affected': affected}
+        return plans
+
+    def patch(self, llm_client, changes: List[Dict], doc_types: List[str], postprocess=None,
+              load_diagrams: Optional[Callable[[], Dict[str, List[str]]]] = None) -> Dict[str, List[str]]:
+        """Rewrite affected sections concurrently, splice them back, and return {doc_type: [headings]}.
+
+        The model only rewrites the prose of DIAGRAM_SECTIONS; their diagrams come from
+        `load_diagrams` ({doc_type: mermaid sources} from the local analysis, called once if such
+        a section is affected), and the section's current diagrams are kept when it has none.
+        """
+        plans = self.plan(changes, doc_types)
+        jobs = [(doc_type, section) for doc_type, plan in plans.items()
+                for section in plan['sections'] if section['heading'] in plan['affected']]
+        if not jobs:
+            return {}
+        diagrams = {}
+        if load_diagrams and any(is_diagram_section(doc_type, section['heading']) for doc_type, section in jobs):
+            diagrams = load_diagrams()
+
+        def rewrite(job):
+            doc_type, section = job
+            relevant = plans[doc_type]['affected'][section['heading']]
+            if not is_diagram_section(doc_type, section['heading']):
+                updated = llm_client.rewrite_section(doc_type, section['text'], format_changes(relevant))
+                if postprocess:
+                    updated = postprocess(updated)
+                return _splice_ready(section, updated)
+
+            updated = llm_client.rewrite_section(doc_type, _hold_diagrams(section['text']), format_changes(relevant))
+            # Any diagram the model drew anyway is dropped for the locally built ones
+            text = _splice_ready(section, _hold_diagrams(updated) if updated else updated)
+            if text is None:
+                return None
+            built = diagrams.get(doc_type) or [block.strip() for block in MERMAID_BLOCK_RE.findall(section['text'])]
+            body = text.rstrip('\n')
+            return insert_diagrams(body, built).rstrip('\n') + text[len(body):]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(rewrite, jobs))
+
+        patched: Dict[str, List[str]] = {}
+        for (doc_type, section), text in zip(jobs, results):
+            if text is None:
+                print(f"    ⚠️ Kept {doc_type}.md '{section['heading']}' unchanged (rewrite failed)")
+                continue
+            section['text'] = text
+            patched.setdefault(doc_type, []).append(section['heading'])
+
+        for doc_type, headings in patched.items():
+            with open(os.path.join(self.docs_dir, f'{doc_type}.md'), 'w', encoding='utf-8') as f:
+                f.write(render_sections(plans[doc_type]['sections']))
+        return patched
+
+
+def _splice_ready(section: Dict, updated: Optional[str]) -> Optional[str]:
+    """Normalise a rewritten section so it drops back into place, or None if unusable"""
+    if not updated or updated.startswith(("Error generating response", "No response text returned")):
+        return None
+    text = updated.strip()
+    fenced = re.match(r'^```(?:markdown|md)?\n(.*)\n```$', text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1).strip()
+    heading_line = section['text'].split('\n', 1)[0]
+    first_line = text.split('\n', 1)[0]
+    match = HEADING_RE.match(first_line)
+    if not (match and len(match.group(1)) == 2):
+        text = f"{heading_line}\n\n{text}"
+    elif first_line.strip() != heading_line.strip():
+        text = heading_line + text[len(first_line):]  # Keep the original heading so anchors stay stable
+    # Preserve the blank line(s) that separated this section from the next one
+    trailing = section['text'][len(section['text'].rstrip('\n')):]
+    return text + (trailing or '\n')
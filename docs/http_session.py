@@ -0,0 +1,69 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class RateLimiter:
+    """Token bucket shared by all threads: at most `rate` requests per second, bursts up to `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """Connection-pooling adapter that takes a rate limiter token before every request"""
+
+    def __init__(self, limiter: RateLimiter, **kwargs):
+        self.limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire()
+        return super().send(request, **kwargs)
+
+
+def create_pooled_session(concurrency: int = 8, requests_per_second: float = 10.0,
+                          max_retries: int = 5) -> requests.Session:
+    """
+    Session whose connection pool matches the worker count, rate limited and
+    retrying 429/502/503/504 responses with backoff (honouring Retry-After).
+    """
+    retry = Retry(
+        total=max_retries,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=None,  # Confluence rate limits apply to POST/PUT uploads too
+        backoff_factor=0.5,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = RateLimitedAdapter(
+        RateLimiter(requests_per_second, burst=concurrency),
+        pool_connections=concurrency,
+        pool_maxsize=concurrency,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
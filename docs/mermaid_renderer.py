@@ -0,0 +1,144 @@
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+MERMAID_BLOCK_RE = re.compile(r"```mermaid\n(.*?)```", re.DOTALL)
+
+_resolved_mmdc = {}
+
+
+def resolve_mmdc() -> Optional[Dict[str, str]]:
+    """Locate the Mermaid CLI once per process: {'path', 'version'} or None"""
+    if 'mmdc' in _resolved_mmdc:
+        return _resolved_mmdc['mmdc']
+
+    # Check common installation paths
+    possible_paths = [
+        os.environ.get('MMDC_PATH', ''),
+        os.path.join(os.environ.get('APPDATA', ''), 'npm', 'mmdc.cmd'),
+        os.path.join(os.environ.get('PROGRAMFILES', ''), 'nodejs', 'node_modules', '@mermaid-js', 'mermaid-cli', 'bin', 'mmdc.js'),
+        shutil.which('mmdc') or 'mmdc',  # Check in PATH
+    ]
+
+    found = None
+    for path in possible_paths:
+        if not path:
+            continue
+        try:
+            result = subprocess.run([path, "--version"], capture_output=True, text=True, check=True)
+            found = {'path': path, 'version': result.stdout.strip()}
+            break
+        except (OSError, subprocess.CalledProcessError):
+            continue
+
+    _resolved_mmdc['mmdc'] = found
+    return found
+
+
+def extract_mermaid_blocks(content: str) -> List[str]:
+    return MERMAID_BLOCK_RE.findall(content)
+
+
+class MermaidRenderer:
+    """Renders Mermaid sources to PNG (or SVG) through one batched mmdc run, caching by source hash.
+
+    The CLI is resolved once. Diagrams missing from the cache are rendered together from a single
+    markdown document, so one headless browser serves the whole batch. If the batch fails (one bad
+    diagram aborts it), the remaining diagrams are rendered one per process on a bounded pool.
+    """
+
+    def __init__(self, cache_dir: str, workers: Optional[int] = None, image_format: str = 'png'):
+        self.cache_dir = cache_dir
+        self.image_format = image_format
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.mmdc = resolve_mmdc()
+        self.hits = 0
+        self.rendered = 0
+        self.failed: Dict[str, str] = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def available(self) -> bool:
+        return self.mmdc is not None
+
+    def cache_path(self, source: str) -> str:
+        key = hashlib.sha256(f"{self.mmdc['version'] if self.mmdc else ''}\n{source.strip()}".encode('utf-8'))
+        return os.path.join(self.cache_dir, f"{key.hexdigest()}.{self.image_format}")
+
+    def render_all(self, sources: Iterable[str]) -> Dict[str, str]:
+        """Render every source; returns {source: cached image path} for the ones that succeeded"""
+        if not self.available:
+            return {}
+
+        results = {}
+        pending = []
+        for source in dict.fromkeys(sources):
+            image = self.cache_path(source)
+            if os.path.exists(image):
+                self.hits += 1
+                results[source] = image
+            elif source not in self.failed:
+                pending.append(source)
+
+        if pending:
+            work_dir = tempfile.mkdtemp(prefix='render-', dir=self.cache_dir)
+            try:
+                remaining = self._render_batch(pending, work_dir)
+                if remaining:
+                    with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                        list(pool.map(lambda item: self._render_one(item[1], os.path.join(work_dir, f"single_{item[0]}")),
+                                      enumerate(remaining)))
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+            for source in pending:
+                image = self.cache_path(source)
+                if os.path.exists(image):
+                    self.rendered += 1
+                    results[source] = image
+        return results
+
+    def _render_batch(self, sources: List[str], work_dir: str) -> List[str]:
+        """Render all sources from one markdown file; returns the sources that still lack an image"""
+        if len(sources) == 1:
+            return sources
+
+        batch_md = os.path.join(work_dir, 'batch.md')
+        with open(batch_md, 'w', encoding='utf-8') as f:
+            for source in sources:
+                f.write(f"```mermaid\n{source.strip()}\n```\n\n")
+
+        # mmdc writes the n-th diagram of a markdown input to <output>-<n>.<format>
+        output_md = os.path.join(work_dir, 'out.md')
+        try:
+            subprocess.run([self.mmdc['path'], "-i", batch_md, "-o", output_md, "-e", self.image_format],
+                           capture_output=True, text=True, check=True)
+        except (OSError, subprocess.CalledProcessError):
+            return sources
+
+        remaining = []
+        for i, source in enumerate(sources, start=1):
+            image = os.path.join(work_dir, f"out-{i}.{self.image_format}")
+            if os.path.exists(image):
+                os.replace(image, self.cache_path(source))
+            else:
+                remaining.append(source)
+        return remaining
+
+    def _render_one(self, source: str, stem: str) -> None:
+        mmd_file, image_file = f"{stem}.mmd", f"{stem}.{self.image_format}"
+        with open(mmd_file, "w", encoding="utf-8") as f:
+            f.write(source.strip())
+        try:
+            subprocess.run([self.mmdc['path'], "-i", mmd_file, "-o", image_file],
+                           capture_output=True, text=True, check=True)
+            os.replace(image_file, self.cache_path(source))
+        except subprocess.CalledProcessError as e:
+            self.failed[source] = e.stderr
+        except OSError as e:
+            self.failed[source] = str(e)
@@ -0,0 +1,255 @@
+import re
+from typing import List, Tuple
+
+from docs.mermaid_renderer import MERMAID_BLOCK_RE
+
+DIAGRAM_TYPES = (
+    'graph', 'flowchart', 'sequenceDiagram', 'classDiagram', 'classDiagram-v2', 'stateDiagram',
+    'stateDiagram-v2', 'erDiagram', 'journey', 'gantt', 'pie', 'gitGraph', 'mindmap', 'timeline',
+    'quadrantChart', 'requirementDiagram', 'C4Context', 'C4Container', 'C4Component', 'C4Dynamic',
+    'C4Deployment', 'sankey-beta', 'xychart-beta', 'block-beta', 'packet-beta', 'architecture-beta', 'kanban',
+)
+FLOWCHART_DIRECTIONS = ('TB', 'TD', 'BT', 'RL', 'LR')
+
+_QUOTED_RE = re.compile(r'"[^"]*"')
+_EDGE_LABEL_RE = re.compile(r'\|[^|]*\|')
+# Flowchart links: "-- text -->" forms first, then -->, ---, -.->, ==>, --o, --x, <-->, ~~~
+_FLOW_LINK_RE = re.compile(r'<?(?:--|==|-\.)\s*(?:"[^"]*"|[^\s\-=.>"|][^\n"|]*?)\s*(?:-{2,}>|-{3,}|={2,}>|={3,}|\.+->|\.+-)(?!-)'
+                           r'|<?(?:-{2,}|={2,}|-\.+-|~{3,})[->ox]?')
+_FLOW_NODE_OPEN = ('(((', '((', '([', '[[', '[(', '[/', '[\\', '{{', '[', '(', '{', '>')
+_FLOW_NODE_CLOSE = {'(((': ')))', '((': '))', '([': '])', '[[': ']]', '[(': ')]', '[/': ('/]', '\\]'),
+                    '[\\': ('\\]', '/]'), '{{': '}}', '[': ']', '(': ')', '{': '}', '>': ']'}
+_FLOW_STATEMENTS = ('classDef', 'class ', 'style ', 'linkStyle', 'click ', 'direction ', 'accTitle', 'accDescr')
+_IDENT_RE = re.compile(r'[\w$.]+(?:-(?![-.>])[\w$.]+)*')
+
+_SEQUENCE_ARROW_RE = re.compile(r'^([^:]+?)\s*(<<-->>|<<->>|-->>|->>|-->|->|--x|-x|--\)|-\))\s*[+-]?\s*([^:]+?)\s*:(.*)$')
+_SEQUENCE_BLOCKS = ('loop', 'alt', 'opt', 'par', 'critical', 'break', 'rect', 'box')
+_SEQUENCE_STATEMENTS = ('participant', 'actor', 'note', 'activate', 'deactivate', 'autonumber', 'title', 'create',
+                        'destroy', 'link', 'links', 'else', 'and', 'option', 'end')
+
+_CLASS_RELATION_RE = re.compile(r'(<\|--|--\|>|\*--|--\*|o--|--o|<--|-->|<\.\.|\.\.>|<\|\.\.|\.\.\|>|--|\.\.)')
+_ER_RELATION_RE = re.compile(r'^("?[\w\-]+"?)\s+(\|o|\|\||\}o|\}\|)(--|\.\.)(o\||\|\||o\{|\|\{)\s+("?[\w\-]+"?)\s*:\s*(.+)$')
+_ER_ATTRIBUTE_RE = re.compile(r'^[\w\-\[\](),]+\s+[\w\-]+(\s+(PK|FK|UK)(\s*,\s*(PK|FK|UK))*)?(\s+"[^"]*")?$')
+
+
+def _content_lines(source: str) -> List[Tuple[int, str]]:
+    """(line number, stripped text) without blank lines, %% comments and front matter"""
+    lines = []
+    in_front_matter = False
+    for number, raw in enumerate(source.splitlines(), start=1):
+        line = raw.strip()
+        if line == '---' and (in_front_matter or not lines):
+            in_front_matter = not in_front_matter
+            continue
+        if in_front_matter or not line or line.startswith('%%'):
+            continue
+        lines.append((number, line))
+    return lines
+
+
+def _check_quotes(lines: List[Tuple[int, str]]) -> List[str]:
+    return [f"line {number}: unbalanced double quote" for number, line in lines if line.count('"') % 2]
+
+
+def _flow_node_end(line: str, start: int) -> Tuple[int, str]:
+    """Index after the node shape opening at `start`, or -1 with an error message"""
+    opener = next(o for o in _FLOW_NODE_OPEN if line.startswith(o, start))
+    closers = _FLOW_NODE_CLOSE[opener]
+    closers = closers if isinstance(closers, tuple) else (closers,)
+    body_start = start + len(opener)
+    if line.startswith('"', body_start):
+        close_quote = line.find('"', body_start + 1)
+        if close_quote == -1:
+            return -1, "unterminated quoted label"
+        for closer in closers:
+            if line.startswith(closer, close_quote + 1):
+                return close_quote + 1 + len(closer), ''
+        return -1, f"expected '{closers[0]}' after quoted label"
+
+    ends = [(line.find(closer, body_start), closer) for closer in closers]
+    ends = [(index, closer) for index, closer in ends if index != -1]
+    if not ends:
+        return -1, f"node shape '{opener}' is not closed with '{closers[0]}'"
+    index, closer = min(ends)
+    label = line[body_start:index]
+    if any(char in label for char in '[](){}"') and opener not in ('[/', '[\\'):
+        return -1, f"label '{label}' contains brackets or quotes; wrap it in double quotes"
+    return index + len(closer), ''
+
+
+def _check_flowchart_line(line: str) -> str:
+    """Parse `node (link node)*` (with `&` groups); returns an error message or ''"""
+    position, expect_node, nodes = 0, True, 0
+    line = line.rstrip(';')
+    while position < len(line):
+        if line[position].isspace():
+            position += 1
+            continue
+        if expect_node:
+            match = _IDENT_RE.match(line, position)
+            if not match:
+                return f"expected a node id at '{line[position:position + 15]}'"
+            if match.group(0) == 'end':
+                return "'end' cannot be used as a node id (capitalise it or rename the node)"
+            position = match.end()
+            if line.startswith(':::', position):
+                class_match = _IDENT_RE.match(line, position + 3)
+                position = class_match.end() if class_match else position + 3
+            if position < len(line) and any(line.startswith(o, position) for o in _FLOW_NODE_OPEN):
+                position, error = _flow_node_end(line, position)
+                if error:
+                    return error
+            nodes += 1
+            expect_node = False
+            continue
+        if line[position] == '&':
+            position += 1
+            expect_node = True
+            continue
+        match = _FLOW_LINK_RE.match(line, position)
+        if not match:
+            if line.startswith('->', position):
+                return "'->' is not a flowchart link; use '-->'"
+            return f"unexpected '{line[position:position + 15]}'"
+        position = match.end()
+        label = _EDGE_LABEL_RE.match(line, position) or _EDGE_LABEL_RE.match(line, position + 1)
+        if label and not line[position:label.start()].strip():
+            position = label.end()
+        expect_node = True
+    if expect_node and nodes:
+        return "link without a target node"
+    return ''
+
+
+def _validate_flowchart(lines: List[Tuple[int, str]]) -> List[str]:
+    errors, depth = [], 0
+    for number, line in lines[1:]:
+        if line.startswith('subgraph'):
+            depth += 1
+            continue
+        if line == 'end':
+            depth -= 1
+            if depth < 0:
+                errors.append(f"line {number}: 'end' without a matching subgraph")
+                depth = 0
+            continue
+        if line.startswith(_FLOW_STATEMENTS):
+            continue
+        error = _check_flowchart_line(line)
+        if error:
+            errors.append(f"line {number}: {error}")
+    if depth > 0:
+        errors.append(f"{depth} subgraph(s) not closed with 'end'")
+    return errors
+
+
+def _validate_sequence(lines: List[Tuple[int, str]]) -> List[str]:
+    errors, depth = [], 0
+    for number, line in lines[1:]:
+        keyword = line.split(None, 1)[0].rstrip(':')
+        if keyword in _SEQUENCE_BLOCKS:
+            depth += 1
+        elif keyword == 'end':
+            depth -= 1
+            if depth < 0:
+                errors.append(f"line {number}: 'end' without a matching block")
+                depth = 0
+        elif keyword in ('else', 'and', 'option') and depth == 0:
+            errors.append(f"line {number}: '{keyword}' outside of a block")
+        elif keyword.lower() in _SEQUENCE_STATEMENTS:
+            continue
+        elif not _SEQUENCE_ARROW_RE.match(line):
+            errors.append(f"line {number}: expected 'A->>B: message'")
+    if depth > 0:
+        errors.append(f"{depth} block(s) not closed with 'end'")
+    return errors
+
+
+def _validate_braces(lines: List[Tuple[int, str]], check_line) -> List[str]:
+    """Shared checker for diagrams whose bodies live in `{ ... }` blocks"""
+    errors, depth = [], 0
+    for number, line in lines[1:]:
+        if line == '}':
+            depth -= 1
+            if depth < 0:
+                errors.append(f"line {number}: unmatched '}}'")
+                depth = 0
+            continue
+        error = check_line(line, depth > 0)
+        if error:
+            errors.append(f"line {number}: {error}")
+        if line.endswith('{'):
+            depth += 1
+    if depth > 0:
+        errors.append(f"{depth} block(s) not closed with '}}'")
+    return errors
+
+
+def _check_class_line(line: str, in_body: bool) -> str:
+    if in_body or line.startswith(('class ', 'note', 'direction', 'classDef', 'style', 'cssClass', 'link', 'callback',
+                                   'click', 'namespace', '<<', '}')):
+        return ''
+    if ':' in line and not _CLASS_RELATION_RE.search(line.split(':', 1)[0]):
+        return ''  # Member shorthand: `Class : +method()`
+    if not _CLASS_RELATION_RE.search(_QUOTED_RE.sub('', line)):
+        return f"unrecognised statement '{line[:30]}'"
+    return ''
+
+
+def _check_er_line(line: str, in_body: bool) -> str:
+    if in_body:
+        if not _ER_ATTRIBUTE_RE.match(line):
+            return f"attribute '{line[:30]}' must be 'type name [PK|FK|UK] [\"comment\"]'"
+        return ''
+    if line.endswith('{'):
+        return '' if re.match(r'^"?[\w\-]+"?(\s*\[[^\]]*\])?\s*\{$', line) else f"bad entity header '{line[:30]}'"
+    if line.startswith(('title', 'direction', 'style', 'classDef', 'class ')):
+        return ''
+    if re.match(r'^"?[\w\-]+"?$', line):
+        return ''
+    if not _ER_RELATION_RE.match(line):
+        return f"relationship must be 'A ||--o{{ B : label', got '{line[:40]}'"
+    return ''
+
+
+def validate_mermaid(source: str) -> List[str]:
+    """Fast local syntax check of one Mermaid diagram; returns error messages (empty when valid)"""
+    lines = _content_lines(source)
+    if not lines:
+        return ["empty diagram"]
+    header = lines[0][1]
+    if header.startswith('%%{'):
+        lines = lines[1:]
+        if not lines:
+            return ["empty diagram"]
+        header = lines[0][1]
+
+    words = header.split()
+    diagram_type = words[0].rstrip(';')
+    if diagram_type not in DIAGRAM_TYPES:
+        return [f"line {lines[0][0]}: unknown diagram type '{diagram_type}'"]
+
+    errors = _check_quotes(lines)
+    if diagram_type in ('graph', 'flowchart'):
+        if len(words) > 1 and words[1].rstrip(';') not in FLOWCHART_DIRECTIONS:
+            errors.append(f"line {lines[0][0]}: unknown direction '{words[1]}'")
+        errors.extend(_validate_flowchart(lines))
+    elif diagram_type == 'sequenceDiagram':
+        errors.extend(_validate_sequence(lines))
+    elif diagram_type.startswith('classDiagram'):
+        errors.extend(_validate_braces(lines, _check_class_line))
+    elif diagram_type == 'erDiagram':
+        errors.extend(_validate_braces(lines, _check_er_line))
+    elif diagram_type.startswith('stateDiagram'):
+        errors.extend(_validate_braces(lines, lambda line, in_body: ''))
+    return errors
+
+
+def find_invalid_diagrams(content: str) -> List[Tuple[str, List[str]]]:
+    """(source, errors) for every Mermaid block in a markdown document that fails validation"""
+    invalid = []
+    for source in MERMAID_BLOCK_RE.findall(content):
+        errors = validate_mermaid(source)
+        if errors:
+            invalid.append((source, errors))
+    return invalid
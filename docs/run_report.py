@@ -0,0 +1,101 @@
+import os
+from typing import Dict, List
+
+from core.run_history import cache_hit_rate, find_regressions, llm_latency, run_cost, tier_summary
+
+STAGE_ORDER = ['clone', 'process', 'git_history', 'analysis', 'prepare', 'generate', 'rollup', 'diff', 'patch', 'site']
+
+
+def _label(index: int, run: Dict) -> str:
+    repository = run['repository_url'].rstrip('/').split('/')[-1] or run['repository_url']
+    return f"#{index + 1} {run['started'][:16].replace('T', ' ')} {repository}"
+
+
+def render_run_report(runs: List[Dict], output_path: str) -> str:
+    """Write a self-contained interactive HTML dashboard of the run history; returns its path.
+
+    Panels: per-stage time of every run, throughput per repository over time, prompt tokens
+    against LLM latency, LLM tokens per model tier, and cache hit rates. Regressions found by
+    `find_regressions` are marked on the stage and throughput panels and listed in a table.
+    """
+    import plotly.graph_objects as go  # Only the report needs plotly
+    from plotly.subplots import make_subplots
+
+    labels = [_label(i, run) for i, run in enumerate(runs)]
+    regressions = find_regressions(runs)
+    regressed = {}
+    for regression in regressions:
+        regressed.setdefault(regression['index'], []).append(regression)
+
+    figure = make_subplots(
+        rows=6, cols=1, vertical_spacing=0.05,
+        row_heights=[0.22, 0.17, 0.17, 0.14, 0.13, 0.17],
+        specs=[[{}], [{}], [{'secondary_y': True}], [{}], [{}], [{'type': 'table'}]],
+        subplot_titles=('Stage breakdown (seconds)', 'Throughput (source lines per second)',
+                        'Prompt tokens and LLM latency', 'LLM tokens by model tier', 'Cache hit rate', 'Regressions'))
+
+    stages = [stage for stage in STAGE_ORDER if any(stage in run['stages'] for run in runs)]
+    stages += sorted({stage for run in runs for stage in run['stages']} - set(stages))
+    for stage in stages:
+        figure.add_trace(go.Bar(name=stage, x=labels, y=[run['stages'].get(stage, 0) for run in runs],
+                                legendgroup='stages'), row=1, col=1)
+    figure.update_layout(barmode='stack')
+    figure.add_trace(go.Scatter(
+        name='regression', x=[labels[i] for i in regressed], y=[runs[i]['seconds'] for i in regressed],
+        mode='markers', marker={'color': 'red', 'size': 12, 'symbol': 'x'},
+        hovertext=['<br>'.join(f"{r['metric']}: {r['value']:.2f} vs {r['baseline']:.2f}" for r in regressed[i])
+                   for i in regressed]), row=1, col=1)
+
+    by_repository: Dict[str, List[int]] = {}
+    for i, run in enumerate(runs):
+        if run['status'] == 'ok' and run['seconds'] and run['counts'].get('lines'):
+            by_repository.setdefault(run['repository_url'], []).append(i)
+    for repository, indexes in by_repository.items():
+        figure.add_trace(go.Scatter(
+            name=repository, x=[runs[i]['started'] for i in indexes],
+            y=[runs[i]['counts']['lines'] / runs[i]['seconds'] for i in indexes],
+            mode='lines+markers', legendgroup='throughput',
+            marker={'size': [12 if i in regressed else 6 for i in indexes],
+                    'symbol': ['x' if i in regressed else 'circle' for i in indexes]}), row=2, col=1)
+
+    figure.add_trace(go.Bar(name='prompt tokens', x=labels, y=[run['counts'].get('input_tokens', 0) for run in runs],
+                            marker={'color': 'lightsteelblue'}, legendgroup='llm'), row=3, col=1)
+    for name, quantile in (('p50 latency (s)', 0.5), ('p95 latency (s)', 0.95)):
+        figure.add_trace(go.Scatter(name=name, x=labels, y=[llm_latency(run, quantile) for run in runs],
+                                    mode='lines+markers', legendgroup='llm'), row=3, col=1, secondary_y=True)
+
+    tiers = [tier_summary(run['llm_calls']) for run in runs]
+    for tier in sorted({name for run_tiers in tiers for name in run_tiers}):
+        figure.add_trace(go.Bar(
+            name=f"{tier} tier", x=labels,
+            y=[run_tiers[tier]['prompt_tokens'] + run_tiers[tier]['output_tokens'] if tier in run_tiers else 0
+               for run_tiers in tiers],
+            hovertext=[f"{run_tiers[tier]['calls']} calls, {run_tiers[tier]['fallbacks']} fallbacks, "
+                       f"{run_tiers[tier]['seconds']:.1f}s" if tier in run_tiers else '' for run_tiers in tiers],
+            legendgroup='tiers'), row=4, col=1)
+
+    figure.add_trace(go.Scatter(name='cache hit rate', x=labels, y=[cache_hit_rate(run) for run in runs],
+                                mode='lines+markers', legendgroup='cache'), row=5, col=1)
+    figure.update_yaxes(tickformat='.0%', range=[0, 1.05], row=5, col=1)
+
+    figure.add_trace(go.Table(
+        header={'values': ['Run', 'Metric', 'Value', 'Baseline (median)', 'Change']},
+        cells={'values': [
+            [labels[r['index']] for r in regressions],
+            [r['metric'] for r in regressions],
+            [f"{r['value']:,.2f}" for r in regressions],
+            [f"{r['baseline']:,.2f}" for r in regressions],
+            [f"+{r['value'] / r['baseline'] - 1:.0%}" for r in regressions],
+        ]}), row=6, col=1)
+
+    costs = [cost for cost in (run_cost(run) for run in runs) if cost is not None]
+    summary = f"{len(runs)} runs, {len(regressions)} regressions"
+    if costs:
+        summary += f", latest {costs[-1]:.2f} s per 1k lines"
+    figure.update_layout(title=f"Documentation pipeline runs ({summary})", height=2200,
+                         legend={'groupclick': 'toggleitem'})
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    # plotly.js is embedded so the report opens offline
+    figure.write_html(output_path, include_plotlyjs=True)
+    return output_path
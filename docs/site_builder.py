@@ -0,0 +1,359 @@
+import hashlib
+import html
+import json
+import os
+import posixpath
+import re
+from typing import Dict, List, Optional, Tuple
+
+from docs.doc_generator import doc_files
+from docs.mermaid_renderer import MERMAID_BLOCK_RE, MermaidRenderer
+
+# Bump when the page template or conversion changes, so every page is rebuilt once
+SITE_VERSION = 2
+MANIFEST_FILE = '.site_manifest.json'
+SEARCH_INDEX_FILE = 'search_index.js'
+SNIPPET_CHARS = 200
+# Search weight of a term found in a section heading, relative to one in its text
+HEADING_WEIGHT = 5
+
+_TERM_RE = re.compile(r'[a-z0-9_]{2,}')
+_HEADING_RE = re.compile(r'<h([1-6]) id="([^"]*)">(.*?)</h\1>', re.DOTALL)
+_SVG_RE = re.compile(r'<svg\b.*?</svg>', re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+# Relative links between the markdown docs, rewritten to the generated pages
+_DOC_LINK_RE = re.compile(r'href="(?![a-zA-Z][a-zA-Z0-9+.-]*:|/|#)([^"#]+)\.md(#[^"]*)?"')
+_SVG_ID_RE = re.compile(r'<svg\b[^>]*?\bid="([^"]+)"')
+_DIAGRAM_MARKER = 'DOCSITEDIAGRAM{}END'
+_DIAGRAM_PARAGRAPH_RE = re.compile(r'<p>DOCSITEDIAGRAM(\d+)END</p>')
+
+
+def page_name(filename: str) -> str:
+    """Site page of a doc; subproject docs (shards/<name>/x.md) are flattened to shards-<name>-x.html"""
+    return os.path.splitext(filename)[0].replace('/', '-') + '.html'
+
+
+def tokenize(text: str) -> List[str]:
+    return _TERM_RE.findall(text.lower())
+
+
+def _page_title(filename: str, content: str) -> str:
+    """First heading of the doc (or its name), led by the subproject name for a sharded run's docs"""
+    folder, basename = posixpath.split(filename)
+    title = os.path.splitext(basename)[0].replace('_', ' ').title()
+    for line in content.splitlines():
+        if line.startswith('# '):
+            title = line[2:].strip()
+            break
+        if line.strip():
+            break
+    return f"{posixpath.basename(folder)}: {title}" if folder else title
+
+
+def _plain_text(fragment: str) -> str:
+    return _SPACE_RE.sub(' ', html.unescape(_TAG_RE.sub(' ', _SVG_RE.sub(' ', fragment)))).strip()
+
+
+class SiteBuilder:
+    """Builds an offline static HTML site from a folder of markdown docs.
+
+    Every page embeds its Mermaid diagrams as SVG from the renderer's hash-keyed cache, and one
+    precomputed search index covers all pages. A manifest keeps each page's source hash and search
+    entries, so a rebuild converts only the pages whose markdown (or the shared navigation) changed.
+    """
+
+    def __init__(self, docs_dir: str, site_dir: str, renderer: Optional[MermaidRenderer] = None):
+        self.docs_dir = docs_dir
+        self.site_dir = site_dir
+        self.renderer = renderer or MermaidRenderer(
+            os.path.join(os.path.dirname(os.path.abspath(docs_dir)), '.cache', 'mermaid'), image_format='svg')
+        import markdown  # Kept out of CLI startup; only site builds convert markdown
+        self._markdown = markdown.Markdown(extensions=['fenced_code', 'tables', 'toc'])
+
+    def build(self) -> Dict[str, List[str]]:
+        """Build or refresh the site; returns {'built', 'unchanged', 'removed'} page names"""
+        sources = {}
+        # index.md leads the navigation, a sharded run's subproject docs follow the top-level ones
+        order = doc_files(self.docs_dir)
+        for filename in order:
+            with open(os.path.join(self.docs_dir, filename), 'r', encoding='utf-8') as f:
+                sources[filename] = f.read()
+        nav = [(page_name(filename), _page_title(filename, sources[filename])) for filename in order]
+
+        manifest = self._load_manifest()
+        renderer_version = self.renderer.mmdc['version'] if self.renderer.available else ''
+        nav_key = json.dumps(nav)
+        hashes = {filename: hashlib.sha256(
+            f"{SITE_VERSION}\n{renderer_version}\n{nav_key}\n{sources[filename]}".encode('utf-8')).hexdigest()
+            for filename in order}
+        changed = [filename for filename in order
+                   if manifest.get(filename, {}).get('hash') != hashes[filename]
+                   or not os.path.exists(os.path.join(self.site_dir, page_name(filename)))]
+
+        os.makedirs(self.site_dir, exist_ok=True)
+        # Every diagram of the changed pages is rendered in one batch, then read from the cache
+        diagrams = self.renderer.render_all(
+            source for filename in changed for source in MERMAID_BLOCK_RE.findall(sources[filename]))
+        for filename in changed:
+            page_html, entries = self._convert(filename, sources[filename], diagrams)
+            with open(os.path.join(self.site_dir, page_name(filename)), 'w', encoding='utf-8') as f:
+                f.write(self._page(filename, nav, page_html))
+            manifest[filename] = {'hash': hashes[filename], 'title': _page_title(filename, sources[filename]),
+                                  'entries': entries}
+
+        removed = [filename for filename in manifest if filename not in sources]
+        for filename in removed:
+            del manifest[filename]
+            try:
+                os.remove(os.path.join(self.site_dir, page_name(filename)))
+            except OSError:
+                pass
+
+        index_path = os.path.join(self.site_dir, SEARCH_INDEX_FILE)
+        if changed or removed or not os.path.exists(index_path):
+            with open(index_path, 'w', encoding='utf-8') as f:
+                f.write('window.SEARCH_INDEX = ' + json.dumps(self._search_index(manifest, order),
+                                                              separators=(',', ':')) + ';\n')
+        self._write_asset('style.css', SITE_CSS)
+        self._write_asset('search.js', SEARCH_JS)
+        self._save_manifest(manifest)
+        return {'built': changed, 'unchanged': [f for f in order if f not in changed], 'removed': removed}
+
+    def _convert(self, filename: str, content: str, diagrams: Dict[str, str]) -> Tuple[str, List[Dict]]:
+        """Page body HTML and its search entries (one per heading)"""
+        sources = []
+
+        def hold_diagram(match) -> str:
+            sources.append(match.group(1))
+            return f"\n\n{_DIAGRAM_MARKER.format(len(sources) - 1)}\n\n"
+
+        self._markdown.reset()
+        body = self._markdown.convert(MERMAID_BLOCK_RE.sub(hold_diagram, content))
+        folder = posixpath.dirname(filename)
+
+        def doc_link(match) -> str:
+            target = posixpath.normpath(posixpath.join(folder, f"{match.group(1)}.md"))
+            return f'href="{page_name(target)}{match.group(2) or ""}"'
+
+        body = _DOC_LINK_RE.sub(doc_link, body)
+        body = _DIAGRAM_PARAGRAPH_RE.sub(lambda match: self._diagram(sources[int(match.group(1))], diagrams), body)
+        return body, self._search_entries(filename, content, body)
+
+    def _diagram(self, source: str, diagrams: Dict[str, str]) -> str:
+        path = diagrams.get(source)
+        if path is None:
+            return f'<pre class="diagram-source"><code>{html.escape(source)}</code></pre>'
+        with open(path, 'r', encoding='utf-8') as f:
+            svg = f.read()
+        # mmdc gives every diagram the same root id, which its embedded styles select on; make it unique per diagram
+        match = _SVG_ID_RE.search(svg)
+        if match:
+            svg = svg.replace(match.group(1), f"diagram-{os.path.splitext(os.path.basename(path))[0][:16]}")
+        return f'<figure class="diagram">{svg[svg.find("<svg"):]}</figure>'
+
+    def _search_entries(self, filename: str, content: str, body: str) -> List[Dict]:
+        title = _page_title(filename, content)
+        headings = list(_HEADING_RE.finditer(body))
+        spans = [('', title, 0, headings[0].start() if headings else len(body))]
+        for i, match in enumerate(headings):
+            end = headings[i + 1].start() if i + 1 < len(headings) else len(body)
+            spans.append((match.group(2), _plain_text(match.group(3)), match.end(), end))
+
+        entries = []
+        for anchor, heading, start, end in spans:
+            text = _plain_text(body[start:end])
+            if not text and not anchor:
+                continue
+            terms: Dict[str, int] = {}
+            for term in tokenize(text):
+                terms[term] = terms.get(term, 0) + 1
+            for term in tokenize(heading):
+                terms[term] = terms.get(term, 0) + HEADING_WEIGHT
+            entries.append({'anchor': anchor, 'heading': heading, 'snippet': text[:SNIPPET_CHARS], 'terms': terms})
+        return entries
+
+    def _search_index(self, manifest: Dict, order: List[str]) -> Dict:
+        """{'docs': [[page, anchor, page title, heading, snippet]], 'terms': sorted terms, 'postings': [[doc, weight, ...]]}"""
+        docs, postings = [], {}
+        for filename in order:
+            title = manifest[filename]['title']
+            for entry in manifest[filename]['entries']:
+                doc = len(docs)
+                docs.append([page_name(filename), entry['anchor'], title, entry['heading'], entry['snippet']])
+                for term, weight in entry['terms'].items():
+                    postings.setdefault(term, []).extend((doc, weight))
+        terms = sorted(postings)
+        return {'docs': docs, 'terms': terms, 'postings': [postings[term] for term in terms]}
+
+    def _page(self, filename: str, nav: List[Tuple[str, str]], body: str) -> str:
+        current = page_name(filename)
+        links = '\n'.join(
+            f'<a class="nav-item{" active" if page == current else ""}" href="{page}">{html.escape(title)}</a>'
+            for page, title in nav)
+        site_title = html.escape(nav[0][1]) if nav else 'Documentation'
+        title = html.escape(dict(nav).get(current, filename))
+        return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{title} - {site_title}</title>
+<link rel="stylesheet" href="style.css">
+<script src="{SEARCH_INDEX_FILE}" defer></script>
+<script src="search.js" defer></script>
+</head>
+<body>
+<header>
+<a class="site-title" href="{nav[0][0] if nav else current}">{site_title}</a>
+<input id="search" type="search" placeholder="Search the documentation..." autocomplete="off">
+<div id="search-results" hidden></div>
+</header>
+<nav>
+{links}
+</nav>
+<main>
+{body}
+</main>
+</body>
+</html>
+"""
+
+    def _write_asset(self, name: str, content: str) -> None:
+        path = os.path.join(self.site_dir, name)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                if f.read() == content:
+                    return
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def _load_manifest(self) -> Dict:
+        try:
+            with open(os.path.join(self.site_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest: Dict) -> None:
+        with open(os.path.join(self.site_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+
+
+def build_site(docs_dir: str, site_dir: str) -> Dict[str, List[str]]:
+    builder = SiteBuilder(docs_dir, site_dir)
+    result = builder.build()
+    if not builder.renderer.available:
+        print("⚠️ Mermaid CLI not found, diagrams are shown as source. Install it using: npm install -g @mermaid-js/mermaid-cli")
+    print(f"Site: {len(result['built'])} pages built, {len(result['unchanged'])} unchanged, "
+          f"{len(result['removed'])} removed -> {os.path.join(site_dir, 'index.html')}")
+    return result
+
+
+SITE_CSS = """* { box-sizing: border-box; }
+body { margin: 0; font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6;
+       color: #24292f; display: grid; grid-template-columns: 260px 1fr; grid-template-rows: auto 1fr; min-height: 100vh; }
+header { grid-column: 1 / 3; display: flex; align-items: center; gap: 24px; padding: 12px 24px;
+         background: #0366d6; color: white; position: sticky; top: 0; z-index: 10; }
+.site-title { color: white; font-size: 1.2em; font-weight: 600; text-decoration: none; white-space: nowrap; }
+#search { flex: 1; max-width: 480px; padding: 8px 12px; border: none; border-radius: 6px; font-size: 1em; }
+#search-results { position: absolute; top: 100%; left: 284px; width: min(640px, 90vw); max-height: 70vh; overflow-y: auto;
+                  background: white; color: #24292f; border: 1px solid #d0d7de; border-radius: 6px;
+                  box-shadow: 0 8px 24px rgba(0,0,0,0.15); }
+#search-results a { display: block; padding: 10px 14px; color: inherit; text-decoration: none; border-bottom: 1px solid #eee; }
+#search-results a:hover, #search-results a.selected { background: #f0f6ff; }
+#search-results .result-page { font-size: 0.8em; color: #57606a; }
+#search-results .result-heading { font-weight: 600; color: #0366d6; }
+#search-results .result-snippet { font-size: 0.9em; color: #57606a; }
+#search-results .empty { padding: 10px 14px; color: #57606a; }
+nav { background: #f6f8fa; border-right: 1px solid #d0d7de; padding: 16px 0; }
+.nav-item { display: block; padding: 8px 24px; color: #24292f; text-decoration: none; }
+.nav-item:hover { background: #eaeef2; }
+.nav-item.active { background: #0366d6; color: white; }
+main { padding: 32px 48px; max-width: 1100px; overflow-x: auto; }
+h1, h2, h3 { scroll-margin-top: 72px; }
+h1 { border-bottom: 2px solid #0366d6; padding-bottom: 8px; }
+h2 { border-bottom: 1px solid #d0d7de; padding-bottom: 4px; margin-top: 2em; }
+code { background: #f6f8fa; padding: 2px 4px; border-radius: 3px; font-size: 0.9em; }
+pre { background: #f6f8fa; padding: 16px; border-radius: 6px; overflow-x: auto; }
+pre code { padding: 0; }
+table { border-collapse: collapse; width: 100%; margin: 1em 0; }
+th, td { border: 1px solid #d0d7de; padding: 8px 12px; text-align: left; vertical-align: top; }
+th { background: #f6f8fa; }
+figure.diagram { margin: 1.5em 0; padding: 16px; border: 1px solid #d0d7de; border-radius: 6px; overflow-x: auto; text-align: center; }
+figure.diagram svg { max-width: 100%; height: auto; }
+@media (max-width: 800px) { body { grid-template-columns: 1fr; } nav { display: none; } #search-results { left: 12px; } }
+"""
+
+SEARCH_JS = """(function () {
+  var input = document.getElementById('search');
+  var results = document.getElementById('search-results');
+  var MAX_RESULTS = 20;
+
+  function firstAtLeast(terms, token) {
+    var low = 0, high = terms.length;
+    while (low < high) {
+      var mid = (low + high) >> 1;
+      if (terms[mid] < token) { low = mid + 1; } else { high = mid; }
+    }
+    return low;
+  }
+
+  function search(query) {
+    var index = window.SEARCH_INDEX;
+    var tokens = (query.toLowerCase().match(/[a-z0-9_]{2,}/g) || []);
+    if (!index || !tokens.length) { return []; }
+    var scores = null;
+    tokens.forEach(function (token) {
+      // Every indexed term starting with the token matches; exact matches count double
+      var tokenScores = {};
+      for (var i = firstAtLeast(index.terms, token); i < index.terms.length && index.terms[i].lastIndexOf(token, 0) === 0; i++) {
+        var boost = index.terms[i] === token ? 2 : 1;
+        var postings = index.postings[i];
+        for (var j = 0; j < postings.length; j += 2) {
+          tokenScores[postings[j]] = (tokenScores[postings[j]] || 0) + postings[j + 1] * boost;
+        }
+      }
+      if (scores === null) { scores = tokenScores; return; }
+      var both = {};
+      Object.keys(scores).forEach(function (doc) {
+        if (doc in tokenScores) { both[doc] = scores[doc] + tokenScores[doc]; }
+      });
+      scores = both;
+    });
+    return Object.keys(scores).sort(function (a, b) { return scores[b] - scores[a]; }).slice(0, MAX_RESULTS)
+      .map(function (doc) { return index.docs[doc]; });
+  }
+
+  function escapeHtml(text) {
+    return text.replace(/[&<>"]/g, function (c) { return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]; });
+  }
+
+  function show(query) {
+    if (!query.trim()) { results.hidden = true; return; }
+    var found = search(query);
+    results.innerHTML = found.length ? found.map(function (doc) {
+      return '<a href="' + doc[0] + (doc[1] ? '#' + doc[1] : '') + '">' +
+        '<div class="result-page">' + escapeHtml(doc[2]) + '</div>' +
+        '<div class="result-heading">' + escapeHtml(doc[3]) + '</div>' +
+        '<div class="result-snippet">' + escapeHtml(doc[4]) + '</div></a>';
+    }).join('') : '<div class="empty">No results</div>';
+    results.hidden = false;
+  }
+
+  input.addEventListener('input', function () { show(input.value); });
+  input.addEventListener('keydown', function (event) {
+    if (event.key === 'Escape') { results.hidden = true; input.blur(); }
+    if (event.key === 'Enter') {
+      var first = results.querySelector('a');
+      if (first) { window.location.href = first.getAttribute('href'); }
+    }
+  });
+  document.addEventListener('click', function (event) {
+    if (event.target !== input && !results.contains(event.target)) { results.hidden = true; }
+  });
+  document.addEventListener('keydown', function (event) {
+    if (event.key === '/' && document.activeElement !== input) { event.preventDefault(); input.focus(); }
+  });
+})();
+"""
@@ -0,0 +1,29 @@
+"""Times the Markdown -> Confluence storage backends over the golden corpus.
+
+    python -m tests.benchmark_confluence_storage [repeat]
+"""
+import sys
+import time
+
+from docs.confluence_uploader import MARKDOWN_BACKENDS, md_to_confluence_storage
+from tests.test_confluence_storage import GOLDEN_DOCS, _golden
+
+
+def main(repeat: int = 20) -> None:
+    corpus = [_golden(name)[0] for name in GOLDEN_DOCS]
+    large = '\n\n'.join(corpus) * 20
+    print(f"{len(corpus)} documents x {repeat}, and one {len(large) // 1024} KB document")
+    for backend in MARKDOWN_BACKENDS:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for source in corpus:
+                md_to_confluence_storage(source, backend)
+        corpus_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        md_to_confluence_storage(large, backend)
+        large_ms = (time.perf_counter() - start) * 1000
+        print(f"  {backend:12} corpus {corpus_ms:8.0f} ms   large {large_ms:8.0f} ms")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,194 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeConfluence:
+    """In-memory stand-in for the Confluence REST API calls the uploader makes.
+
+    Serves pages (with versions and ancestors), content properties and attachments, and records
+    every request as (method, path). `latency` delays each response; `fail` decides per request
+    whether to answer with an error status instead (see `fail_first_attempt`). The highest number
+    of requests handled at the same time is kept in `max_in_flight`.
+    """
+
+    def __init__(self, latency: float = 0.0,
+                 fail: Optional[Callable[[str, str], Optional[Tuple[int, Dict[str, str]]]]] = None):
+        self.latency = latency
+        self.fail = fail
+        self.pages: Dict[str, Dict] = {}
+        self.properties: Dict[str, Dict[str, Dict]] = {}
+        self.attachments: Dict[str, Dict[str, bytes]] = {}
+        self.log: List[Tuple[str, str]] = []
+        self.failures: List[Tuple[str, str, int]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._next_id = 100
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _handler(self))
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self) -> 'FakeConfluence':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def page(self, title: str) -> Optional[Dict]:
+        return next((page for page in self.pages.values() if page['title'] == title), None)
+
+    def writes(self) -> List[Tuple[str, str]]:
+        return [(method, path) for method, path in self.log if method != 'GET']
+
+    def page_view(self, page: Dict, expand: str = '') -> Dict:
+        view = {key: value for key, value in page.items() if key != 'parent'}
+        view['ancestors'] = [{'id': page['parent']}] if page['parent'] else []
+        view['metadata'] = {'properties': {key: value for key, value in self.properties.get(page['id'], {}).items()
+                                           if f"metadata.properties.{key}" in expand}}
+        return view
+
+    def create_page(self, data: Dict) -> Tuple[int, Dict]:
+        if self.page(data['title']):
+            return 400, {'message': 'A page with this title already exists'}
+        page_id = str(self._next_id)
+        self._next_id += 1
+        self.pages[page_id] = {'id': page_id, 'type': 'page', 'title': data['title'],
+                               'version': {'number': 1}, 'body': data['body'],
+                               'parent': (data.get('ancestors') or [{}])[0].get('id')}
+        return 200, self.page_view(self.pages[page_id])
+
+    def update_page(self, page_id: str, data: Dict) -> Tuple[int, Dict]:
+        page = self.pages[page_id]
+        if data['version']['number'] != page['version']['number'] + 1:
+            return 409, {'message': 'Version must be incremented on update'}
+        page.update(title=data['title'], body=data['body'], version={'number': data['version']['number']})
+        if data.get('ancestors'):
+            page['parent'] = data['ancestors'][0]['id']
+        return 200, self.page_view(page)
+
+    def set_property(self, page_id: str, data: Dict, key: Optional[str] = None) -> Tuple[int, Dict]:
+        properties = self.properties.setdefault(page_id, {})
+        current = properties.get(key or data['key'])
+        expected = current['version']['number'] + 1 if current else 1
+        number = (data.get('version') or {}).get('number', 1)
+        if number != expected:
+            return 409, {'message': f"Property version {number}, expected {expected}"}
+        properties[data['key']] = {'key': data['key'], 'value': data['value'], 'version': {'number': number}}
+        return 200, properties[data['key']]
+
+    def attach(self, page_id: str, body: bytes) -> Tuple[int, Dict]:
+        name = re.search(rb'filename="([^"]+)"', body).group(1).decode()
+        self.attachments.setdefault(page_id, {})[name] = body
+        return 200, {'results': [{'id': f"att-{page_id}-{name}", 'title': name}]}
+
+
+def fail_first_attempt(status: int, retry_after: Optional[str] = None,
+                       methods: Tuple[str, ...] = ('GET', 'POST', 'PUT')):
+    """Failure rule answering the first request to each (method, path) with `status`"""
+    seen = set()
+    lock = threading.Lock()
+    headers = {'Retry-After': retry_after} if retry_after is not None else {}
+
+    def fail(method: str, path: str):
+        with lock:
+            if method not in methods or (method, path) in seen:
+                return None
+            seen.add((method, path))
+        return status, headers
+
+    return fail
+
+
+def _handler(fake: FakeConfluence):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _handle(self):
+            url = urlparse(self.path)
+            path = re.sub(r'^/(rest/api/)?', '', url.path).rstrip('/')
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            with fake._lock:
+                fake.in_flight += 1
+                fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+            try:
+                time.sleep(fake.latency)
+                failure = fake.fail(self.command, path) if fake.fail else None
+                if failure:
+                    status, headers = failure
+                    with fake._lock:
+                        fake.failures.append((self.command, path, status))
+                    return self._send(status, {'message': 'injected failure'}, headers)
+                with fake._lock:
+                    fake.log.append((self.command, path))
+                    status, payload = self._route(self.command, path, query, body)
+                self._send(status, payload)
+            finally:
+                with fake._lock:
+                    fake.in_flight -= 1
+
+        def _route(self, method: str, path: str, query: Dict[str, str], body: bytes) -> Tuple[int, Dict]:
+            expand = query.get('expand', '')
+            if method == 'GET':
+                if path == 'content':
+                    results = [fake.page_view(page, expand) for page in fake.pages.values()
+                               if page['title'] == query.get('title')]
+                    return 200, {'results': results, 'size': len(results)}
+                match = re.fullmatch(r'content/(\d+)/child/page', path)
+                if match:
+                    results = [fake.page_view(page, expand) for page in fake.pages.values()
+                               if page['parent'] == match.group(1)]
+                    return 200, {'results': results, 'size': len(results), '_links': {}}
+                match = re.fullmatch(r'content/(\d+)/history', path)
+                if match:
+                    return 200, {'lastUpdated': {'number': fake.pages[match.group(1)]['version']['number']}}
+                match = re.fullmatch(r'content/(\d+)/child/attachment', path)
+                if match:
+                    results = [{'id': f"att-{match.group(1)}-{name}", 'title': name}
+                               for name in fake.attachments.get(match.group(1), {}) if name == query.get('filename')]
+                    return 200, {'results': results, 'size': len(results)}
+                match = re.fullmatch(r'content/(\d+)', path)
+                if match and match.group(1) in fake.pages:
+                    return 200, fake.page_view(fake.pages[match.group(1)], expand)
+            elif method == 'POST':
+                if path == 'content':
+                    return fake.create_page(json.loads(body))
+                match = re.fullmatch(r'content/(\d+)/property', path)
+                if match:
+                    return fake.set_property(match.group(1), json.loads(body))
+                match = re.fullmatch(r'content/(\d+)/child/attachment(?:/[\w\-]+/data)?', path)
+                if match:
+                    return fake.attach(match.group(1), body)
+            elif method == 'PUT':
+                match = re.fullmatch(r'content/(\d+)/property/(.+)', path)
+                if match:
+                    return fake.set_property(match.group(1), json.loads(body), match.group(2))
+                match = re.fullmatch(r'content/(\d+)', path)
+                if match and match.group(1) in fake.pages:
+                    return fake.update_page(match.group(1), json.loads(body))
+            return 404, {'message': f"No fake for {method} {path}"}
+
+        do_GET = do_POST = do_PUT = _handle
+
+    return Handler
@@ -0,0 +1,52 @@
+import pytest
+
+from core import codebase_processor
+from core.codebase_processor import CodebaseProcessor
+from core.token_estimator import TokenEstimator
+
+
+def _file(path, language, content):
+    return {'path': path, 'language': language, 'content': content, 'size': len(content),
+            'lines': content.count('\n') + 1}
+
+
+def _codebase():
+    files = [_file(f"src/main/java/shop/Service{i}.java", 'java',
+                   f"package shop;\n\npublic class Service{i} {{\n"
+                   + ''.join(f"    public int step{j}(int x) {{ return x + {j}; }}\n" for j in range(40)) + "}\n")
+             for i in range(12)]
+    files.append(_file('src/main/resources/application.properties', 'properties',
+                       'spring.datasource.url=jdbc:mysql://localhost/shop\nspring.datasource.password=hunter2\n'))
+    files.append(_file('config/app.yaml', 'yaml', 'server:\n  port: 8080\n'))
+    stats = {'total_files': len(files), 'total_lines': sum(f['lines'] for f in files),
+             'languages': {'java': {'files': 12, 'lines': 0}, 'properties': {'files': 1, 'lines': 2}}}
+    return files, stats
+
+
+def test_summary_excludes_sensitive_files():
+    files, stats = _codebase()
+    summary = CodebaseProcessor().create_filtered_summary(files, stats, token_limit=200_000)
+
+    assert 'hunter2' not in summary
+    assert 'application.properties' not in summary
+    assert 'port: 8080' in summary
+    assert '1 security-sensitive files are excluded' in summary
+
+
+def test_summary_never_exceeds_token_limit(monkeypatch):
+    # A packer that ignores the budget, as an optimistic per-character estimate could in the worst case
+    monkeypatch.setattr(codebase_processor, 'pack_budget', lambda items, budget: {item['key']: 'full' for item in items})
+    files, stats = _codebase()
+
+    summary = CodebaseProcessor().create_filtered_summary(files, stats, token_limit=1500)
+
+    assert TokenEstimator().estimate_tokens(summary) <= 1500
+    assert '=== CORE FILES (FULL CONTENT) ===' in summary
+    assert 'more files omitted for size' in summary
+
+
+def test_summary_limit_too_small_for_overview():
+    files, stats = _codebase()
+
+    with pytest.raises(ValueError, match='too small'):
+        CodebaseProcessor().create_filtered_summary(files, stats, token_limit=20)
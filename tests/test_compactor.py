@@ -0,0 +1,41 @@
+from core.compactor import Compactor
+from core.lexer import iter_tokens
+
+
+def test_regex_literal_survives_comment_stripping():
+    source = ("const re = /^https?:\\/\\//; const ok = re.test(url) && check(url); // trailing\n"
+              "const half = total / count; // per item\n"
+              "if (/[/]x\\//.test(s)) log('//kept');\n")
+    compacted = Compactor('standard').compact('src/url.js', 'javascript', source)
+
+    assert compacted == ("const re = /^https?:\\/\\//; const ok = re.test(url) && check(url);\n"
+                         "const half = total / count;\n"
+                         "if (/[/]x\\//.test(s)) log('//kept');\n")
+
+
+def test_division_is_not_a_regex_literal():
+    tokens = [(kind, text) for kind, text, _ in iter_tokens('x = (a) / b / c; y = z/2 // half')]
+
+    assert ('regex', '/ b /') not in tokens
+    assert [text for kind, text in tokens if text == '/'] == ['/', '/', '/']
+    assert ('comment', '// half') not in tokens
+
+
+def test_jsx_text_is_not_taken_for_a_comment():
+    source = ("// Copyright (c) Shop\n"
+              "export const Footer = () => (\n"
+              "  <a href=\"x\">https://example.com</a> // not stripped either\n"
+              ");\n")
+    for level in ('light', 'standard'):
+        compacted = Compactor(level).compact('src/Footer.jsx', 'javascript', source)
+        assert compacted == source[len("// Copyright (c) Shop\n"):]
+    assert 'https://example.com</a>' in Compactor('standard').compact('src/Footer.tsx', 'typescript', source)
+
+
+def test_blank_lines_are_only_removed_from_code():
+    markdown = "# Title\n\nFirst paragraph.\n\n\n\nSecond paragraph.\n"
+    code = "def a():\n    return 1\n\n\ndef b():\n    return 2\n"
+    compactor = Compactor('standard')
+
+    assert compactor.compact('README.md', 'markdown', markdown) == "# Title\n\nFirst paragraph.\n\nSecond paragraph.\n"
+    assert compactor.compact('app.py', 'python', code) == "def a():\n    return 1\ndef b():\n    return 2\n"
@@ -0,0 +1,41 @@
+import glob
+import os
+
+import pytest
+
+from docs.confluence_uploader import md_to_confluence_storage
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), 'golden', 'confluence')
+# Each <name>.storage.xml was produced from <name>.md by the original BeautifulSoup converter
+GOLDEN_DOCS = sorted(os.path.basename(path)[:-3] for path in glob.glob(os.path.join(GOLDEN_DIR, '*.md')))
+
+
+def _golden(name):
+    with open(os.path.join(GOLDEN_DIR, f"{name}.md"), encoding='utf-8') as f:
+        source = f.read()
+    with open(os.path.join(GOLDEN_DIR, f"{name}.storage.xml"), encoding='utf-8') as f:
+        return source, f.read()
+
+
+@pytest.mark.parametrize('name', GOLDEN_DOCS)
+@pytest.mark.parametrize('backend', ['single-pass', 'html.parser', 'lxml'])
+def test_backends_match_golden_output(name, backend):
+    if backend != 'single-pass':
+        pytest.importorskip('bs4')
+    if backend == 'lxml':
+        pytest.importorskip('lxml')
+    source, expected = _golden(name)
+
+    assert md_to_confluence_storage(source, backend) == expected
+
+
+def test_indented_code_becomes_code_macro():
+    storage = md_to_confluence_storage("Run:\n\n    make <target> && ./run\n")
+
+    assert storage == ('<p>Run:</p>\n<ac:structured-macro ac:name="code"><ac:plain-text-body><![CDATA[\n'
+                       'make <target> && ./run\n\n]]></ac:plain-text-body></ac:structured-macro>')
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match='Unknown Markdown backend'):
+        md_to_confluence_storage('# Title', 'html5lib')
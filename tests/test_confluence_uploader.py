@@ -0,0 +1,163 @@
+import os
+import sys
+
+import pytest
+
+from docs import mermaid_renderer
+from docs.confluence_uploader import HASH_PROPERTY_KEY, publish_to_confluence
+from tests.fake_confluence import FakeConfluence, fail_first_attempt
+
+# Writes each diagram's source as its "image", so attachments change exactly when diagrams do
+FAKE_MMDC = f'''#!{sys.executable}
+import re, sys
+args = sys.argv[1:]
+if args == ['--version']:
+    print('fake-mmdc 1.0')
+    sys.exit()
+source, output = args[args.index('-i') + 1], args[args.index('-o') + 1]
+text = open(source).read()
+if source.endswith('.md'):
+    for n, block in enumerate(re.findall(r"```mermaid\\n(.*?)```", text, re.S), 1):
+        open(output[:-3] + f'-{{n}}.png', 'w').write(block)
+else:
+    open(output, 'w').write(text)
+'''
+
+INDEX = "# Shop Docs\n\nOverview of the shop.\n\n```mermaid\ngraph TD\n  A --> B\n```\n"
+CHILDREN = {
+    'architecture.md': "# Architecture\n\nLayers.\n\n```mermaid\ngraph LR\n  web --> db\n```\n",
+    'classes.md': "# Classes\n\n```java\nclass Cart {}\n```\n",
+    'database.md': "# Database\n\n| table | rows |\n|---|---|\n| cart | 10 |\n",
+    'web.md': "# Web\n\n- GET /cart\n",
+}
+
+
+@pytest.fixture
+def docs_folder(tmp_path, monkeypatch):
+    mmdc = tmp_path / 'mmdc'
+    mmdc.write_text(FAKE_MMDC)
+    mmdc.chmod(0o755)
+    monkeypatch.setitem(mermaid_renderer._resolved_mmdc, 'mmdc', {'path': str(mmdc), 'version': 'fake-mmdc 1.0'})
+
+    folder = tmp_path / 'output' / 'docs'
+    folder.mkdir(parents=True)
+    (folder / 'index.md').write_text(INDEX)
+    for name, content in CHILDREN.items():
+        (folder / name).write_text(content)
+    return str(folder)
+
+
+def _publish(fake, docs_folder, **kwargs):
+    kwargs.setdefault('requests_per_second', 0)
+    publish_to_confluence(fake.url, 'DOC', docs_folder, 'bot', 'token', **kwargs)
+
+
+def test_first_publish_creates_pages_attachments_and_hashes(docs_folder):
+    with FakeConfluence() as fake:
+        _publish(fake, docs_folder)
+
+        parent = fake.page('Shop Docs')
+        assert parent['parent'] is None
+        children = {page['title'] for page in fake.pages.values() if page['parent'] == parent['id']}
+        assert children == {'Shop Docs - Architecture', 'Shop Docs - Classes', 'Shop Docs - Database',
+                            'Shop Docs - Web'}
+        assert '<ac:structured-macro ac:name="code">' in fake.page('Shop Docs - Classes')['body']['storage']['value']
+        assert set(fake.attachments[parent['id']]) == {'index_diagram_1.png'}
+        assert set(fake.attachments[fake.page('Shop Docs - Architecture')['id']]) == {'architecture_diagram_1.png'}
+        for page in fake.pages.values():
+            stored = fake.properties[page['id']][HASH_PROPERTY_KEY]
+            assert stored['version'] == {'number': 1}
+            assert len(stored['value']['body']) == 64
+
+
+def test_unchanged_republish_only_reads(docs_folder):
+    with FakeConfluence() as fake:
+        _publish(fake, docs_folder)
+        fake.log.clear()
+
+        _publish(fake, docs_folder)
+
+        assert fake.writes() == []
+        assert len(fake.log) == 2  # parent by title, then its children
+        assert all(page['version'] == {'number': 1} for page in fake.pages.values())
+
+
+def test_edited_page_is_updated_in_place_with_version_bump(docs_folder):
+    with FakeConfluence() as fake:
+        _publish(fake, docs_folder)
+        web = fake.page('Shop Docs - Web')
+        fake.log.clear()
+
+        with open(os.path.join(docs_folder, 'web.md'), 'a', encoding='utf-8') as f:
+            f.write("- POST /cart\n")
+        _publish(fake, docs_folder)
+
+        assert len(fake.pages) == 5
+        assert web['version'] == {'number': 2}
+        assert 'POST /cart' in web['body']['storage']['value']
+        assert fake.properties[web['id']][HASH_PROPERTY_KEY]['version'] == {'number': 2}
+        assert fake.writes() == [('PUT', f"content/{web['id']}"),
+                                 ('PUT', f"content/{web['id']}/property/{HASH_PROPERTY_KEY}")]
+        assert all(page['version'] == {'number': 1} for page in fake.pages.values() if page is not web)
+
+
+def test_changed_diagram_reuploads_only_its_attachment(docs_folder):
+    with FakeConfluence() as fake:
+        _publish(fake, docs_folder)
+        architecture = fake.page('Shop Docs - Architecture')
+        fake.log.clear()
+
+        path = os.path.join(docs_folder, 'architecture.md')
+        with open(path, encoding='utf-8') as f:
+            content = f.read()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content.replace('web --> db', 'web --> cache'))
+        _publish(fake, docs_folder)
+
+        assert b'web --> cache' in fake.attachments[architecture['id']]['architecture_diagram_1.png']
+        assert [(method, path) for method, path in fake.writes() if 'attachment' in path] == [
+            ('POST', f"content/{architecture['id']}/child/attachment")]
+        assert fake.properties[architecture['id']][HASH_PROPERTY_KEY]['version'] == {'number': 2}
+
+
+@pytest.mark.parametrize('status, retry_after', [(429, '0'), (503, None), (502, None)])
+def test_rate_limited_and_unavailable_responses_are_retried(docs_folder, status, retry_after):
+    with FakeConfluence(fail=fail_first_attempt(status, retry_after)) as fake:
+        _publish(fake, docs_folder)
+
+        assert fake.failures and all(failure[2] == status for failure in fake.failures)
+        assert len(fake.pages) == 5
+        assert sum(len(names) for names in fake.attachments.values()) == 2
+        assert all(HASH_PROPERTY_KEY in fake.properties[page_id] for page_id in fake.pages)
+
+
+def test_concurrency_limit_caps_requests_in_flight(docs_folder):
+    with FakeConfluence(latency=0.05) as fake:
+        _publish(fake, docs_folder, concurrency=2)
+
+        assert len(fake.pages) == 5
+        assert fake.max_in_flight == 2
+
+
+def test_sharded_docs_publish_as_subproject_pages_linked_from_the_rollup(docs_folder):
+    with open(os.path.join(docs_folder, 'index.md'), 'a', encoding='utf-8') as f:
+        f.write("\n## Subprojects\n\n- [API docs](shards/api/index.md)\n")
+    shard = os.path.join(docs_folder, 'shards', 'api')
+    os.makedirs(shard)
+    with open(os.path.join(shard, 'index.md'), 'w', encoding='utf-8') as f:
+        f.write("# API\n\nSee [the endpoints](web.md).\n\n```mermaid\ngraph TD\n  api --> db\n```\n")
+    with open(os.path.join(shard, 'web.md'), 'w', encoding='utf-8') as f:
+        f.write("# Web\n\n- GET /orders\n")
+
+    with FakeConfluence() as fake:
+        _publish(fake, docs_folder)
+
+        parent, api = fake.page('Shop Docs'), fake.page('Shop Docs - api')
+        assert api['parent'] == parent['id']
+        assert fake.page('Shop Docs - api - Web')['parent'] == api['id']
+        assert fake.page('Shop Docs - Web')['parent'] == parent['id']
+        assert ('<ac:link><ri:page ri:content-title="Shop Docs - api" /><ac:link-body>API docs</ac:link-body></ac:link>'
+                in parent['body']['storage']['value'])
+        assert 'ri:content-title="Shop Docs - api - Web"' in api['body']['storage']['value']
+        assert set(fake.attachments[api['id']]) == {'index_diagram_1.png'}
+        assert os.path.exists(os.path.join(shard, 'diagrams', 'index_diagram_1.png'))
@@ -0,0 +1,39 @@
+from agent import DocumentationAgent
+from core.dedup import deduplicate
+from core.security import is_sensitive_file
+
+LIB = ''.join(f"export function helper{i}(x) {{ return x * {i}; }}\n" for i in range(20))
+
+
+def _file(path, content):
+    return {'path': path, 'language': 'javascript', 'content': content, 'size': len(content),
+            'lines': content.count('\n') + 1}
+
+
+def test_identical_files_fold_into_one_representative():
+    files = [_file('web/static/lib.js', LIB), _file('web/public/lib.js', LIB)]
+    unique, clusters = deduplicate(files)
+
+    assert [f['path'] for f in unique] == ['web/public/lib.js']
+    assert clusters == [{'representative': 'web/public/lib.js',
+                         'duplicates': [{'path': 'web/static/lib.js', 'similarity': 1.0, 'exact': True}]}]
+
+
+def test_excluded_files_never_represent_a_cluster():
+    files = [_file('vendor/lib.js', LIB), _file('web/static/lib.js', LIB), _file('web/public/lib.js', LIB)]
+    unique, clusters = deduplicate(files, exclude=is_sensitive_file)
+
+    assert [f['path'] for f in unique] == ['vendor/lib.js', 'web/public/lib.js']
+    assert [cluster['representative'] for cluster in clusters] == ['web/public/lib.js']
+
+
+def test_sensitive_copy_does_not_hide_its_twin_from_the_prompt(tmp_path):
+    files = [_file('vendor/lib.js', LIB), _file('web/static/lib.js', LIB)]
+    stats = {'total_files': 2, 'total_lines': 2 * files[0]['lines'], 'languages': {'javascript': {'files': 2}}}
+    agent = DocumentationAgent(None, output_dir=str(tmp_path))
+
+    prompt = agent._prepare_input(files, stats)['llm_input']
+
+    assert 'FILE: web/static/lib.js' in prompt
+    assert 'FILE: vendor/lib.js' not in prompt
+    assert 'Excluded 1 sensitive files, 0 duplicates shown once' in prompt
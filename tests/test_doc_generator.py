@@ -0,0 +1,54 @@
+import os
+
+from docs.doc_generator import DOC_TYPES, DocumentationGenerator, doc_files
+
+
+class FakeLLM:
+    def generate_documentation(self, codebase_content, doc_type, grounding=None):
+        return f"# {doc_type.title()}\n\n## Overview\n\nAbout {codebase_content}.\n"
+
+    def generate_rollup(self, doc_type, shard_digest):
+        links = [line.split(': ', 1)[1] for line in shard_digest.splitlines() if line.startswith('Docs: ')]
+        return "# Monorepo\n\n## Subprojects\n\n" + ''.join(f"- [{link}]({link})\n" for link in links)
+
+    def repair_mermaid(self, diagram, errors):
+        return diagram
+
+
+def _shard(name):
+    return {'name': name, 'root': name, 'stats': {'total_files': 1, 'total_lines': 1, 'languages': {'java': {}}}}
+
+
+def _sharded_run(output_dir, names):
+    generator = DocumentationGenerator(output_dir)
+    generator.remove_shard_docs()
+    shard_docs = {name: generator.shard_generator(name).generate_all_docs(FakeLLM(), name) for name in names}
+    generator.generate_rollup(FakeLLM(), [_shard(name) for name in names], shard_docs, {})
+    return generator
+
+
+def test_sharded_run_replaces_stale_top_level_docs(tmp_path):
+    generator = DocumentationGenerator(str(tmp_path))
+    generator.generate_all_docs(FakeLLM(), 'the whole repo')
+    os.makedirs(os.path.join(generator.docs_dir, 'diagrams'))
+    open(os.path.join(generator.docs_dir, 'diagrams', 'database_diagram_1.png'), 'wb').close()
+    open(os.path.join(generator.docs_dir, 'diagrams', 'index_diagram_1.png'), 'wb').close()
+
+    _sharded_run(str(tmp_path), ['api', 'web'])
+
+    assert doc_files(generator.docs_dir) == (
+        ['index.md', 'architecture.md']
+        + [f"shards/api/{doc_type}.md" for doc_type in ['index'] + sorted(DOC_TYPES[1:])]
+        + [f"shards/web/{doc_type}.md" for doc_type in ['index'] + sorted(DOC_TYPES[1:])])
+    assert os.listdir(os.path.join(generator.docs_dir, 'diagrams')) == ['index_diagram_1.png']
+    with open(os.path.join(generator.docs_dir, 'index.md'), encoding='utf-8') as f:
+        assert '(shards/api/index.md)' in f.read()
+
+
+def test_later_runs_drop_subprojects_that_are_gone(tmp_path):
+    generator = _sharded_run(str(tmp_path), ['api', 'web'])
+    _sharded_run(str(tmp_path), ['api'])
+    assert not os.path.exists(os.path.join(generator.docs_dir, 'shards', 'web'))
+
+    generator.generate_all_docs(FakeLLM(), 'the whole repo')
+    assert doc_files(generator.docs_dir) == [f"{doc_type}.md" for doc_type in ['index'] + sorted(DOC_TYPES[1:])]
@@ -0,0 +1,64 @@
+from core.local_analysis import DIAGRAM_PLACEHOLDER
+from docs.doc_patcher import DocPatcher
+
+DATABASE_MD = """# Database Documentation
+
+## Data Models
+
+Tables: orders.
+
+## Entity Relationships
+
+```mermaid
+erDiagram
+  ORDERS {
+    int id
+  }
+```
+
+Orders stand alone.
+
+## Configuration
+
+MySQL.
+"""
+
+CHANGE = {'path': 'db/002_items.sql', 'old_path': 'db/002_items.sql', 'status': 'M',
+          'patch': '@@ -0,0 +1 @@\n+CREATE TABLE items (id INT, order_id INT REFERENCES orders(id));\n'}
+NEW_ERD = 'erDiagram\n  ORDERS ||--o{ ITEMS : "order_id"'
+
+
+class FakeLLM:
+    def __init__(self):
+        self.sections = []
+
+    def rewrite_section(self, doc_type, section, changes):
+        self.sections.append(section)
+        drawn = "\n```mermaid\nerDiagram\n  MADE_UP ||--|| THINGS : x\n```\n" if 'Entity' in section else ''
+        return section.replace('Orders stand alone.', 'Each order has items.').replace(
+            'Tables: orders.', 'Tables: orders, items.') + drawn
+
+
+def _patch(tmp_path, load_diagrams):
+    (tmp_path / 'database.md').write_text(DATABASE_MD)
+    llm = FakeLLM()
+    patched = DocPatcher(str(tmp_path)).patch(llm, [dict(CHANGE)], ['database'], load_diagrams=load_diagrams)
+    return llm, patched, (tmp_path / 'database.md').read_text()
+
+
+def test_entity_relationships_diagram_is_rebuilt_locally(tmp_path):
+    llm, patched, doc = _patch(tmp_path, lambda: {'database': [NEW_ERD]})
+
+    assert patched == {'database': ['Data Models', 'Entity Relationships']}
+    er_prompt = next(section for section in llm.sections if 'Entity' in section)
+    assert DIAGRAM_PLACEHOLDER in er_prompt and 'mermaid' not in er_prompt
+    assert f"## Entity Relationships\n\n```mermaid\n{NEW_ERD}\n```\n\nEach order has items.\n\n## Configuration" in doc
+    assert 'MADE_UP' not in doc and 'int id' not in doc
+    assert 'Tables: orders, items.' in doc
+
+
+def test_current_diagram_is_kept_without_local_grounding(tmp_path):
+    _, _, doc = _patch(tmp_path, lambda: {})
+
+    assert "## Entity Relationships\n\n```mermaid\nerDiagram\n  ORDERS {\n    int id\n  }\n```\n\nEach order" in doc
+    assert 'MADE_UP' not in doc
@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+from core.codebase_processor import CodebaseProcessor
+from core.file_store import BlobStore, FileRecord
+
+
+def test_blob_store_closes_its_mapping_and_temp_file():
+    with BlobStore() as store:
+        record = FileRecord('a.py', 'python', 'print("hi")\n', store)
+        assert record['content'] == 'print("hi")\n'
+    assert store._map is None and store._file.closed
+    with pytest.raises(ValueError):
+        record.content
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='needs /proc to count open descriptors')
+def test_processor_releases_every_store_it_created(tmp_path):
+    (tmp_path / 'app.py').write_text("x = 1\n")
+    processor = CodebaseProcessor()
+    open_before = len(os.listdir('/proc/self/fd'))
+
+    for _ in range(3):
+        files, _ = processor.process_codebase(str(tmp_path))
+        assert files[0]['content'] == "x = 1\n"
+    assert len(os.listdir('/proc/self/fd')) > open_before
+
+    processor.close()
+    assert len(os.listdir('/proc/self/fd')) == open_before
@@ -0,0 +1,69 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from docs.http_session import RateLimiter, create_pooled_session
+from tests.fake_confluence import FakeConfluence, fail_first_attempt
+
+
+def test_rate_limiter_spaces_requests_after_the_burst():
+    limiter = RateLimiter(rate=50, burst=2)
+    start = time.monotonic()
+    for _ in range(7):
+        limiter.acquire()
+
+    # Two requests pass at once, the other five wait 1/50 s each
+    assert 0.09 <= time.monotonic() - start < 0.5
+
+
+def test_rate_limiter_is_shared_across_threads():
+    limiter = RateLimiter(rate=100, burst=1)
+    stamps = []
+    lock = threading.Lock()
+
+    def acquire(_):
+        limiter.acquire()
+        with lock:
+            stamps.append(time.monotonic())
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(acquire, range(12)))
+
+    assert stamps[-1] - stamps[0] >= 0.1
+
+
+def test_session_retries_429_honouring_retry_after():
+    with FakeConfluence(fail=fail_first_attempt(429, retry_after='1')) as fake:
+        start = time.monotonic()
+        response = create_pooled_session(requests_per_second=0).get(f"{fake.url}/rest/api/content?title=x")
+
+        assert response.status_code == 200
+        assert time.monotonic() - start >= 1
+        assert fake.failures == [('GET', 'content', 429)]
+
+
+def test_session_retries_unavailable_writes():
+    with FakeConfluence(fail=fail_first_attempt(503)) as fake:
+        response = create_pooled_session(requests_per_second=0).post(
+            f"{fake.url}/rest/api/content", json={'title': 'Page', 'body': {}, 'type': 'page'})
+
+        assert response.status_code == 200
+        assert fake.failures == [('POST', 'content', 503)]
+        assert fake.page('Page') is not None
+
+
+def test_session_does_not_retry_other_errors():
+    with FakeConfluence(fail=fail_first_attempt(500)) as fake:
+        response = create_pooled_session(requests_per_second=0).get(f"{fake.url}/rest/api/content?title=x")
+
+        assert response.status_code == 500
+        assert fake.log == []
+
+
+def test_session_gives_up_after_max_retries():
+    with FakeConfluence(fail=lambda method, path: (503, {'Retry-After': '0'})) as fake:
+        response = create_pooled_session(requests_per_second=0, max_retries=2).get(
+            f"{fake.url}/rest/api/content?title=x")
+
+        assert response.status_code == 503
+        assert len(fake.failures) == 3
@@ -0,0 +1,36 @@
+import subprocess
+
+from core.repo_source import diff_changes
+
+
+def _git(repo, *args):
+    subprocess.run(['git', '-C', str(repo), '-c', 'user.name=t', '-c', 'user.email=t@example.com', *args],
+                   check=True, capture_output=True)
+
+
+def test_diff_changes_keeps_each_file_patch_whole(tmp_path):
+    repo = tmp_path / 'repo'
+    repo.mkdir()
+    _git(repo, 'init', '-q')
+    (repo / 'fixture.patch').write_text("old\n")
+    (repo / 'with space.py').write_text("x = 1\n")
+    (repo / 'moved_from.py').write_text(''.join(f"line {i}\n" for i in range(20)))
+    _git(repo, 'add', '-A')
+    _git(repo, 'commit', '-q', '-m', 'base')
+
+    (repo / 'fixture.patch').write_text("diff --git a/other.py b/other.py\n+added\n")
+    (repo / 'with space.py').write_text("x = 2\n")
+    (repo / 'ünï[code].py').write_text("y = 1\n")
+    (repo / 'moved_from.py').rename(repo / 'moved to.py')
+    _git(repo, 'add', '-A')
+    _git(repo, 'commit', '-q', '-m', 'change')
+
+    changes = {change['path']: change for change in diff_changes(str(repo), 'HEAD~1..HEAD')}
+
+    assert set(changes) == {'fixture.patch', 'with space.py', 'ünï[code].py', 'moved to.py'}
+    assert '+diff --git a/other.py b/other.py\n++added' in changes['fixture.patch']['patch']
+    assert '-x = 1\n+x = 2' in changes['with space.py']['patch']
+    assert changes['ünï[code].py']['status'] == 'A' and '+y = 1' in changes['ünï[code].py']['patch']
+    renamed = changes['moved to.py']
+    assert (renamed['status'], renamed['old_path']) == ('R', 'moved_from.py')
+    assert 'rename from moved_from.py' in renamed['patch']
@@ -0,0 +1,72 @@
+from core.route_extractor import extract_routes
+
+
+def _js(path, content):
+    return {'path': path, 'language': 'javascript', 'size': len(content), 'content': content}
+
+
+def _table(routes):
+    return [(route['method'], route['path'], route['handler']) for route in routes]
+
+
+def test_express_routes_ignore_http_clients_and_comments():
+    app = _js('src/app.js', '''
+const express = require('express');
+const axios = require('axios');
+const api = axios.create({ baseURL: '/api' });
+const app = express();
+
+// app.get('/commented', handler)
+/* app.post('/block-commented', handler) */
+app.get('/health', health);
+
+async function load(q) {
+  return api.get('/users', {params: q});
+}
+''')
+    assert _table(extract_routes([app], {})) == [('GET', '/health', 'health')]
+
+
+def test_express_use_applies_mount_prefixes_across_files():
+    app = _js('src/app.js', '''
+import express from 'express';
+import usersRouter from './routes/users';
+const app = express();
+app.use(express.json());
+app.use('/api', auth, usersRouter);
+app.use('/admin', require('./routes/admin'));
+app.use('/static', express.static('public'));
+''')
+    users = _js('src/routes/users.js', '''
+const express = require('express');
+const router = express.Router();
+const nested = express.Router();
+router.get('/users', listUsers);
+router.post('/users/:id', (req, res) => res.send());
+router.use('/v2', nested);
+nested.delete('/users/:id', removeUser);
+module.exports = router;
+''')
+    admin = _js('src/routes/admin/index.js', '''
+const { Router } = require('express');
+const router = Router();
+router.route('/stats').get(showStats).post(resetStats);
+module.exports = router;
+''')
+    assert _table(extract_routes([app, users, admin], {})) == [
+        ('GET', '/admin/stats', 'showStats'),
+        ('POST', '/admin/stats', 'resetStats'),
+        ('GET', '/api/users', 'listUsers'),
+        ('POST', '/api/users/:id', 'inline handler'),
+        ('DELETE', '/api/v2/users/:id', 'removeUser'),
+    ]
+
+
+
+def test_regex_literal_does_not_hide_routes():
+    app = _js('server.ts', '''
+import express, { Express } from 'express';
+const app: Express = express();
+const re = /^https?:\\/\\//; app.get('/links', listLinks);
+''')
+    assert _table(extract_routes([app], {})) == [('GET', '/links', 'listLinks')]
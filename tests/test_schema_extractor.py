@@ -0,0 +1,44 @@
+from core.schema_extractor import extract_schema, format_schema, render_er_diagrams
+
+
+def _migration(path, content):
+    return {'path': path, 'language': 'sql', 'size': len(content), 'content': content}
+
+
+def test_rename_column_follows_foreign_keys_and_unique_constraints():
+    files = [
+        _migration('db/V1__init.sql', '''
+            CREATE TABLE accounts (id BIGINT PRIMARY KEY, name VARCHAR(100));
+            CREATE TABLE posts (
+                id BIGINT PRIMARY KEY,
+                account_id BIGINT NOT NULL,
+                slug VARCHAR(100),
+                CONSTRAINT fk_posts_account FOREIGN KEY (account_id) REFERENCES accounts (id),
+                UNIQUE (account_id, slug)
+            );
+        '''),
+        _migration('db/V2__rename.sql', 'ALTER TABLE posts RENAME COLUMN account_id TO owner_id;'),
+    ]
+    schema = extract_schema(files, {})
+    posts = schema['tables']['posts']
+
+    assert [fk['columns'] for fk in posts['foreign_keys']] == [['owner_id']]
+    assert posts['unique'] == [['owner_id', 'slug']]
+    assert [relation['label'] for relation in schema['relationships']] == ['owner_id']
+    assert 'owner_id BIGINT FK' in format_schema(schema)
+    assert 'account_id' not in format_schema(schema)
+    assert 'account_id' not in '\n'.join(render_er_diagrams(schema))
+
+
+def test_rename_referenced_column_updates_referencing_foreign_keys():
+    files = [
+        _migration('db/V1__init.sql', '''
+            CREATE TABLE accounts (id BIGINT PRIMARY KEY);
+            CREATE TABLE posts (id BIGINT PRIMARY KEY, account_id BIGINT REFERENCES accounts (id));
+        '''),
+        _migration('db/V2__rename.sql', 'ALTER TABLE accounts RENAME COLUMN id TO account_key;'),
+    ]
+    schema = extract_schema(files, {})
+
+    assert schema['tables']['accounts']['primary_key'] == ['account_key']
+    assert [fk['ref_columns'] for fk in schema['tables']['posts']['foreign_keys']] == [['account_key']]
@@ -0,0 +1,46 @@
+import json
+import os
+
+import pytest
+
+from docs import mermaid_renderer
+from docs.site_builder import SEARCH_INDEX_FILE, build_site
+
+
+@pytest.fixture
+def sharded_docs(tmp_path, monkeypatch):
+    monkeypatch.setitem(mermaid_renderer._resolved_mmdc, 'mmdc', None)
+    docs = tmp_path / 'output' / 'docs'
+    (docs / 'shards' / 'api').mkdir(parents=True)
+    (docs / 'index.md').write_text("# Monorepo\n\n- [API](shards/api/index.md)\n- [Design](architecture.md)\n")
+    (docs / 'architecture.md').write_text("# Architecture\n\nHow the subprojects fit.\n")
+    (docs / 'shards' / 'api' / 'index.md').write_text("# API\n\n[Endpoints](web.md#routes) and [home](../../index.md)\n")
+    (docs / 'shards' / 'api' / 'web.md').write_text("# Web\n\n## Routes\n\nGET /orders\n")
+    return str(docs), str(tmp_path / 'output' / 'site')
+
+
+def test_subproject_docs_are_built_and_linked(sharded_docs):
+    docs, site = sharded_docs
+    result = build_site(docs, site)
+
+    assert result['built'] == ['index.md', 'architecture.md', 'shards/api/index.md', 'shards/api/web.md']
+    with open(os.path.join(site, 'index.html'), encoding='utf-8') as f:
+        index = f.read()
+    assert 'href="shards-api-index.html">API</a>' in index
+    assert 'href="architecture.html">Design</a>' in index
+    assert '<a class="nav-item" href="shards-api-web.html">api: Web</a>' in index
+    with open(os.path.join(site, 'shards-api-index.html'), encoding='utf-8') as f:
+        api = f.read()
+    assert 'href="shards-api-web.html#routes"' in api and 'href="index.html">home</a>' in api
+    with open(os.path.join(site, SEARCH_INDEX_FILE), encoding='utf-8') as f:
+        search = json.loads(f.read()[len('window.SEARCH_INDEX = '):-2])
+    assert ['shards-api-web.html', 'routes', 'api: Web', 'Routes', 'GET /orders'] in search['docs']
+
+
+def test_removed_subproject_pages_are_deleted(sharded_docs):
+    docs, site = sharded_docs
+    build_site(docs, site)
+    os.remove(os.path.join(docs, 'shards', 'api', 'web.md'))
+
+    assert build_site(docs, site)['removed'] == ['shards/api/web.md']
+    assert not os.path.exists(os.path.join(site, 'shards-api-web.html'))
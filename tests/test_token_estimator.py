@@ -0,0 +1,68 @@
+import os
+import sys
+import types
+
+import pytest
+
+from core import token_estimator
+from core.token_estimator import TokenEstimator, bundle_encoding
+
+
+class _Encoder:
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+
+@pytest.fixture
+def fake_tiktoken(tmp_path, monkeypatch):
+    """tiktoken stand-in that records the cache folder it is pointed at and 'downloads' into it"""
+    seen = []
+
+    def encoding_for_model(model_name):
+        cache_dir = os.environ.get('TIKTOKEN_CACHE_DIR')
+        seen.append(cache_dir)
+        if cache_dir:
+            with open(os.path.join(cache_dir, '9b5ad71b2ce5302211f9c61530b329a4922fc6a4'), 'w') as f:
+                f.write(model_name)
+        return _Encoder()
+
+    monkeypatch.setitem(sys.modules, 'tiktoken',
+                        types.SimpleNamespace(encoding_for_model=encoding_for_model))
+    monkeypatch.setattr(token_estimator, '_encoders', {})
+    monkeypatch.setattr(token_estimator, 'TOKENIZER_BUNDLE_DIR', str(tmp_path / 'bundle'))
+    monkeypatch.delenv('TIKTOKEN_CACHE_DIR', raising=False)
+    return seen
+
+
+def test_bundle_is_used_without_changing_the_environment(fake_tiktoken, tmp_path):
+    (tmp_path / 'bundle').mkdir()
+
+    assert TokenEstimator().estimate_tokens('three word text') == 3
+    assert fake_tiktoken == [str(tmp_path / 'bundle')]
+    assert 'TIKTOKEN_CACHE_DIR' not in os.environ
+
+
+def test_cache_dir_from_environment_takes_precedence(fake_tiktoken, tmp_path, monkeypatch):
+    (tmp_path / 'bundle').mkdir()
+    monkeypatch.setenv('TIKTOKEN_CACHE_DIR', str(tmp_path))
+
+    TokenEstimator().estimate_tokens('text')
+
+    assert fake_tiktoken == [str(tmp_path)]
+    assert os.environ['TIKTOKEN_CACHE_DIR'] == str(tmp_path)
+
+
+def test_bundle_encoding_writes_the_bundle(fake_tiktoken, tmp_path):
+    written = bundle_encoding('gpt-4', str(tmp_path / 'bundle'))
+
+    assert written == [str(tmp_path / 'bundle' / '9b5ad71b2ce5302211f9c61530b329a4922fc6a4')]
+    assert 'TIKTOKEN_CACHE_DIR' not in os.environ
+    assert TokenEstimator().estimate_tokens('two words') == 2
+    assert len(fake_tiktoken) == 1  # The bundled encoder is reused
+
+
+def test_missing_tokenizer_falls_back_to_characters(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'tiktoken', None)
+    monkeypatch.setattr(token_estimator, '_encoders', {})
+
+    assert TokenEstimator().estimate_tokens('x' * 40) == 10